@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Applicant, Skill, ApplicantSkill, Evaluation, Job
+from .models import Applicant, Skill, ApplicantSkill, Evaluation, Job, ProcessingJob, ResumeDocument
 
 @admin.register(Applicant)
 class ApplicantAdmin(admin.ModelAdmin):
@@ -12,3 +12,13 @@ class SkillAdmin(admin.ModelAdmin):
 @admin.register(Evaluation)
 class EvaluationAdmin(admin.ModelAdmin):
     list_display = ('applicant', 'total_score', 'skill_score', 'experience_score')
+
+@admin.register(ProcessingJob)
+class ProcessingJobAdmin(admin.ModelAdmin):
+    list_display = ('applicant', 'job', 'status', 'attempts', 'run_after', 'locked_by', 'updated_at')
+    list_filter = ('status',)
+
+@admin.register(ResumeDocument)
+class ResumeDocumentAdmin(admin.ModelAdmin):
+    list_display = ('file', 'sha256', 'created_at')
+    search_fields = ('sha256',)
@@ -1,34 +1,92 @@
-import google.generativeai as genai
 from django.conf import settings
 import json
+import logging
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from .caching import get_response_cache, response_cache_enabled_for
+from .compaction import compact_resume
+from .lazy import genai
+from .ratelimit import RateLimitError, estimate_tokens, get_rate_limiter
 
-# Configure GenAI
-if settings.GOOGLE_API_KEY:
-    genai.configure(api_key=settings.GOOGLE_API_KEY)
+logger = logging.getLogger(__name__)
+
+USAGE_FIELDS = {
+    "prompt_tokens": "prompt_token_count",
+    "output_tokens": "candidates_token_count",
+    "total_tokens": "total_token_count",
+}
 
 class BaseAgent:
-    def __init__(self, model_name="gemini-2.5-flash"):
-        self.primary_model_name = model_name
-        self.fallback_model_name = "gemini-2.5-flash"
-        self.model = genai.GenerativeModel(self.primary_model_name)
-        self.fallback_model = genai.GenerativeModel(self.fallback_model_name)
+    def __init__(self, model_name=None, response_cache=None, rate_limiter=None):
+        # Routing order: the requested model first, then the configured alternatives
+        configured = settings.ATS_RATE_LIMIT['MODELS']
+        self.model_names = list(dict.fromkeys([model_name, *configured] if model_name else configured))
+        self.primary_model_name = self.model_names[0]
+        self.models = {name: genai.GenerativeModel(name) for name in self.model_names}
+        self.model = self.models[self.primary_model_name]
+        # Shared RPM/TPM limits and circuit breakers, see ats/ratelimit.py
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        # Opt-in response cache, enabled per agent class in ATS_LLM_CACHE['AGENTS']
+        if response_cache is None and response_cache_enabled_for(type(self).__name__):
+            response_cache = get_response_cache()
+        self.response_cache = response_cache or None
+        # Cumulative token usage of this agent, from response.usage_metadata
+        self.usage = {"requests": 0, **dict.fromkeys(USAGE_FIELDS, 0)}
+        self._usage_lock = threading.Lock()
+
+    def _record_usage(self, response, model_name):
+        metadata = getattr(response, "usage_metadata", None)
+        counts = {}
+        for key, field in USAGE_FIELDS.items():
+            value = getattr(metadata, field, 0) if metadata is not None else 0
+            counts[key] = value if isinstance(value, int) else 0
+        with self._usage_lock:
+            self.usage["requests"] += 1
+            for key, value in counts.items():
+                self.usage[key] += value
+        logger.debug(
+            "%s on %s: %d prompt + %d output tokens",
+            type(self).__name__, model_name, counts["prompt_tokens"], counts["output_tokens"],
+        )
+        return counts
+
+    def _cached(self, prompt):
+        if not self.response_cache:
+            return None
+        # An answer from any model in the routing list will do
+        return self.response_cache.get_any(self.model_names, prompt)
+
+    def _store(self, model_name, prompt, text):
+        if self.response_cache and text:
+            self.response_cache.set(model_name, prompt, text)
+        return text
+
+    def _call(self, model_name, prompt, estimated_tokens):
+        response = self.models[model_name].generate_content(prompt)
+        counts = self._record_usage(response, model_name)
+        if counts["total_tokens"]:
+            self.rate_limiter.record_tokens(model_name, counts["total_tokens"], estimated_tokens)
+        return self._store(model_name, prompt, response.text)
 
     def generate(self, prompt):
+        cached = self._cached(prompt)
+        if cached is not None:
+            return cached
+        # Prompt estimate plus room for the JSON answer; corrected from usage_metadata afterwards
+        estimated_tokens = estimate_tokens(prompt) + 500
         try:
-            response = self.model.generate_content(prompt)
-            return response.text
+            return self.rate_limiter.call(
+                self.model_names,
+                lambda model_name: self._call(model_name, prompt, estimated_tokens),
+                tokens=estimated_tokens,
+            )
+        except RateLimitError as e:
+            print(f"Warning: Quota exceeded for {', '.join(self.model_names)}: {e}")
         except Exception as e:
-            if "429" in str(e) or "Quota exceeded" in str(e):
-                print(f"Warning: Quota exceeded for {self.primary_model_name}. Retrying with fallback {self.fallback_model_name}...")
-                try:
-                    response = self.fallback_model.generate_content(prompt)
-                    return response.text
-                except Exception as e2:
-                    print(f"Error generating content with fallback: {e2}")
-            else:
-                print(f"Error generating content: {e}")
-            return None
+            print(f"Error generating content: {e}")
+        return None
 
 class ParsingAgent(BaseAgent):
     def parse_resume(self, resume_text):
@@ -93,8 +151,8 @@ class RankingAgent(BaseAgent):
         
         Context: {context}
         
-        Resume Text (truncated):
-        {resume_text[:4000]}
+        Resume Text:
+        {resume_text}
         
         Return ONLY valid JSON:
         {{
@@ -113,24 +171,192 @@ class RankingAgent(BaseAgent):
                 return None
         return None
 
+class FusedExtractionAgent(BaseAgent):
+    """
+    Parsing, skill extraction and ranking in a single request, so the resume
+    text is sent (and billed) once instead of three times.
+    """
+    def extract_all(self, resume_text, job_description=""):
+        context = f"Job Description: {job_description}" if job_description else "General Software Engineering Role"
+
+        prompt = f"""
+        You are a Resume Screening Agent. Read the resume text once and produce three results:
+        1. "parsed": the candidate's details.
+        2. "skills": technical and soft skills found in the resume.
+        3. "ranking": an evaluation of the candidate against the context, scored 0 to 100,
+           with a brief reason (2 sentences).
+        Return ONLY a valid JSON object. Do not include any markdown formatting (like ```json).
+
+        Context: {context}
+
+        Output format:
+        {{
+            "parsed": {{
+                "name": "string",
+                "email": "string",
+                "phone": "string",
+                "experience_summary": "string, max 100 words summary",
+                "skills_raw": ["string"],
+                "education": [{{"degree": "string", "institution": "string", "year": "string"}}]
+            }},
+            "skills": {{
+                "tech_skills": ["skill1", "skill2"],
+                "soft_skills": ["skill1", "skill2"],
+                "confidence_score": 0.0 to 1.0 (float reflecting overall confidence in extraction)
+            }},
+            "ranking": {{
+                "total_score": int,
+                "skill_score": int,
+                "experience_score": int,
+                "reason": "string"
+            }}
+        }}
+
+        Resume Text:
+        {resume_text}
+        """
+        response_text = self.generate(prompt)
+        if response_text:
+            clean_text = response_text.replace("```json", "").replace("```", "").strip()
+            try:
+                data = json.loads(clean_text)
+            except json.JSONDecodeError:
+                print("Failed to decode JSON from Fused Extraction Agent")
+                return None
+            if isinstance(data, dict):
+                # Same shape as the three separate agents; missing parts become None
+                return {key: data.get(key) if isinstance(data.get(key), dict) else None for key in ("parsed", "skills", "ranking")}
+        return None
+
 class Orchestrator:
-    def __init__(self):
+    """
+    Runs the parsing, skill extraction and ranking agents over one resume.
+
+    Modes (ATS_ORCHESTRATOR['MODE']):
+    - "sequential": one agent after another.
+    - "concurrent": all three at once on a thread pool, so latency is roughly
+      the slowest call. An agent that misses its timeout (ATS_ORCHESTRATOR['TIMEOUTS'])
+      or raises contributes None, and its key is listed in results["errors"].
+    - "fused": one FusedExtractionAgent request returning all three parts,
+      paying for the resume's input tokens once.
+
+    Each agent gets its own budgeted digest of the resume (ats/compaction.py)
+    rather than the raw text. Token usage of every run, and the resume
+    tokens compaction saved, are logged so the modes can be compared.
+    """
+    def __init__(self, mode=None, timeouts=None):
+        config = settings.ATS_ORCHESTRATOR
+        self.mode = mode or config['MODE']
+        self.timeouts = {**config['TIMEOUTS'], **(timeouts or {})}
         self.parser = ParsingAgent()
         self.extractor = SkillExtractionAgent()
         self.ranker = RankingAgent()
+        self.fused = FusedExtractionAgent()
 
-    def process_resume(self, resume_text, job_description=""):
-        # 1. Parse
-        parsed_data = self.parser.parse_resume(resume_text)
-        
-        # 2. Extract Skills
-        skills_data = self.extractor.extract_skills(resume_text)
-        
-        # 3. Rank
-        ranking_data = self.ranker.rank_candidate(resume_text, job_description)
-        
-        return {
-            "parsed": parsed_data,
-            "skills": skills_data,
-            "ranking": ranking_data
+    def _agents(self):
+        return (self.parser, self.extractor, self.ranker, self.fused)
+
+    def usage(self):
+        """Token usage summed over all agents of this orchestrator."""
+        total = {"requests": 0, **dict.fromkeys(USAGE_FIELDS, 0)}
+        for agent in self._agents():
+            with agent._usage_lock:
+                for key in total:
+                    total[key] += agent.usage[key]
+        return total
+
+    def _tasks(self, resume, job_description, rank=True):
+        tasks = {
+            "parsed": lambda: self.parser.parse_resume(resume.digest("parsing")),
+            "skills": lambda: self.extractor.extract_skills(resume.digest("skills")),
+            "ranking": lambda: self.ranker.rank_candidate(resume.digest("ranking"), job_description),
         }
+        if not rank:
+            del tasks["ranking"]
+        return tasks
+
+    def process_resume(self, resume_text, job_description="", rank=True):
+        """
+        Returns {"parsed", "skills", "ranking"}. `resume_text` is the
+        extracted text or a CompactedResume built from it already. With
+        `rank` off the ranking agent isn't called and "ranking" is None,
+        except in fused mode where the ranking comes with the same request
+        anyway.
+        """
+        resume = compact_resume(resume_text)
+        before = self.usage()
+        if self.mode == "fused":
+            agents = ["fused"]
+            results = self.fused.extract_all(resume.digest("fused"), job_description) or {"parsed": None, "skills": None, "ranking": None}
+        elif self.mode == "concurrent":
+            agents = ["parsing", "skills", "ranking"][:3 if rank else 2]
+            results = self._process_concurrently(resume, job_description, rank)
+        else:
+            # 1. Parse, 2. Extract Skills, 3. Rank
+            agents = ["parsing", "skills", "ranking"][:3 if rank else 2]
+            tasks = self._tasks(resume, job_description, rank)
+            results = {key: task() for key, task in tasks.items()}
+        results.setdefault("ranking", None)
+
+        self.last_compaction = {
+            "raw_tokens": resume.input_tokens(agents, compacted=False),
+            "sent_tokens": resume.input_tokens(agents),
+        }
+        logger.info(
+            "Resume compaction: %d resume tokens sent instead of %d",
+            self.last_compaction["sent_tokens"], self.last_compaction["raw_tokens"],
+        )
+
+        after = self.usage()
+        # Concurrent stragglers may still land later; this is what finished in time
+        self.last_usage = {key: after[key] - before[key] for key in after}
+        logger.info(
+            "Processed resume in %s mode: %d requests, %d prompt tokens, %d output tokens",
+            self.mode, self.last_usage["requests"], self.last_usage["prompt_tokens"], self.last_usage["output_tokens"],
+        )
+        return results
+
+    def _process_concurrently(self, resume, job_description, rank=True):
+        tasks = self._tasks(resume, job_description, rank)
+        results, errors = {}, {}
+        executor = ThreadPoolExecutor(max_workers=len(tasks), thread_name_prefix="ats-agent")
+        try:
+            started = time.monotonic()
+            futures = {key: executor.submit(task) for key, task in tasks.items()}
+            for key, future in futures.items():
+                # Every agent's timeout counts from the shared start
+                remaining = max(0.0, started + self.timeouts[key] - time.monotonic())
+                try:
+                    results[key] = future.result(timeout=remaining)
+                except FutureTimeoutError:
+                    print(f"Warning: {key} agent timed out after {self.timeouts[key]}s")
+                    results[key] = None
+                    errors[key] = "timeout"
+                except Exception as e:
+                    print(f"Error in {key} agent: {e}")
+                    results[key] = None
+                    errors[key] = str(e)
+        finally:
+            # Don't block the request on an agent that already timed out
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        if errors:
+            results["errors"] = errors
+        return results
+
+_orchestrators = {}
+_orchestrators_lock = threading.Lock()
+
+def get_orchestrator():
+    """
+    Process-wide Orchestrator in the configured ATS_ORCHESTRATOR['MODE'].
+    Its agents hold one GenerativeModel per routed model, so requests share
+    them instead of building new ones per upload. Agents keep no state
+    between requests besides locked usage counters; `last_usage` and
+    `last_compaction` are only indicative when several threads share it.
+    """
+    mode = settings.ATS_ORCHESTRATOR['MODE']
+    with _orchestrators_lock:
+        if mode not in _orchestrators:
+            _orchestrators[mode] = Orchestrator(mode=mode)
+        return _orchestrators[mode]
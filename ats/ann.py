@@ -0,0 +1,186 @@
+import json
+import os
+import numpy as np
+
+CENTROIDS_FILE = 'ivf_centroids.npy'
+PARAMS_FILE = 'ivf_params.json'
+
+class _InvertedList:
+    """
+    Growable float32 block of the vectors assigned to one centroid.
+    Removal swaps the last row into the hole so the block stays dense.
+    """
+    def __init__(self, dim):
+        self.ids = []
+        self.vectors = np.empty((0, dim), dtype=np.float32)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def extend(self, ids, vectors):
+        start = len(self.ids)
+        end = start + len(ids)
+        if end > self.vectors.shape[0]:
+            grown = np.empty((max(end, 2 * self.vectors.shape[0], 16), self.vectors.shape[1]), dtype=np.float32)
+            grown[:start] = self.vectors[:start]
+            self.vectors = grown
+        self.vectors[start:end] = vectors
+        self.ids.extend(ids)
+        return start
+
+    def remove(self, slot):
+        """Remove the row at slot; returns the id moved into it (or None)."""
+        last = len(self.ids) - 1
+        moved = None
+        if slot != last:
+            self.vectors[slot] = self.vectors[last]
+            self.ids[slot] = self.ids[last]
+            moved = self.ids[slot]
+        self.ids.pop()
+        return moved
+
+    def scores(self, query):
+        return self.vectors[:len(self.ids)] @ query
+
+class IVFIndex:
+    """
+    Inverted-file approximate nearest neighbour index over normalized vectors.
+
+    Spherical k-means splits the space into `nlist` cells; a query only scans the
+    `nprobe` cells whose centroids are closest to it. Raising `nprobe` trades
+    speed for recall (nprobe == nlist is an exact search).
+
+    Only the centroids are persisted. The inverted lists are rebuilt by assigning
+    the store's vectors to them, which is a single matrix product.
+    """
+    def __init__(self, nlist=64, nprobe=8, kmeans_iters=10, seed=0):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.kmeans_iters = kmeans_iters
+        self.seed = seed
+        self.centroids = None
+        self.trained_size = 0
+        self._lists = []
+        self._where = {}
+
+    @property
+    def is_trained(self):
+        return self.centroids is not None
+
+    def __len__(self):
+        return len(self._where)
+
+    def _assign(self, matrix, chunk=8192):
+        assignments = np.empty(len(matrix), dtype=np.intp)
+        for start in range(0, len(matrix), chunk):
+            block = np.asarray(matrix[start:start + chunk], dtype=np.float32)
+            assignments[start:start + chunk] = np.argmax(block @ self.centroids.T, axis=1)
+        return assignments
+
+    def train(self, matrix):
+        """
+        Fit centroids with spherical k-means on (a sample of) normalized rows.
+        """
+        rng = np.random.default_rng(self.seed)
+        n = len(matrix)
+        nlist = max(1, min(self.nlist, n))
+        sample = np.asarray(matrix[rng.choice(n, size=min(n, nlist * 256), replace=False)], dtype=np.float32)
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+
+        for _ in range(self.kmeans_iters):
+            assignments = np.argmax(sample @ centroids.T, axis=1)
+            order = np.argsort(assignments, kind='stable')
+            counts = np.bincount(assignments, minlength=nlist)
+            starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+            occupied = counts > 0
+            sums = np.add.reduceat(sample[order], starts[occupied], axis=0)
+            centroids[occupied] = sums
+            # Re-seed empty cells from random points
+            empty = np.flatnonzero(~occupied)
+            if len(empty):
+                centroids[empty] = sample[rng.choice(len(sample), size=len(empty), replace=False)]
+            norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            centroids /= norms
+
+        self.centroids = centroids.astype(np.float32)
+        self.trained_size = n
+        self.clear()
+
+    def clear(self):
+        dim = self.centroids.shape[1]
+        self._lists = [_InvertedList(dim) for _ in range(len(self.centroids))]
+        self._where = {}
+
+    def add(self, ids, matrix):
+        """
+        Assign normalized rows to their nearest cell. Existing ids are replaced.
+        """
+        ids = [str(vid) for vid in ids]
+        self.remove(ids)
+        matrix = np.asarray(matrix, dtype=np.float32)
+        assignments = self._assign(matrix)
+        for list_no in np.unique(assignments):
+            rows = np.flatnonzero(assignments == list_no)
+            inverted = self._lists[list_no]
+            start = inverted.extend([ids[i] for i in rows], matrix[rows])
+            for offset, i in enumerate(rows):
+                self._where[ids[i]] = (int(list_no), start + offset)
+
+    def remove(self, ids):
+        for vid in ids:
+            location = self._where.pop(str(vid), None)
+            if location is None:
+                continue
+            list_no, slot = location
+            moved = self._lists[list_no].remove(slot)
+            if moved is not None:
+                self._where[moved] = (list_no, slot)
+
+    def search(self, query, k, nprobe=None):
+        """
+        Returns (ids, scores) of the best k rows found in the probed cells, best first.
+        """
+        nprobe = min(nprobe or self.nprobe, len(self._lists))
+        centroid_scores = self.centroids @ query
+        probe = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe] if nprobe < len(self._lists) else range(len(self._lists))
+
+        ids, scores = [], []
+        for list_no in probe:
+            inverted = self._lists[list_no]
+            if len(inverted):
+                ids.extend(inverted.ids)
+                scores.append(inverted.scores(query))
+        if not scores:
+            return [], np.empty(0, dtype=np.float32)
+        scores = np.concatenate(scores)
+
+        if k < len(scores):
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [ids[i] for i in top], scores[top]
+
+    def save(self, path):
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, CENTROIDS_FILE), self.centroids)
+        with open(os.path.join(path, PARAMS_FILE), 'w') as f:
+            json.dump({"nlist": self.nlist, "trained_size": self.trained_size}, f)
+
+    @classmethod
+    def load(cls, path, nlist=64, nprobe=8, **kwargs):
+        """
+        Returns an untrained index if nothing was saved for these parameters.
+        """
+        index = cls(nlist=nlist, nprobe=nprobe, **kwargs)
+        centroids_path = os.path.join(path, CENTROIDS_FILE)
+        params_path = os.path.join(path, PARAMS_FILE)
+        if os.path.exists(centroids_path) and os.path.exists(params_path):
+            with open(params_path, 'r') as f:
+                params = json.load(f)
+            if params.get("nlist") == nlist:
+                index.centroids = np.load(centroids_path)
+                index.trained_size = params.get("trained_size", 0)
+                index.clear()
+        return index
@@ -4,3 +4,14 @@ from django.apps import AppConfig
 class AtsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'ats'
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save
+        from .matching import embed_saved_job, forget_deleted_job
+        from .models import Applicant, Job, Skill
+        from .skill_index import forget_deleted_applicant
+        from .skills import forget_deleted_skill
+        post_save.connect(embed_saved_job, sender=Job, dispatch_uid='ats.embed_saved_job')
+        post_delete.connect(forget_deleted_job, sender=Job, dispatch_uid='ats.forget_deleted_job')
+        post_delete.connect(forget_deleted_skill, sender=Skill, dispatch_uid='ats.forget_deleted_skill')
+        post_delete.connect(forget_deleted_applicant, sender=Applicant, dispatch_uid='ats.forget_deleted_applicant')
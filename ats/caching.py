@@ -0,0 +1,384 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+
+def normalize_text(text):
+    # Whitespace-only differences (re-uploads, re-extraction) should share a key
+    return " ".join((text or "").split())
+
+def content_key(*parts):
+    """
+    sha256 over the parts joined with NUL, so ("a", "bc") and ("ab", "c") differ.
+    """
+    digest = hashlib.sha256()
+    for i, part in enumerate(parts):
+        if i:
+            digest.update(b"\0")
+        digest.update(str(part).encode('utf-8'))
+    return digest.hexdigest()
+
+class LRUCache:
+    """
+    Bounded in-memory map that evicts the least recently used entry.
+    """
+    def __init__(self, max_items=1024):
+        self.max_items = max_items
+        self._data = OrderedDict()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        if key not in self._data:
+            return None
+        self._data.move_to_end(key)
+        return self._data[key]
+
+    def set(self, key, value):
+        if self.max_items <= 0:
+            return
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_items:
+            self._data.popitem(last=False)
+
+    def clear(self):
+        self._data.clear()
+
+class SQLiteCache:
+    """
+    Persistent key -> bytes store in a single SQLite file, safe to share
+    between threads (one connection guarded by a lock) and processes (WAL).
+    Also keeps named counters so statistics survive process restarts.
+
+    Entries carry an optional tag (e.g. the model name) and timestamps used
+    for TTL expiry and least-recently-used eviction by prune().
+    """
+    def __init__(self, path):
+        self.path = str(path)
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL, tag TEXT)"
+            )
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(cache)")}
+            if 'tag' not in columns:
+                self._conn.execute("ALTER TABLE cache ADD COLUMN tag TEXT")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed_at ON cache (accessed_at)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+
+    def get(self, key, max_age=None, touch=False):
+        """
+        Returns the stored bytes, or None if missing or older than `max_age` seconds.
+        `touch` refreshes the entry's last access time for LRU eviction.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, created_at FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if max_age is not None and now - row[1] > max_age:
+                with self._conn:
+                    self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                return None
+            if touch:
+                with self._conn:
+                    self._conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+        return row[0]
+
+    def set(self, key, value, counters=None, tag=None):
+        """
+        Store a value; `counters` ({name: delta}) are added in the same transaction.
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, created_at, accessed_at, tag) VALUES (?, ?, ?, ?, ?)",
+                (key, sqlite3.Binary(value), now, now, tag),
+            )
+            self._add_counters(counters)
+
+    def prune(self, max_age=None, max_entries=None, max_bytes=None):
+        """
+        Drop entries older than `max_age`, then the least recently used ones
+        until at most `max_entries` entries and `max_bytes` bytes remain.
+        Returns the number of entries removed.
+        """
+        removed = 0
+        with self._lock, self._conn:
+            if max_age is not None:
+                removed += self._conn.execute("DELETE FROM cache WHERE created_at < ?", (time.time() - max_age,)).rowcount
+            if max_entries is not None:
+                removed += self._conn.execute(
+                    "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                    (max_entries,),
+                ).rowcount
+            if max_bytes is not None:
+                # Keep the most recently used entries whose running size fits the budget
+                rows = self._conn.execute("SELECT key, LENGTH(value) FROM cache ORDER BY accessed_at DESC").fetchall()
+                total, evict = 0, []
+                for key, size in rows:
+                    total += size
+                    if total > max_bytes:
+                        evict.append((key,))
+                self._conn.executemany("DELETE FROM cache WHERE key = ?", evict)
+                removed += len(evict)
+        return removed
+
+    def tag_stats(self):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT tag, COUNT(*), COALESCE(SUM(LENGTH(value)), 0), MIN(created_at), MAX(created_at) "
+                "FROM cache GROUP BY tag ORDER BY tag"
+            ).fetchall()
+
+    def _add_counters(self, counters):
+        for name, delta in (counters or {}).items():
+            if delta:
+                self._conn.execute(
+                    "INSERT INTO counters (name, value) VALUES (?, ?) "
+                    "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+                    (name, delta),
+                )
+
+    def add_counters(self, counters):
+        with self._lock, self._conn:
+            self._add_counters(counters)
+
+    def counters(self):
+        with self._lock:
+            return dict(self._conn.execute("SELECT name, value FROM counters").fetchall())
+
+    def stats(self):
+        with self._lock:
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(value)), 0) FROM cache").fetchone()
+        return {"entries": entries, "bytes": size}
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM cache")
+            self._conn.execute("DELETE FROM counters")
+
+class EmbeddingCache:
+    """
+    Content-addressed embedding cache: key = sha256(model, task_type, normalized text).
+    A bounded in-memory LRU sits in front of the persistent SQLite store.
+
+    Hit/miss counters are kept per process; they are also flushed into the
+    SQLite file on every store (and by flush_stats) so `manage.py embedding_cache`
+    can report totals across processes.
+    """
+    COUNTERS = ("memory_hits", "disk_hits", "misses")
+
+    def __init__(self, path, max_memory_items=1024):
+        self.memory = LRUCache(max_memory_items)
+        self.disk = SQLiteCache(path)
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._unflushed = dict.fromkeys(self.COUNTERS, 0)
+
+    @staticmethod
+    def key(model, task_type, text):
+        return content_key(model, task_type, normalize_text(text))
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+            self._unflushed[name] += 1
+
+    def _take_unflushed(self):
+        with self._lock:
+            pending, self._unflushed = self._unflushed, dict.fromkeys(self.COUNTERS, 0)
+        return pending
+
+    def get(self, model, task_type, text):
+        """
+        Returns the cached embedding as a list of floats, or None on a miss.
+        """
+        key = self.key(model, task_type, text)
+        with self._lock:
+            embedding = self.memory.get(key)
+        if embedding is not None:
+            self._count("memory_hits")
+            return embedding
+
+        blob = self.disk.get(key)
+        if blob is not None:
+            embedding = np.frombuffer(blob, dtype=np.float32).tolist()
+            with self._lock:
+                self.memory.set(key, embedding)
+            self._count("disk_hits")
+            return embedding
+
+        self._count("misses")
+        return None
+
+    def set(self, model, task_type, text, embedding):
+        key = self.key(model, task_type, text)
+        embedding = np.asarray(embedding, dtype=np.float32)
+        self.disk.set(key, embedding.tobytes(), counters=self._take_unflushed(), tag=model)
+        with self._lock:
+            self.memory.set(key, embedding.tolist())
+
+    def flush_stats(self):
+        self.disk.add_counters(self._take_unflushed())
+
+    def stats(self):
+        """
+        Session counters for this process plus persisted totals across processes.
+        """
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        hits = self.memory_hits + self.disk_hits
+        totals = self.disk.counters()
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "remote_calls_saved": hits,
+            "memory_entries": len(self.memory),
+            "total": {name: totals.get(name, 0) + self._unflushed[name] for name in self.COUNTERS},
+            **self.disk.stats(),
+        }
+
+    def clear(self):
+        with self._lock:
+            self.memory.clear()
+            self._unflushed = dict.fromkeys(self.COUNTERS, 0)
+        self.disk.clear()
+
+class ResponseCache:
+    """
+    Persistent cache of LLM responses keyed by (model name, sha256 of the prompt).
+
+    Entries expire after `ttl` seconds. After every `prune_every` stores the
+    SQLite file is trimmed to `max_entries` / `max_bytes`, least recently
+    used first. Hits and misses are counted like EmbeddingCache.
+    """
+    COUNTERS = ("hits", "misses")
+
+    def __init__(self, path, ttl=7 * 24 * 3600, max_entries=5000, max_bytes=None, prune_every=50):
+        self.disk = SQLiteCache(path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.prune_every = prune_every
+        self._lock = threading.Lock()
+        self._stores = 0
+        self.hits = 0
+        self.misses = 0
+        self._unflushed = dict.fromkeys(self.COUNTERS, 0)
+
+    @staticmethod
+    def key(model, prompt):
+        return content_key(model, hashlib.sha256(prompt.encode('utf-8')).hexdigest())
+
+    def _count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+            self._unflushed[name] += 1
+
+    def _take_unflushed(self):
+        with self._lock:
+            pending, self._unflushed = self._unflushed, dict.fromkeys(self.COUNTERS, 0)
+        return pending
+
+    def get(self, model, prompt):
+        return self.get_any((model,), prompt)
+
+    def get_any(self, models, prompt):
+        """
+        First cached response for the prompt from any of `models` (in order),
+        counted as a single hit or miss.
+        """
+        for model in models:
+            blob = self.disk.get(self.key(model, prompt), max_age=self.ttl, touch=True)
+            if blob is not None:
+                self._count("hits")
+                return blob.decode('utf-8')
+        self._count("misses")
+        return None
+
+    def set(self, model, prompt, text):
+        self.disk.set(self.key(model, prompt), text.encode('utf-8'), counters=self._take_unflushed(), tag=model)
+        with self._lock:
+            self._stores += 1
+            due = self._stores % self.prune_every == 0
+        if due:
+            self.prune()
+
+    def prune(self):
+        return self.disk.prune(max_age=self.ttl, max_entries=self.max_entries, max_bytes=self.max_bytes)
+
+    def flush_stats(self):
+        self.disk.add_counters(self._take_unflushed())
+
+    def stats(self):
+        totals = self.disk.counters()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "total": {name: totals.get(name, 0) + self._unflushed[name] for name in self.COUNTERS},
+            "models": self.disk.tag_stats(),
+            **self.disk.stats(),
+        }
+
+    def clear(self):
+        with self._lock:
+            self._unflushed = dict.fromkeys(self.COUNTERS, 0)
+        self.disk.clear()
+
+_embedding_cache = None
+_cache_lock = threading.Lock()
+_response_cache = None
+
+def get_embedding_cache():
+    """
+    Process-wide EmbeddingCache configured by ATS_EMBEDDING_CACHE, or None if disabled.
+    """
+    global _embedding_cache
+    from django.conf import settings
+    config = settings.ATS_EMBEDDING_CACHE
+    if not config.get('ENABLED', True):
+        return None
+    with _cache_lock:
+        if _embedding_cache is None:
+            _embedding_cache = EmbeddingCache(config['PATH'], max_memory_items=config.get('MEMORY_ITEMS', 1024))
+    return _embedding_cache
+
+def get_response_cache():
+    """
+    Process-wide ResponseCache configured by ATS_LLM_CACHE.
+    """
+    global _response_cache
+    from django.conf import settings
+    config = settings.ATS_LLM_CACHE
+    with _cache_lock:
+        if _response_cache is None:
+            _response_cache = ResponseCache(
+                config['PATH'],
+                ttl=config.get('TTL'),
+                max_entries=config.get('MAX_ENTRIES'),
+                max_bytes=config.get('MAX_BYTES'),
+            )
+    return _response_cache
+
+def response_cache_enabled_for(agent_name):
+    """
+    Whether ATS_LLM_CACHE['AGENTS'] opts this agent class in ("*" enables all).
+    """
+    from django.conf import settings
+    agents = settings.ATS_LLM_CACHE.get('AGENTS') or ()
+    return "*" in agents or agent_name in agents
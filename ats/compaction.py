@@ -0,0 +1,237 @@
+"""
+Resume text compaction, between text extraction and the agents.
+
+Extracted text carries page headers and footers on every page, page
+numbers, bullet glyphs and ragged whitespace, all of which the agents are
+billed for. `compact_resume` cleans the text once, splits it into sections
+by their headings (Experience, Education, Skills, ...) and builds one
+digest per agent within a token budget (ATS_COMPACTION['BUDGETS']):
+
+    parsing   header, summary, experience, education, skills, ...
+    skills    header, summary, experience, skills, projects, certifications
+    ranking   header, summary, experience, skills, education, certifications,
+              projects
+    fused     everything the three agents need
+
+(the header is the text before the first heading; only parsing and fused
+get its contact lines).
+
+A digest keeps the agent's sections in document order. When they don't
+fit, small sections are kept whole and the budget left is split evenly
+between the larger ones, each cut at a line boundary, so a long
+experience section can't push education or skills out the way a plain
+prefix of the text does. References and interests are never sent.
+
+Like extraction.py, nothing here imports Django models.
+"""
+import re
+from .ratelimit import estimate_tokens
+
+DEFAULT_CONFIG = {
+    'ENABLED': True,
+    'BUDGETS': {'parsing': 1500, 'skills': 1500, 'ranking': 1000, 'fused': 2500},
+}
+
+# What the ranking agent used to get: the first 4000 characters
+LEGACY_RANKING_CHARS = 4000
+
+SECTION_HEADINGS = {
+    'summary': ["summary", "professional summary", "profile", "professional profile", "objective",
+                "career objective", "about me", "overview"],
+    'experience': ["experience", "work experience", "professional experience", "employment",
+                   "employment history", "work history", "career history", "relevant experience"],
+    'education': ["education", "academic background", "education and training", "qualifications"],
+    'skills': ["skills", "technical skills", "key skills", "core competencies", "competencies",
+               "technologies", "tools and technologies", "skills and abilities"],
+    'projects': ["projects", "personal projects", "key projects", "selected projects"],
+    'certifications': ["certifications", "certificates", "licenses and certifications", "courses", "training"],
+    'awards': ["awards", "honors", "honours", "achievements", "accomplishments"],
+    'publications': ["publications", "research"],
+    'languages': ["languages"],
+    'volunteering': ["volunteering", "volunteer experience", "volunteer work"],
+    'interests': ["interests", "hobbies", "hobbies and interests"],
+    'references': ["references"],
+}
+HEADING_NAMES = {heading: section for section, headings in SECTION_HEADINGS.items() for heading in headings}
+
+# Sections each agent reads; 'header' is the text before the first heading
+AGENT_SECTIONS = {
+    'parsing': ['header', 'summary', 'experience', 'education', 'skills', 'projects', 'certifications',
+                'awards', 'publications', 'languages', 'volunteering'],
+    'skills': ['header', 'summary', 'experience', 'skills', 'projects', 'certifications'],
+    'ranking': ['header', 'summary', 'experience', 'skills', 'education', 'certifications', 'projects'],
+    'fused': ['header', 'summary', 'experience', 'education', 'skills', 'projects', 'certifications',
+              'awards', 'publications', 'languages', 'volunteering'],
+}
+# Agents that need the contact details (emails, phone numbers, profile links)
+CONTACT_AGENTS = {'parsing', 'fused'}
+
+BULLET_RE = re.compile(r"^[•●▪■‣⁃◦*–—-]+\s*")
+PAGE_NUMBER_RE = re.compile(r"^(?:page\s*)?\d{1,3}(?:\s*(?:/|of)\s*\d{1,3})?$|^-\s*\d{1,3}\s*-$", re.IGNORECASE)
+CONTACT_RE = re.compile(r"@|https?://|www\.|linkedin\.com|github\.com|\+?\(?\d{2,4}\)?[\s.-]?\d{3}[\s.-]?\d{3,4}\b")
+HEADING_CLEAN_RE = re.compile(r"[^a-z& ]+")
+# Marks a section cut short to fit the budget
+CLIP_MARKER = "\n[...]"
+
+def get_config():
+    config = dict(DEFAULT_CONFIG)
+    try:
+        from django.conf import settings
+        if settings.configured:
+            config.update(getattr(settings, 'ATS_COMPACTION', {}))
+    except ImportError:
+        pass
+    return config
+
+def _page_key(line):
+    # Page headers/footers differ only in their numbers ("Page 2 of 3")
+    return re.sub(r"\d+", "#", line.lower())
+
+def is_contact(line):
+    """Emails, profile links and phone numbers."""
+    return bool(CONTACT_RE.search(line))
+
+def clean_text(text):
+    """
+    Collapse whitespace, normalize bullets, drop page numbers and keep only
+    the first occurrence of a running header/footer: a line repeated at
+    least three times that holds contact details or repeats the document's
+    first line (usually the candidate's name), or that mentions the page
+    and repeats up to its numbers.
+    """
+    lines = []
+    for line in (text or "").replace("\r", "\n").replace("\f", "\n").split("\n"):
+        line = " ".join(line.split())
+        line = BULLET_RE.sub("- ", line) if BULLET_RE.match(line) and len(line) > 1 else line
+        lines.append(line)
+
+    first = next((line for line in lines if line), None)
+    counts, page_counts = {}, {}
+    for line in lines:
+        if line:
+            counts[line] = counts.get(line, 0) + 1
+            page_counts[_page_key(line)] = page_counts.get(_page_key(line), 0) + 1
+
+    kept, seen = [], set()
+    for line in lines:
+        if not line:
+            if kept and kept[-1]:
+                kept.append("")  # At most one blank line in a row
+            continue
+        if PAGE_NUMBER_RE.match(line):
+            continue
+        key = _page_key(line)
+        if len(line) <= 120 and (
+            counts[line] >= 3 and (line == first or is_contact(line))
+            or page_counts[key] >= 3 and "page" in key
+        ):
+            if key in seen:
+                continue
+            seen.add(key)
+        kept.append(line)
+    return "\n".join(kept).strip()
+
+def heading_section(line):
+    """The section a heading line starts ('experience', ...), or None."""
+    if not line or len(line) > 40 or len(line.split()) > 5:
+        return None
+    name = HEADING_CLEAN_RE.sub(" ", line.lower().replace("&", " and ")).split()
+    return HEADING_NAMES.get(" ".join(name))
+
+def split_sections(text):
+    """[(section, heading line, body)] in document order; the text before the first heading is 'header'."""
+    sections = [['header', "", []]]
+    for line in text.split("\n"):
+        section = heading_section(line)
+        if section:
+            sections.append([section, line, []])
+        else:
+            sections[-1][2].append(line)
+    return [(section, heading, "\n".join(body).strip()) for section, heading, body in sections
+            if heading or "".join(body).strip()]
+
+def _clip(text, max_chars):
+    """The longest prefix of whole lines (or, failing that, words) within max_chars."""
+    if len(text) <= max_chars:
+        return text
+    cut = text.rfind("\n", 0, max_chars)
+    if cut <= 0:
+        cut = text.rfind(" ", 0, max_chars)
+    return (text[:cut] if cut > 0 else text[:max_chars]).rstrip() + CLIP_MARKER
+
+def _allocate(sizes, budget):
+    """Water-filling: small sizes are granted whole, the rest share what is left evenly."""
+    grants = [0] * len(sizes)
+    remaining = budget
+    order = sorted(range(len(sizes)), key=lambda i: sizes[i])
+    for position, i in enumerate(order):
+        share = remaining // (len(order) - position)
+        grants[i] = min(sizes[i], share)
+        remaining -= grants[i]
+    return grants
+
+class CompactedResume:
+    """
+    A resume's cleaned text, its sections and the per-agent digests, built
+    once by compact_resume and shared by every agent that reads the resume.
+    """
+    def __init__(self, raw_text, text, sections, budgets, enabled=True):
+        self.raw_text = raw_text
+        self.text = text
+        self.sections = sections
+        self.budgets = budgets
+        self.enabled = enabled
+        self._digests = {}
+
+    def __str__(self):
+        return self.text
+
+    def digest(self, agent):
+        """The text sent to `agent` ('parsing', 'skills', 'ranking' or 'fused')."""
+        if agent not in self._digests:
+            self._digests[agent] = self._build_digest(agent) if self.enabled else self.legacy_digest(agent)
+        return self._digests[agent]
+
+    def legacy_digest(self, agent):
+        # What each agent was sent before compaction
+        return self.raw_text[:LEGACY_RANKING_CHARS] if agent == 'ranking' else self.raw_text
+
+    def _build_digest(self, agent):
+        wanted = AGENT_SECTIONS[agent]
+        parts = []
+        for section, heading, body in self.sections:
+            if section not in wanted:
+                continue
+            if section == 'header' and agent not in CONTACT_AGENTS:
+                body = "\n".join(line for line in body.split("\n") if not is_contact(line)).strip()
+            parts.append((heading, body))
+        if not any(body for _, body in parts):
+            # No recognizable structure: the whole cleaned text, within budget
+            parts = [("", self.text)]
+        # Budgets are in tokens; estimate_tokens counts ~4 characters per token.
+        # Headings, blank lines between blocks and "[...]" markers come out of it too.
+        overhead = sum(len(heading) + 1 + 2 + len(CLIP_MARKER) for heading, _ in parts)
+        max_chars = self.budgets[agent] * 4 - overhead
+        grants = _allocate([len(body) for _, body in parts], max(max_chars, 0))
+        blocks = []
+        for (heading, body), grant in zip(parts, grants):
+            body = _clip(body, grant) if grant else ""
+            blocks.append(f"{heading}\n{body}".strip() if heading else body)
+        return "\n\n".join(block for block in blocks if block)
+
+    def input_tokens(self, agents, compacted=True):
+        """Resume tokens sent to `agents` with (or, for comparison, without) compaction."""
+        return sum(estimate_tokens(self.digest(agent) if compacted else self.legacy_digest(agent)) for agent in agents)
+
+def compact_resume(text, budgets=None):
+    """
+    Clean and section `text` and return a CompactedResume whose digests are
+    built on first use. With ATS_COMPACTION['ENABLED'] off the digests are
+    the text each agent was sent before compaction existed.
+    """
+    if isinstance(text, CompactedResume):
+        return text
+    config = get_config()
+    budgets = {**DEFAULT_CONFIG['BUDGETS'], **config.get('BUDGETS', {}), **(budgets or {})}
+    cleaned = clean_text(text)
+    return CompactedResume(text or "", cleaned, split_sections(cleaned), budgets, enabled=config.get('ENABLED', True))
@@ -0,0 +1,312 @@
+"""
+Vector store kept in the database, for deployments where several processes
+(gunicorn workers, queue workers) write vectors at the same time.
+
+The file store (ats/vector_store.py) rewrites its manifest on every write:
+two processes appending at once each write a manifest that only lists
+their own new segment, and one of the appends is lost. Here every row is
+a StoredVector, with the normalized embedding packed as float32 bytes, and
+every write is one transaction:
+
+    append   upsert the rows (INSERT ... ON CONFLICT UPDATE)
+    delete   delete the rows
+    clear    delete every row and forget the dimension and backend
+
+Each of them first bumps VectorCollection.version. That UPDATE takes the
+collection's row lock (on SQLite, the database write lock), so writers to
+one collection queue up instead of overwriting each other, and the
+version says which committed state a reader holds.
+
+Each process keeps the collection in memory laid out like the file store:
+an id array including replaced and deleted rows, an `alive` mask and one
+float32 matrix. VectorDB searches it the same way. `refresh()` costs one
+query while the version is unchanged and reloads the collection otherwise.
+A process's own writes are applied to its copy in place when nobody else
+wrote in between.
+"""
+import threading
+import numpy as np
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from .models import StoredVector, VectorCollection
+from .vector_store import dot_int8, last_occurrences, normalize_rows, quantize_rows
+
+# Rows per INSERT / DELETE statement (SQLite limits bound parameters)
+WRITE_BATCH = 500
+
+class DatabaseStore:
+    """
+    Same interface as SegmentStore, over the VectorCollection `name`
+    (VectorDB uses '<ATS_VECTOR_STORE COLLECTION>.applicants' and '.jobs').
+    """
+    def __init__(self, name, using='default'):
+        self.name = str(name)
+        self.path = self.name
+        self.using = using
+        self.dim = None
+        self.backend = None
+        self.version = None
+        self.generation = 0
+        self._lock = threading.RLock()
+        self._set_rows([], np.empty((0, 0), dtype=np.float32), [], [])
+        self.load()
+
+    # Loading
+
+    def _set_rows(self, ids, matrix, metadata, texts):
+        self._ids = list(ids)
+        self._matrix = matrix
+        self._metadata = list(metadata)
+        self._texts = list(texts)
+        self._alive = np.ones(len(self._ids), dtype=bool)
+        self._codes = self._scales = None
+
+    def _collection(self):
+        return VectorCollection.objects.using(self.using).filter(name=self.name)
+
+    def load(self):
+        with self._lock:
+            with transaction.atomic(using=self.using):
+                # One transaction, so on SQLite the rows match the version read
+                collection = self._collection().values('pk', 'version', 'dim', 'backend').first() or {}
+                ids, blobs, metadata, texts = [], [], [], []
+                if collection:
+                    rows = (StoredVector.objects.using(self.using).filter(collection_id=collection['pk'])
+                            .order_by('pk').values_list('vid', 'embedding', 'metadata', 'text'))
+                    for vid, blob, meta, text in rows.iterator(chunk_size=2000):
+                        ids.append(vid)
+                        blobs.append(bytes(blob))
+                        metadata.append(meta)
+                        texts.append(text)
+            self.version = collection.get('version', 0)
+            self.dim = collection.get('dim')
+            self.backend = collection.get('backend')
+            matrix = np.frombuffer(b"".join(blobs), dtype='<f4').reshape(len(ids), self.dim or 0)
+            self._set_rows(ids, np.array(matrix, dtype=np.float32), metadata, texts)
+            self._changed()
+
+    def refresh(self):
+        """
+        Reload if the collection's version moved since this copy was loaded
+        or last written. Returns whether it reloaded.
+        """
+        with self._lock:
+            version = self._collection().values_list('version', flat=True).first() or 0
+            if version == self.version:
+                return False
+            self.load()
+            return True
+
+    def _changed(self):
+        self._positions = {vid: row for row, vid in enumerate(self._ids) if self._alive[row]}
+        self._id_array = None
+        self.generation += 1
+
+    # Writing
+
+    def _bump(self):
+        """
+        First statement of every write transaction: takes the write lock
+        and returns the collection with its new version.
+        """
+        collection = self._collection()
+        if not collection.update(version=F('version') + 1):
+            try:
+                with transaction.atomic(using=self.using):
+                    VectorCollection.objects.using(self.using).create(name=self.name, version=1)
+            except IntegrityError:
+                # Another process created it meanwhile
+                collection.update(version=F('version') + 1)
+        return collection.get()
+
+    def _committed(self, collection, apply):
+        outer = transaction.get_connection(self.using).in_atomic_block
+        if not outer and self.version is not None and collection.version == self.version + 1:
+            # Nobody else wrote since our copy was loaded
+            apply()
+            self.version = collection.version
+            self.dim = collection.dim
+            self.backend = collection.backend
+            self._changed()
+            return
+        self.load()
+        # Others' writes too, so VectorDB can't update its ANN index incrementally
+        self.generation += 1
+        if outer:
+            # Not committed until the caller's transaction is (it may still roll
+            # back): the next refresh reloads whatever was
+            self.version = None
+
+    def append(self, ids, embeddings, metadata=None, texts=None, backend=None):
+        """
+        Add (or replace) rows in one transaction. `backend` is the key of
+        the embedding backend that produced them.
+        """
+        ids = [str(vid) for vid in ids]
+        if not ids:
+            return
+        matrix = normalize_rows(embeddings)
+        if matrix.ndim != 2 or matrix.shape[0] != len(ids):
+            raise ValueError("Expected one embedding per id")
+        metadata = list(metadata) if metadata is not None else [{} for _ in ids]
+        texts = list(texts) if texts is not None else ["" for _ in ids]
+        ids, matrix, metadata, texts = last_occurrences(ids, matrix, metadata, texts)
+
+        with self._lock:
+            with transaction.atomic(using=self.using):
+                collection = self._bump()
+                if backend is not None and collection.backend not in (None, backend):
+                    raise ValueError(f"Embeddings from backend '{backend}' cannot be mixed with the store's '{collection.backend}' vectors")
+                if collection.dim is None:
+                    collection.dim = int(matrix.shape[1])
+                elif matrix.shape[1] != collection.dim:
+                    raise ValueError(f"Embedding dimension {matrix.shape[1]} does not match store dimension {collection.dim}")
+                if backend is not None:
+                    collection.backend = backend
+                collection.save(update_fields=['dim', 'backend'])
+                StoredVector.objects.using(self.using).bulk_create(
+                    [
+                        StoredVector(collection=collection, vid=vid, embedding=row.astype('<f4').tobytes(),
+                                     metadata=meta, text=text)
+                        for vid, row, meta, text in zip(ids, matrix, metadata, texts)
+                    ],
+                    batch_size=WRITE_BATCH,
+                    update_conflicts=True,
+                    unique_fields=['collection', 'vid'],
+                    update_fields=['embedding', 'metadata', 'text'],
+                )
+            self._committed(collection, lambda: self._apply_append(ids, matrix, metadata, texts))
+
+    def delete(self, ids):
+        ids = list(dict.fromkeys(str(vid) for vid in ids))
+        if not ids:
+            return 0
+        with self._lock:
+            with transaction.atomic(using=self.using):
+                collection = self._bump()
+                removed = 0
+                for start in range(0, len(ids), WRITE_BATCH):
+                    removed += StoredVector.objects.using(self.using).filter(
+                        collection=collection, vid__in=ids[start:start + WRITE_BATCH]).delete()[0]
+                if not removed:
+                    # Nothing to delete: don't make every process reload
+                    transaction.set_rollback(True, using=self.using)
+            if removed:
+                self._committed(collection, lambda: self._tombstone(ids))
+        return removed
+
+    def clear(self):
+        """
+        Drop every row and forget the dimension and backend, e.g. before
+        re-embedding the store with another backend.
+        """
+        with self._lock:
+            with transaction.atomic(using=self.using):
+                collection = self._bump()
+                StoredVector.objects.using(self.using).filter(collection=collection).delete()
+                collection.dim = None
+                collection.backend = None
+                collection.save(update_fields=['dim', 'backend'])
+            self._committed(collection, lambda: self._set_rows([], np.empty((0, 0), dtype=np.float32), [], []))
+
+    def compact(self):
+        """Drop replaced and deleted rows from this process's copy."""
+        with self._lock:
+            if not self._alive.all():
+                self._drop_dead()
+                self._changed()
+
+    def _drop_dead(self):
+        keep = np.flatnonzero(self._alive)
+        self._set_rows([self._ids[i] for i in keep], self._matrix[keep],
+                       [self._metadata[i] for i in keep], [self._texts[i] for i in keep])
+
+    def _tombstone(self, ids):
+        for vid in ids:
+            row = self._positions.pop(vid, None)
+            if row is not None:
+                self._alive[row] = False
+
+    def _apply_append(self, ids, matrix, metadata, texts):
+        self._tombstone(ids)
+        if not len(self._matrix):
+            self._matrix = np.empty((0, matrix.shape[1]), dtype=np.float32)
+        self._matrix = np.concatenate([self._matrix, matrix])
+        if self._codes is not None:
+            codes, scales = quantize_rows(matrix)
+            self._codes = np.concatenate([self._codes, codes])
+            self._scales = np.concatenate([self._scales, scales])
+        self._ids.extend(ids)
+        self._metadata.extend(metadata)
+        self._texts.extend(texts)
+        self._alive = np.concatenate([self._alive, np.ones(len(ids), dtype=bool)])
+        if len(self._alive) > 2 * max(len(self._positions) + len(ids), 1000):
+            # Mostly replaced rows by now; _changed() re-indexes the rest
+            self._drop_dead()
+
+    # Reading
+
+    @property
+    def lock(self):
+        return self._lock
+
+    def __len__(self):
+        return len(self._positions)
+
+    def __contains__(self, vid):
+        return str(vid) in self._positions
+
+    def get(self, vid):
+        """
+        Returns {"embedding", "metadata", "text"} for a live id, or None.
+        """
+        with self._lock:
+            row = self._positions.get(str(vid))
+            if row is None:
+                return None
+            return {"embedding": self._matrix[row], "metadata": self._metadata[row], "text": self._texts[row]}
+
+    @property
+    def ids(self):
+        """All rows' ids (including replaced and deleted rows), in row order."""
+        if self._id_array is None:
+            self._id_array = np.asarray(self._ids, dtype=object)
+        return self._id_array
+
+    @property
+    def metadata(self):
+        return self._metadata
+
+    @property
+    def alive(self):
+        return self._alive
+
+    def dot(self, query):
+        if not len(self._ids):
+            return np.empty(0, dtype=np.float32)
+        return self._matrix @ query
+
+    def dot_quantized(self, query, block=512):
+        if not len(self._ids):
+            return np.empty(0, dtype=np.float32)
+        if self._codes is None:
+            self._codes, self._scales = quantize_rows(self._matrix)
+        query = np.asarray(query, dtype=np.float32)
+        scores = np.empty(len(self._codes), dtype=np.float32)
+        return dot_int8(self._codes, self._scales, query, scores, np.empty((block, len(query)), dtype=np.float32))
+
+    def dot_rows(self, positions, query):
+        return self._matrix[np.asarray(positions, dtype=np.int64)] @ query
+
+    def live_arrays(self):
+        """(ids, matrix) of every live row; the matrix is a copy."""
+        with self._lock:
+            rows = np.flatnonzero(self._alive)
+            if not len(rows):
+                return [], np.empty((0, self.dim or 0), dtype=np.float32)
+            return [self._ids[i] for i in rows], self._matrix[rows]
+
+    def iter_live(self):
+        """Yields (id, embedding, metadata, text) for every live row."""
+        for row in np.flatnonzero(self._alive):
+            yield self._ids[row], self._matrix[row], self._metadata[row], self._texts[row]
@@ -0,0 +1,133 @@
+"""
+Embedding backends for VectorDB, selected by ATS_EMBEDDINGS['BACKEND'].
+
+    gemini   Gemini embedding API (network, rate limited, cached)
+    local    term frequencies hashed through a fixed sparse random
+             projection; CPU only, deterministic and offline
+
+A backend's `key` identifies the vector space it produces (model, dimension
+and parameters). Vector stores record the key of the backend that wrote
+them and refuse vectors from any other, so switching backends requires
+`manage.py reindex_vectors` instead of silently mixing incomparable vectors.
+"""
+import threading
+from abc import ABC, abstractmethod
+from hashlib import blake2b
+import numpy as np
+from django.conf import settings
+from .lazy import genai
+from .lexical import term_counts
+from .ratelimit import estimate_tokens, get_rate_limiter
+
+class EmbeddingBackend(ABC):
+    """
+    Base class. `embed` returns one vector (list of floats) per text and
+    raises on failure; `remote` backends are worth caching and retrying.
+    """
+    name = None
+    remote = False
+
+    @property
+    @abstractmethod
+    def key(self):
+        """Identifies the vector space; stores refuse vectors of another key."""
+
+    @abstractmethod
+    def embed(self, texts, task_type="retrieval_document"):
+        """One vector per text."""
+
+    def embed_one(self, text, task_type="retrieval_document"):
+        return self.embed([text], task_type)[0]
+
+class GeminiBackend(EmbeddingBackend):
+    name = "gemini"
+    remote = True
+
+    def __init__(self, model="models/embedding-001", rate_limiter=None):
+        self.model = model
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+
+    @property
+    def key(self):
+        # The bare model name, which is also what the embedding cache was keyed by
+        return self.model
+
+    def _request(self, content, task_type, tokens, max_retries=None):
+        # The API rejects a title for any task but retrieval_document (e.g. job and search queries)
+        title = {"title": "Resume Embedding"} if task_type == "retrieval_document" else {}
+        return self.rate_limiter.call([self.model], lambda model: genai.embed_content(
+            model=model,
+            content=content,
+            task_type=task_type,
+            **title
+        ), tokens=tokens, max_retries=max_retries)['embedding']
+
+    def embed(self, texts, task_type="retrieval_document"):
+        # One remote request for many documents; retries are left to the caller
+        texts = list(texts)
+        return self._request(texts, task_type, estimate_tokens(texts), max_retries=0)
+
+    def embed_one(self, text, task_type="retrieval_document"):
+        return self._request(text, task_type, estimate_tokens(text))
+
+class LocalHashingBackend(EmbeddingBackend):
+    """
+    Sparse random projection of term frequencies: each of the BM25
+    tokenizer's terms is hashed to `hashes` (position, sign) pairs in `dim`
+    dimensions and adds its weight, 1 + log(tf), there. This is a fixed
+    random projection of the full term space (cosines are preserved to
+    about 1/sqrt(dim)) that needs no matrix in memory; `seed` keys the hash.
+    There is no IDF term: document frequencies would drift as resumes are
+    added and change the meaning of every stored vector.
+    """
+    name = "local"
+
+    def __init__(self, dim=256, hashes=4, seed=0):
+        if not 0 < dim <= 2 ** 15:
+            raise ValueError("The local embedding dimension must be between 1 and 32768")
+        self.dim = dim
+        self.hashes = hashes
+        self.seed = seed
+        self._salt = seed.to_bytes(8, 'little')
+
+    @property
+    def key(self):
+        return f"local-hash-v1/{self.dim}/{self.hashes}/{self.seed}"
+
+    def embed_one(self, text, task_type="retrieval_document"):
+        # Symmetric: documents and queries share one space, so task_type is unused
+        counts = term_counts(text)
+        vector = np.zeros(self.dim, dtype=np.float32)
+        if counts:
+            # 16 bits per hash: the low bit is the sign, the rest the position
+            digests = b"".join(blake2b(term.encode('utf-8'), digest_size=2 * self.hashes, key=self._salt).digest()
+                               for term in counts)
+            hashed = np.frombuffer(digests, dtype=np.uint16).reshape(len(counts), self.hashes).astype(np.int64)
+            weights = 1.0 + np.log(np.fromiter(counts.values(), dtype=np.float32, count=len(counts)))
+            signs = np.where(hashed & 1, 1.0, -1.0).astype(np.float32)
+            np.add.at(vector, (hashed >> 1) % self.dim, signs * weights[:, None])
+        norm = float(np.linalg.norm(vector))
+        return (vector / norm if norm else vector).tolist()
+
+    def embed(self, texts, task_type="retrieval_document"):
+        return [self.embed_one(text, task_type) for text in texts]
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+def get_embedding_backend(name=None):
+    """
+    Process-wide backend configured by ATS_EMBEDDINGS (or the named one).
+    """
+    config = settings.ATS_EMBEDDINGS
+    name = name or config['BACKEND']
+    with _backends_lock:
+        if name not in _backends:
+            if name == 'gemini':
+                _backends[name] = GeminiBackend(model=config['GEMINI']['MODEL'])
+            elif name == 'local':
+                local = config['LOCAL']
+                _backends[name] = LocalHashingBackend(dim=local['DIM'], hashes=local['HASHES'], seed=local['SEED'])
+            else:
+                raise ValueError(f"Unknown embedding backend '{name}'; expected 'gemini' or 'local'.")
+        return _backends[name]
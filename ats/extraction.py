@@ -0,0 +1,173 @@
+"""
+Resume text extraction with page/character budgets and a per-file timeout.
+
+Agents only need the first few thousand words of a resume, so extraction
+stops early once `max_chars` of text (or `max_pages` pages) have been read.
+Large PDFs are split into page ranges extracted in parallel processes.
+Nothing here imports Django models, so the functions are cheap to run in
+worker processes.
+
+The timeout is a hard limit for the caller: work that overruns it (a
+single page or .docx can take arbitrarily long) is abandoned, not waited
+for, and whatever was read by then is returned.
+"""
+import math
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from .lazy import LazyImport
+
+# Imported on first use; falsy when not installed
+docx2txt = LazyImport('docx2txt')
+PdfReader = LazyImport('pypdf', 'PdfReader')
+
+DEFAULT_LIMITS = {
+    'MAX_PAGES': 20,            # Pages read from a PDF at most
+    'MAX_CHARS': 20000,         # Stop once this much text is collected
+    'TIMEOUT': 20,              # Seconds per file; partial text is returned when it runs out
+    'PARALLEL_MIN_PAGES': 12,   # PDFs with at least this many pages (within budget) are split
+    'WORKERS': min(4, os.cpu_count() or 1),
+}
+
+class ExtractionResult:
+    def __init__(self, text="", pages_read=0, total_pages=0, truncated=False, timed_out=False):
+        self.text = text
+        self.pages_read = pages_read
+        self.total_pages = total_pages
+        self.truncated = truncated
+        self.timed_out = timed_out
+
+    def __repr__(self):
+        return (f"ExtractionResult(chars={len(self.text)}, pages={self.pages_read}/{self.total_pages}, "
+                f"truncated={self.truncated}, timed_out={self.timed_out})")
+
+def get_limits(**overrides):
+    limits = dict(DEFAULT_LIMITS)
+    try:
+        from django.conf import settings
+        if settings.configured:
+            limits.update(getattr(settings, 'ATS_EXTRACTION', {}))
+    except ImportError:
+        pass
+    limits.update({key.upper(): value for key, value in overrides.items() if value is not None})
+    return limits
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def _get_pool(workers):
+    # Shared across files: process start-up is paid once per process, not per PDF.
+    # Spawned, not forked: the callers (gunicorn and queue workers) run threads
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+    return _pool
+
+def _run_until(deadline, target):
+    """
+    Call target() on a daemon thread, waiting for it until the deadline.
+    Returns (finished, value) and re-raises its exception. A call that
+    overruns can't be stopped; it is left to finish in the background.
+    """
+    outcome = {}
+    def run():
+        try:
+            outcome['value'] = target()
+        except Exception as e:
+            outcome['error'] = e
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(max(0.0, deadline - time.time()))
+    if 'error' in outcome:
+        raise outcome['error']
+    return not thread.is_alive(), outcome.get('value')
+
+def _extract_pdf_pages(file_path, start, stop, max_chars, deadline, parts=None):
+    """
+    Text of pages [start, stop) in order, stopping at max_chars or the
+    wall-clock deadline. Runs in worker processes, so it reopens the file.
+    Page texts are appended to `parts` as they are read.
+    Returns (page_texts, timed_out).
+    """
+    reader = PdfReader(file_path)
+    parts, total = ([] if parts is None else parts), 0
+    for index in range(start, min(stop, len(reader.pages))):
+        if time.time() > deadline:
+            return parts, True
+        text = reader.pages[index].extract_text() or ""
+        parts.append(text)
+        total += len(text) + 1
+        if total >= max_chars:
+            break
+    return parts, False
+
+def _extract_pdf(file_path, limits, parallel):
+    deadline = time.time() + limits['TIMEOUT']
+    # Opening a damaged PDF can be slow too
+    finished, total_pages = _run_until(deadline, lambda: len(PdfReader(file_path).pages))
+    if not finished:
+        return ExtractionResult(timed_out=True)
+    pages = min(total_pages, limits['MAX_PAGES'])
+    max_chars = limits['MAX_CHARS']
+
+    if parallel and pages >= limits['PARALLEL_MIN_PAGES'] and limits['WORKERS'] > 1:
+        chunk = math.ceil(pages / limits['WORKERS'])
+        pool = _get_pool(limits['WORKERS'])
+        futures = [pool.submit(_extract_pdf_pages, file_path, start, min(start + chunk, pages), max_chars, deadline)
+                   for start in range(0, pages, chunk)]
+        parts, timed_out = [], False
+        for future in futures:
+            if sum(len(p) + 1 for p in parts) >= max_chars:
+                future.cancel()
+                continue
+            try:
+                chunk_parts, chunk_timed_out = future.result(timeout=max(0.0, deadline - time.time()))
+            except FutureTimeoutError:
+                future.cancel()
+                timed_out = True
+                break
+            parts.extend(chunk_parts)
+            if chunk_timed_out:
+                timed_out = True
+                break
+    else:
+        # The deadline check inside only runs between pages: a slow page is cut off here
+        read = []
+        finished, result = _run_until(deadline, lambda: _extract_pdf_pages(file_path, 0, pages, max_chars, deadline, read))
+        parts, timed_out = list(read), not finished or result[1]
+
+    text = "\n".join(parts)
+    truncated = len(text) > max_chars or len(parts) < total_pages
+    return ExtractionResult(text[:max_chars], len(parts), total_pages, truncated, timed_out)
+
+def _extract_docx(file_path, limits):
+    # docx2txt has no incremental API: all or nothing within the timeout
+    finished, text = _run_until(time.time() + limits['TIMEOUT'], lambda: docx2txt.process(file_path) or "")
+    if not finished:
+        return ExtractionResult(timed_out=True)
+    return ExtractionResult(text[:limits['MAX_CHARS']], truncated=len(text) > limits['MAX_CHARS'])
+
+def extract_text(file_path, max_pages=None, max_chars=None, timeout=None, parallel=True):
+    """
+    Extract resume text within the configured budgets (ATS_EXTRACTION).
+    Returns an ExtractionResult; errors yield empty text, as before.
+    """
+    limits = get_limits(max_pages=max_pages, max_chars=max_chars, timeout=timeout)
+    ext = os.path.splitext(file_path)[1].lower()
+    try:
+        if ext == '.pdf' and PdfReader:
+            return _extract_pdf(file_path, limits, parallel)
+        if ext == '.docx' and docx2txt:
+            return _extract_docx(file_path, limits)
+    except Exception as e:
+        print(f"Error reading {ext.lstrip('.').upper()}: {e}")
+    return ExtractionResult()
+
+def extract_text_from_file(file_path, parallel=True):
+    result = extract_text(file_path, parallel=parallel)
+    if result.timed_out:
+        print(f"Warning: extraction of {os.path.basename(file_path)} timed out after {result.pages_read} pages")
+    return result.text
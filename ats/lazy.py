@@ -0,0 +1,69 @@
+"""
+Heavy optional dependencies, imported on first use instead of at startup.
+
+google.generativeai alone takes several hundred milliseconds to import
+(protobuf, grpc), and pypdf tens more; importing them from module level
+made every cold start (each new serverless instance or worker) pay for
+them before the first request, even one that never calls the API or reads
+a PDF. `LazyImport` stands in for the module until an attribute is used.
+"""
+import importlib
+import threading
+from django.conf import settings
+
+class LazyImport:
+    """
+    Stand-in for a module, or one attribute of it, imported on first use.
+
+    Attribute access and calls are forwarded to the real object. The proxy
+    is falsy when the import fails, like the `name = None` fallback of an
+    optional dependency, so `if docx2txt:` keeps working. `on_import` runs
+    once with the module, e.g. to configure it.
+    """
+    def __init__(self, module, attribute=None, on_import=None):
+        self._module_name = module
+        self._attribute = attribute
+        self._on_import = on_import
+        self._target = None
+        self._lock = threading.Lock()
+
+    def _resolve(self):
+        if self._target is None:
+            with self._lock:
+                if self._target is None:
+                    module = importlib.import_module(self._module_name)
+                    if self._on_import:
+                        self._on_import(module)
+                    self._target = getattr(module, self._attribute) if self._attribute else module
+        return self._target
+
+    @property
+    def loaded(self):
+        return self._target is not None
+
+    def __getattr__(self, name):
+        # Only reached for names not set on the proxy itself (a mock.patch sets them)
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return getattr(self._resolve(), name)
+
+    def __call__(self, *args, **kwargs):
+        return self._resolve()(*args, **kwargs)
+
+    def __bool__(self):
+        try:
+            self._resolve()
+        except ImportError:
+            return False
+        return True
+
+    def __repr__(self):
+        name = f"{self._module_name}.{self._attribute}" if self._attribute else self._module_name
+        return f"<LazyImport {name}{'' if self.loaded else ' (not loaded)'}>"
+
+def _configure_genai(module):
+    if settings.GOOGLE_API_KEY:
+        module.configure(api_key=settings.GOOGLE_API_KEY)
+
+# Shared by the agents and the Gemini embedding backend; configured on first use
+genai = LazyImport('google.generativeai', on_import=_configure_genai)
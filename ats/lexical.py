@@ -0,0 +1,308 @@
+"""
+Local BM25 index over resume text, for exact keyword matches (certifications,
+company names, tools) and for search without the embedding service.
+
+Directory layout (inside the vector store directory):
+    base.npz       CSR postings: term_offsets, doc_index (int32), tf (uint16), doc_len
+    base.json      terms, document ids and metadata of the base
+    delta.jsonl    documents added/deleted since the base was written, one per line
+
+Adds and deletes only append a line to delta.jsonl. Once the delta holds
+COMPACT_RATIO of the base, everything is folded into a new base. Other
+processes' appends are picked up on the next search by replaying the delta
+from where this process stopped reading. Appends and compactions hold an
+exclusive lock on the `.lock` file, so a compaction can't truncate the
+delta under another process's append.
+"""
+import json
+import math
+import os
+import re
+import threading
+from contextlib import contextmanager
+import numpy as np
+try:
+    import fcntl
+except ImportError:  # Windows: no inter-process lock, run a single writer
+    fcntl = None
+from .vector_store import _atomic_write, matches_where
+
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*(?:[./\-][a-z0-9+#]+)*")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it of on or the to was were will with".split()
+)
+
+def tokenize(text):
+    """
+    Lowercased terms; compounds such as "node.js", "ci/cd" or "aws-certified"
+    are kept whole and also split into their parts.
+    """
+    terms = []
+    for token in TOKEN_RE.findall((text or "").lower()):
+        if token in STOPWORDS:
+            continue
+        terms.append(token)
+        parts = re.split(r"[./\-]", token)
+        if len(parts) > 1:
+            terms.extend(part for part in parts if part and part not in STOPWORDS)
+    return terms
+
+def term_counts(text):
+    counts = {}
+    for term in tokenize(text):
+        counts[term] = counts.get(term, 0) + 1
+    return counts
+
+def reciprocal_rank_fusion(result_lists, k=60, n_results=None):
+    """
+    Merge ranked lists of {'id', 'score', 'metadata'} dicts: each list
+    contributes 1 / (k + rank) per document. Results keep the metadata of
+    their first occurrence and list the sources ("vector", "lexical", ...)
+    they were found in.
+    """
+    fused = {}
+    for source, results in result_lists.items():
+        for rank, result in enumerate(results, start=1):
+            entry = fused.setdefault(result['id'], {'id': result['id'], 'score': 0.0, 'metadata': result['metadata'], 'sources': []})
+            entry['score'] += 1.0 / (k + rank)
+            entry['sources'].append(source)
+    ranked = sorted(fused.values(), key=lambda entry: -entry['score'])
+    return ranked[:n_results] if n_results else ranked
+
+class BM25Index:
+    def __init__(self, path, k1=1.2, b=0.75, compact_ratio=0.25, min_compact=500):
+        self.path = str(path)
+        self.k1 = k1
+        self.b = b
+        self.compact_ratio = compact_ratio
+        self.min_compact = min_compact
+        self._lock = threading.RLock()
+        self._loaded = False
+
+    # Loading
+
+    def _paths(self):
+        return (os.path.join(self.path, 'base.npz'), os.path.join(self.path, 'base.json'),
+                os.path.join(self.path, 'delta.jsonl'))
+
+    def _stat(self, path):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_ino)
+
+    def load(self):
+        with self._lock:
+            base_npz, base_json, _ = self._paths()
+            self.ids, self.metadata, self.doc_len, self.alive = [], [], [], []
+            self.terms, self.offsets = {}, np.zeros(1, dtype=np.int64)
+            self.base_docs = np.empty(0, dtype=np.int32)
+            self.base_tf = np.empty(0, dtype=np.uint16)
+            self.delta = {}
+            self.positions = {}
+            self.delta_docs = 0
+            self._delta_offset = 0
+            self._base_stamp = self._stat(base_json)
+            if self._base_stamp is not None:
+                with open(base_json, 'r') as f:
+                    meta = json.load(f)
+                arrays = np.load(base_npz)
+                self.terms = {term: i for i, term in enumerate(meta['terms'])}
+                self.offsets = arrays['term_offsets']
+                self.base_docs = arrays['doc_index']
+                self.base_tf = arrays['tf']
+                self.ids = meta['ids']
+                self.metadata = meta['metadata']
+                self.doc_len = arrays['doc_len'].tolist()
+                self.alive = [True] * len(self.ids)
+                self.positions = {vid: row for row, vid in enumerate(self.ids)}
+            self._arrays = None
+            self._loaded = True
+            self._replay()
+
+    def _ensure_loaded(self):
+        with self._lock:
+            if not self._loaded or self._stat(self._paths()[1]) != self._base_stamp:
+                # First use, or another process compacted
+                self.load()
+            else:
+                self._replay()
+
+    def _replay(self):
+        delta_path = self._paths()[2]
+        if not os.path.exists(delta_path) or os.path.getsize(delta_path) <= self._delta_offset:
+            return
+        with open(delta_path, 'rb') as f:
+            f.seek(self._delta_offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # Partially written by a concurrent append; read it next time
+                self._delta_offset += len(line)
+                entry = json.loads(line)
+                if entry['op'] == 'add':
+                    self._apply_add(entry['id'], entry['tf'], entry.get('metadata') or {})
+                else:
+                    self._apply_delete(entry['id'])
+
+    # In-memory updates
+
+    def _apply_delete(self, vid):
+        row = self.positions.pop(vid, None)
+        if row is not None:
+            self.alive[row] = False
+            self._arrays = None
+
+    def _apply_add(self, vid, counts, metadata):
+        self._apply_delete(vid)
+        row = len(self.ids)
+        self.ids.append(vid)
+        self.metadata.append(metadata)
+        self.doc_len.append(sum(counts.values()))
+        self.alive.append(True)
+        self.positions[vid] = row
+        for term, tf in counts.items():
+            docs, tfs = self.delta.setdefault(term, ([], []))
+            docs.append(row)
+            tfs.append(tf)
+        self.delta_docs += 1
+        self._arrays = None
+
+    # Writing
+
+    @contextmanager
+    def _writing(self):
+        """
+        Held around every write: the thread lock, then the lock file, so
+        writers in other processes wait too. Not reentrant: inside it, call
+        _compact() rather than compact().
+        """
+        with self._lock:
+            os.makedirs(self.path, exist_ok=True)
+            if fcntl is None:
+                yield
+                return
+            with open(os.path.join(self.path, '.lock'), 'a') as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _append_delta(self, entries):
+        with open(self._paths()[2], 'a') as f:
+            f.write("".join(json.dumps(entry) + "\n" for entry in entries))
+
+    def add(self, ids, texts, metadata=None):
+        """Index (or re-index) documents; `metadata` dicts are returned with results and used by `where`."""
+        metadata = metadata or [{}] * len(ids)
+        entries = [{'op': 'add', 'id': str(vid), 'tf': term_counts(text), 'metadata': meta or {}}
+                   for vid, text, meta in zip(ids, texts, metadata)]
+        with self._writing():
+            self._ensure_loaded()
+            self._append_delta(entries)
+            self._replay()
+            if self.delta_docs > max(self.min_compact, self.compact_ratio * (len(self.ids) - self.delta_docs)):
+                self._compact()
+
+    def delete(self, ids):
+        with self._writing():
+            self._ensure_loaded()
+            present = [str(vid) for vid in ids if str(vid) in self.positions]
+            if present:
+                self._append_delta([{'op': 'delete', 'id': vid} for vid in present])
+                self._replay()
+            return len(present)
+
+    def compact(self):
+        """Fold the delta into a new base, dropping deleted documents."""
+        with self._writing():
+            self._compact()
+
+    def _compact(self):
+        # Nobody can append until the delta is truncated: read all of it first
+        self._ensure_loaded()
+        live = [row for row in range(len(self.ids)) if self.alive[row]]
+        remap = np.full(len(self.ids), -1, dtype=np.int64)
+        remap[live] = np.arange(len(live))
+        postings = {}
+        for term in set(self.terms) | set(self.delta):
+            docs, tfs = self._posting(term)
+            keep = remap[docs] >= 0
+            if keep.any():
+                postings[term] = (remap[docs[keep]].astype(np.int32), tfs[keep])
+        terms = sorted(postings)
+        lengths = np.array([len(postings[term][0]) for term in terms], dtype=np.int64)
+        offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+        doc_index = np.concatenate([postings[term][0] for term in terms]) if terms else np.empty(0, dtype=np.int32)
+        tf = np.concatenate([postings[term][1] for term in terms]) if terms else np.empty(0, dtype=np.uint16)
+
+        base_npz, base_json, delta_path = self._paths()
+        _atomic_write(base_npz, lambda f: np.savez(f, term_offsets=offsets, doc_index=doc_index, tf=tf,
+                                                   doc_len=np.asarray([self.doc_len[row] for row in live], dtype=np.int32)))
+        meta = json.dumps({
+            'terms': terms,
+            'ids': [self.ids[row] for row in live],
+            'metadata': [self.metadata[row] for row in live],
+        })
+        _atomic_write(base_json, lambda f: f.write(meta.encode('utf-8')))
+        # A crash before this line only replays adds the base already has, which is harmless
+        _atomic_write(delta_path, lambda f: None)
+        self.load()
+
+    # Searching
+
+    def _posting(self, term):
+        # Doc rows and term frequencies from the base CSR plus the delta
+        term_id = self.terms.get(term)
+        if term_id is not None:
+            start, end = self.offsets[term_id], self.offsets[term_id + 1]
+            docs, tfs = self.base_docs[start:end].astype(np.int64), self.base_tf[start:end]
+        else:
+            docs, tfs = np.empty(0, dtype=np.int64), np.empty(0, dtype=np.uint16)
+        if term in self.delta:
+            delta_docs, delta_tfs = self.delta[term]
+            docs = np.concatenate([docs, np.asarray(delta_docs, dtype=np.int64)])
+            tfs = np.concatenate([tfs, np.minimum(delta_tfs, 65535).astype(np.uint16)])
+        return docs, tfs
+
+    def _doc_arrays(self):
+        if self._arrays is None:
+            self._arrays = (np.asarray(self.doc_len, dtype=np.float32), np.asarray(self.alive, dtype=bool))
+        return self._arrays
+
+    def __len__(self):
+        with self._lock:
+            self._ensure_loaded()
+            return len(self.positions)
+
+    def search(self, query, n_results=10, where=None):
+        """
+        Top documents by BM25 for the query's terms, as
+        [{'id', 'score', 'metadata'}]. Only documents matching at least one
+        term are returned. `where` filters on metadata like VectorDB.
+        """
+        with self._lock:
+            self._ensure_loaded()
+            doc_len, alive = self._doc_arrays()
+            total = int(alive.sum())
+            if not total:
+                return []
+            avg_len = float(doc_len[alive].mean()) or 1.0
+
+            scores = np.zeros(len(self.ids), dtype=np.float32)
+            for term in dict.fromkeys(tokenize(query)):
+                docs, tfs = self._posting(term)
+                live = alive[docs]
+                docs, tfs = docs[live], tfs[live].astype(np.float32)
+                if not len(docs):
+                    continue
+                idf = math.log(1.0 + (total - len(docs) + 0.5) / (len(docs) + 0.5))
+                norm = self.k1 * (1.0 - self.b + self.b * doc_len[docs] / avg_len)
+                scores[docs] += idf * tfs * (self.k1 + 1.0) / (tfs + norm)
+
+            hits = np.flatnonzero(scores > 0)
+            if where and len(hits):
+                hits = hits[np.fromiter((matches_where(self.metadata[row], where) for row in hits), dtype=bool, count=len(hits))]
+            top = hits[np.argsort(-scores[hits], kind='stable')[:n_results]]
+            return [{'id': self.ids[row], 'score': float(scores[row]), 'metadata': self.metadata[row]} for row in top]
@@ -0,0 +1,58 @@
+import os
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from itertools import islice
+from ats.vector_db import collection_names, open_store
+from ats.vector_store import SegmentStore
+
+class Command(BaseCommand):
+    help = ("Migrate a legacy vectors.json file into the binary segment vector store, "
+            "or (--to-database) a segment store into the database vector store.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source', default=os.path.join(settings.BASE_DIR, 'vectors.json'),
+                            help="Legacy JSON file to read (default: BASE_DIR/vectors.json)")
+        parser.add_argument('--dest', default=str(settings.ATS_VECTOR_STORE_DIR),
+                            help="Segment store directory to write (default: ATS_VECTOR_STORE_DIR)")
+        parser.add_argument('--remove-source', action='store_true',
+                            help="Delete the JSON file after a successful conversion")
+        parser.add_argument('--to-database', action='store_true',
+                            help="Copy the applicant and job vectors of the segment store at --dest into the "
+                                 "database (for ATS_VECTOR_STORE TYPE 'database'); nothing is re-embedded")
+
+    def _copy_to_database(self, path, collection):
+        source = SegmentStore(path)
+        target = open_store(path, 'database', collection)
+        rows = source.iter_live()
+        while True:
+            batch = list(islice(rows, 1000))
+            if not batch:
+                break
+            ids, embeddings, metadata, texts = zip(*batch)
+            target.append(ids, embeddings, metadata, texts, backend=source.backend)
+        return len(target)
+
+    def handle(self, *args, **options):
+        if options['to_database']:
+            dest = options['dest']
+            applicant_collection, job_collection = collection_names()
+            applicants = self._copy_to_database(dest, applicant_collection)
+            jobs = self._copy_to_database(os.path.join(dest, 'jobs'), job_collection)
+            self.stdout.write(self.style.SUCCESS(
+                f"Copied {applicants} applicant and {jobs} job vectors from {dest} into the database."
+            ))
+            return
+
+        source = options['source']
+        if not os.path.exists(source):
+            raise CommandError(f"No legacy vector file at {source}")
+
+        store, converted, skipped = SegmentStore.from_json(source, options['dest'])
+        store.compact()
+        self.stdout.write(self.style.SUCCESS(
+            f"Converted {converted} vectors into {options['dest']} ({len(store)} live, {skipped} skipped)."
+        ))
+
+        if options['remove_source']:
+            os.remove(source)
+            self.stdout.write(f"Removed {source}")
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+from ats.caching import get_embedding_cache
+
+class Command(BaseCommand):
+    help = "Show embedding cache statistics, or clear the cache."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clear', action='store_true', help="Delete every cached embedding and reset counters")
+
+    def handle(self, *args, **options):
+        cache = get_embedding_cache()
+        if cache is None:
+            raise CommandError("The embedding cache is disabled (ATS_EMBEDDING_CACHE['ENABLED']).")
+
+        if options['clear']:
+            cache.clear()
+            self.stdout.write(self.style.SUCCESS("Embedding cache cleared."))
+            return
+
+        stats = cache.stats()
+        totals = stats['total']
+        hits = totals['memory_hits'] + totals['disk_hits']
+        lookups = hits + totals['misses']
+        self.stdout.write(f"Entries:       {stats['entries']} ({stats['bytes'] / 1024:.1f} KiB)")
+        self.stdout.write(f"Lookups:       {lookups}")
+        self.stdout.write(f"Hits:          {hits} (memory {totals['memory_hits']}, disk {totals['disk_hits']})")
+        self.stdout.write(f"Misses:        {totals['misses']}")
+        self.stdout.write(f"Hit rate:      {hits / lookups:.1%}" if lookups else "Hit rate:      n/a")
+        self.stdout.write(f"Remote calls saved: {hits}")
@@ -0,0 +1,164 @@
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import time
+import zipfile
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from ats.agents import Orchestrator
+from ats.models import Job
+from ats.extraction import extract_text_from_file
+from ats.pipeline import persist_results_bulk
+
+RESUME_EXTENSIONS = ('.pdf', '.docx')
+
+class Command(BaseCommand):
+    help = "Bulk-ingest a directory or zip of resumes for a job, resuming from a checkpoint."
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', help="Directory or .zip file of PDF/DOCX resumes")
+        parser.add_argument('--job', type=int, help="Job id the applicants apply to")
+        parser.add_argument('--extract-workers', type=int, default=os.cpu_count() or 2,
+                            help="Processes used for text extraction")
+        parser.add_argument('--llm-concurrency', type=int, default=settings.ATS_INGEST['LLM_CONCURRENCY'],
+                            help="Maximum resumes in the agent pipeline at once")
+        parser.add_argument('--batch-size', type=int, default=settings.ATS_INGEST['BATCH_SIZE'],
+                            help="Resumes written (and checkpointed) per database transaction")
+        parser.add_argument('--checkpoint', help="Checkpoint file (default: <source>.ingest-checkpoint.json)")
+        parser.add_argument('--restart', action='store_true', help="Ignore an existing checkpoint")
+
+    # Checkpointing
+
+    def _load_checkpoint(self, path, job_id, restart):
+        if os.path.exists(path) and not restart:
+            with open(path, 'r') as f:
+                checkpoint = json.load(f)
+            if checkpoint.get('job') != job_id:
+                raise CommandError(f"Checkpoint {path} belongs to job {checkpoint.get('job')}; use --restart")
+            return checkpoint
+        return {"job": job_id, "done": {}, "failed": {}}
+
+    def _save_checkpoint(self, path, checkpoint):
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(checkpoint, f, indent=1)
+        os.replace(tmp_path, path)
+
+    # Input
+
+    def _collect(self, source, staging):
+        """
+        Returns sorted (key, local_path) pairs; zip members are unpacked into `staging`.
+        """
+        files = []
+        if os.path.isdir(source):
+            for root, _, names in os.walk(source):
+                for name in names:
+                    if name.lower().endswith(RESUME_EXTENSIONS):
+                        path = os.path.join(root, name)
+                        files.append((os.path.relpath(path, source), path))
+        elif zipfile.is_zipfile(source):
+            with zipfile.ZipFile(source) as archive:
+                for index, info in enumerate(archive.infolist()):
+                    if info.is_dir() or not info.filename.lower().endswith(RESUME_EXTENSIONS):
+                        continue
+                    # Flatten member paths; the index keeps names unique and blocks path traversal
+                    path = os.path.join(staging, f"{index:06d}-{os.path.basename(info.filename)}")
+                    with archive.open(info) as src, open(path, 'wb') as dst:
+                        shutil.copyfileobj(src, dst)
+                    files.append((info.filename, path))
+        else:
+            raise CommandError(f"{source} is neither a directory nor a zip file")
+        return sorted(files)
+
+    # Pipeline
+
+    def _run_agents(self, text, job_description):
+        # One orchestrator per thread; agents keep per-instance state
+        if not hasattr(self._local, 'orchestrator'):
+            self._local.orchestrator = Orchestrator()
+        return self._local.orchestrator.process_resume(text, job_description=job_description)
+
+    def handle(self, *args, **options):
+        job = None
+        if options['job'] is not None:
+            job = Job.objects.filter(pk=options['job']).first()
+            if job is None:
+                raise CommandError(f"Job {options['job']} does not exist")
+        job_description = job.description if job else ""
+
+        source = options['source'].rstrip(os.sep)
+        checkpoint_path = options['checkpoint'] or source + '.ingest-checkpoint.json'
+        checkpoint = self._load_checkpoint(checkpoint_path, options['job'], options['restart'])
+        self._local = threading.local()
+
+        staging = tempfile.mkdtemp(prefix='ats-ingest-')
+        started = time.perf_counter()
+        ingested = failed = 0
+        try:
+            files = [(key, path) for key, path in self._collect(source, staging) if key not in checkpoint['done']]
+            skipped = len(checkpoint['done'])
+            self.stdout.write(f"{len(files)} resumes to ingest ({skipped} already done per {checkpoint_path}).")
+            batches = [files[i:i + options['batch_size']] for i in range(0, len(files), options['batch_size'])]
+
+            # Spawned like the extraction pool: forking copies the agent threads' locks mid-use
+            with ProcessPoolExecutor(max_workers=options['extract_workers'],
+                                     mp_context=multiprocessing.get_context('spawn')) as extractors, \
+                    ThreadPoolExecutor(max_workers=options['llm_concurrency']) as agents:
+                # Files are already spread over processes; don't split pages again inside them
+                extract = partial(extract_text_from_file, parallel=False)
+                # Extraction of the next batch overlaps with the agents working on this one
+                pending = [extractors.submit(extract, path) for _, path in batches[0]] if batches else []
+                for batch_no, batch in enumerate(batches):
+                    texts = [future.result() for future in pending]
+                    if batch_no + 1 < len(batches):
+                        pending = [extractors.submit(extract, path) for _, path in batches[batch_no + 1]]
+
+                    agent_futures = [
+                        agents.submit(self._run_agents, text, job_description) if text else None
+                        for text in texts
+                    ]
+                    items, keys = [], []
+                    for (key, path), text, future in zip(batch, texts, agent_futures):
+                        results = future.result() if future else None
+                        if not text:
+                            checkpoint['failed'][key] = "No text extracted"
+                        elif not results or not results.get('parsed'):
+                            checkpoint['failed'][key] = "Failed to parse resume or AI quota exceeded."
+                        else:
+                            with open(path, 'rb') as f:
+                                stored_name = default_storage.save(f"resumes/{os.path.basename(key)}", File(f))
+                            items.append((stored_name, text, results))
+                            keys.append(key)
+
+                    applicants = {a.resume.name: a.pk for a in persist_results_bulk(items, job=job)} if items else {}
+                    for key, (stored_name, _, _) in zip(keys, items):
+                        # Superseded by a later resume with the same email in this batch
+                        checkpoint['done'][key] = applicants.get(stored_name)
+                        checkpoint['failed'].pop(key, None)
+                    self._save_checkpoint(checkpoint_path, checkpoint)
+
+                    ingested += len(keys)
+                    failed += len(batch) - len(keys)
+                    elapsed = time.perf_counter() - started
+                    self.stdout.write(f"Batch {batch_no + 1}/{len(batches)}: {ingested} ingested, {failed} failed, "
+                                      f"{ingested / elapsed * 60:.1f} resumes/min")
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING(f"Interrupted; rerun to resume from {checkpoint_path}."))
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+        elapsed = time.perf_counter() - started
+        rate = ingested / elapsed * 60 if elapsed else 0.0
+        self.stdout.write(self.style.SUCCESS(
+            f"Ingested {ingested} resumes ({failed} failed) in {elapsed:.1f}s: {rate:.1f} resumes/minute."
+        ))
+        if checkpoint['failed']:
+            self.stdout.write(f"Failed resumes are listed in {checkpoint_path} and retried on the next run.")
@@ -0,0 +1,37 @@
+from datetime import datetime
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from ats.caching import get_response_cache
+
+class Command(BaseCommand):
+    help = "Inspect, prune or clear the LLM response cache."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clear', action='store_true', help="Delete every cached response and reset counters")
+        parser.add_argument('--prune', action='store_true', help="Apply TTL and size limits now")
+
+    def handle(self, *args, **options):
+        cache = get_response_cache()
+
+        if options['clear']:
+            cache.clear()
+            self.stdout.write(self.style.SUCCESS("LLM response cache cleared."))
+            return
+        if options['prune']:
+            removed = cache.prune()
+            self.stdout.write(self.style.SUCCESS(f"Pruned {removed} cached responses."))
+
+        stats = cache.stats()
+        totals = stats['total']
+        lookups = totals['hits'] + totals['misses']
+        agents = settings.ATS_LLM_CACHE.get('AGENTS') or []
+        self.stdout.write(f"Enabled for:   {', '.join(agents) if agents else 'no agents (set ATS_LLM_CACHE_AGENTS)'}")
+        self.stdout.write(f"Entries:       {stats['entries']} ({stats['bytes'] / 1024:.1f} KiB)")
+        self.stdout.write(f"Hits:          {totals['hits']}")
+        self.stdout.write(f"Misses:        {totals['misses']}")
+        self.stdout.write(f"Hit rate:      {totals['hits'] / lookups:.1%}" if lookups else "Hit rate:      n/a")
+        for model, entries, size, oldest, newest in stats['models']:
+            self.stdout.write(
+                f"  {model or '-'}: {entries} entries, {size / 1024:.1f} KiB, "
+                f"{datetime.fromtimestamp(oldest):%Y-%m-%d %H:%M} .. {datetime.fromtimestamp(newest):%Y-%m-%d %H:%M}"
+            )
@@ -0,0 +1,18 @@
+import time
+from django.core.management.base import BaseCommand
+from ats.matching import rebuild_matches
+
+class Command(BaseCommand):
+    help = "Recompute the job <-> applicant match table from the stored vectors."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--no-embed', action='store_true',
+                            help="Skip jobs without a stored vector instead of embedding them")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        result = rebuild_matches(embed_missing=not options['no_embed'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Matched {result['jobs']} jobs and {result['applicants']} applicants "
+            f"in {time.perf_counter() - start:.1f}s."
+        ))
@@ -0,0 +1,72 @@
+import time
+from django.core.management.base import BaseCommand
+from ats.matching import rebuild_matches
+from ats.models import Applicant
+from ats.vector_db import VectorDB
+from ats.extraction import extract_text_from_file
+
+class Command(BaseCommand):
+    help = "Rebuild the vector store from Applicant rows using batched embedding requests."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help="Documents per embedding request")
+        parser.add_argument('--workers', type=int, help="Concurrent embedding requests")
+        parser.add_argument('--commit-every', type=int, help="Documents per vector store commit")
+        parser.add_argument('--keep-stale', action='store_true',
+                            help="Keep vectors whose applicant no longer exists")
+        parser.add_argument('--reset', action='store_true',
+                            help="Drop all vectors first (implied when the embedding backend changed)")
+
+    def _documents(self, skipped):
+        applicants = Applicant.objects.select_related('job').order_by('pk')
+        for applicant in applicants.iterator(chunk_size=500):
+            text = ""
+            if applicant.resume:
+                try:
+                    text = extract_text_from_file(applicant.resume.path)
+                except Exception as e:
+                    print(f"Error reading resume for applicant {applicant.pk}: {e}")
+            if not text.strip():
+                # Fall back to what the parsing agent stored
+                text = applicant.experience_summary or ""
+            if not text.strip():
+                skipped.append(applicant.pk)
+                continue
+            yield applicant.pk, text, {
+                "name": applicant.name or "Unknown",
+                "job": applicant.job.title if applicant.job else "General",
+            }
+
+    def handle(self, *args, **options):
+        vdb = VectorDB()
+        reset = options['reset'] or not (vdb.compatible(vdb.store) and vdb.compatible(vdb.jobs))
+        if reset:
+            self.stdout.write(f"Dropping stored vectors ({vdb.store.backend or 'unrecorded backend'}) "
+                              f"to re-embed with {vdb.backend.key}.")
+            vdb.reset_vectors()
+        skipped = []
+        start = time.perf_counter()
+        result = vdb.add_applicants_bulk(
+            self._documents(skipped),
+            commit_every=options['commit_every'],
+            batch_size=options['batch_size'],
+            max_workers=options['workers'],
+        )
+        elapsed = time.perf_counter() - start
+
+        stale = 0
+        if not options['keep_stale']:
+            existing = {str(pk) for pk in Applicant.objects.values_list('pk', flat=True)}
+            stale_ids = [vid for vid in vdb.store.ids[vdb.store.alive] if vid not in existing]
+            stale = vdb.store.delete(stale_ids)
+        vdb.store.compact()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {result['added']} applicants in {elapsed:.1f}s; "
+            f"{len(result['failed'])} failed, {len(skipped)} without text, {stale} stale vectors removed."
+        ))
+        if result['failed']:
+            self.stdout.write(f"Failed applicant ids: {', '.join(str(pk) for pk in result['failed'])}")
+        if reset:
+            counts = rebuild_matches(vdb)
+            self.stdout.write(f"Re-embedded {counts['jobs']} jobs and rebuilt their matches.")
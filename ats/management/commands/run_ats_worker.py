@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from ats.tasks import run_workers, queue_counts
+
+class Command(BaseCommand):
+    help = "Process queued resume uploads with a pool of worker threads."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=settings.ATS_PROCESSING['WORKERS'],
+                            help="Number of concurrent workers")
+        parser.add_argument('--poll-interval', type=float, default=settings.ATS_PROCESSING['POLL_INTERVAL'],
+                            help="Seconds to wait when the queue is empty")
+        parser.add_argument('--once', action='store_true', help="Exit when no runnable job is left")
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Starting {options['workers']} workers (Ctrl+C to stop). Queue: {queue_counts()}")
+        handled = run_workers(options['workers'], poll_interval=options['poll_interval'], once=options['once'])
+        self.stdout.write(self.style.SUCCESS(f"Handled {handled} jobs. Queue: {queue_counts()}"))
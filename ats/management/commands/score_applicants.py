@@ -0,0 +1,41 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from ats.models import Job
+from ats.scoring import SIGNALS, score_applicants
+
+class Command(BaseCommand):
+    help = "Re-rank applicants with the local scoring engine and store the scores on their evaluations."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--job', type=int, action='append', help="Job id (repeatable; default: every job)")
+        parser.add_argument('--weight', action='append', default=[], metavar='SIGNAL=WEIGHT',
+                            help=f"Override a weight from ATS_SCORING, signals: {', '.join(SIGNALS)}")
+        parser.add_argument('--dry-run', action='store_true', help="Print the ranking without saving it")
+        parser.add_argument('--top', type=int, default=10, help="Applicants to print per job")
+
+    def _weights(self, values):
+        weights = {}
+        for value in values:
+            signal, _, weight = value.partition('=')
+            if signal not in SIGNALS:
+                raise CommandError(f"Unknown signal '{signal}'; expected one of {', '.join(SIGNALS)}.")
+            try:
+                weights[signal] = float(weight)
+            except ValueError:
+                raise CommandError(f"Invalid weight '{value}'.")
+        return weights
+
+    def handle(self, *args, **options):
+        weights = self._weights(options['weight'])
+        jobs = Job.objects.order_by('pk')
+        if options['job']:
+            jobs = jobs.filter(pk__in=options['job'])
+
+        for job in jobs:
+            start = time.perf_counter()
+            results = score_applicants(job, weights=weights, save=not options['dry_run'])
+            elapsed = (time.perf_counter() - start) * 1000
+            self.stdout.write(self.style.SUCCESS(f"{job.title}: scored {len(results)} applicants in {elapsed:.0f} ms"))
+            for rank, result in enumerate(results[:options['top']], start=1):
+                signals = ", ".join(f"{signal} {result[signal]}" for signal in SIGNALS)
+                self.stdout.write(f"  #{rank} applicant {result['applicant_id']}: {result['score']} ({signals})")
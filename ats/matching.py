@@ -0,0 +1,234 @@
+"""
+Precomputed job <-> applicant matches.
+
+Jobs are embedded once when saved (VectorDB.add_job) and stored next to the
+applicant vectors. JobMatch then holds, for every job, its TOP_K most
+similar applicants (CANDIDATE rows) and, for every applicant, its TOP_K
+most similar jobs (JOB rows), so the job and applicant pages read
+suggestions from the database without any remote call.
+
+Both sides are kept current incrementally: a new or edited job gets its
+candidate list and is inserted into the top jobs of the applicants it
+qualifies for (lists it was already part of are recomputed); a new
+applicant likewise. `rebuild_matches` recomputes everything.
+"""
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Min, Window
+from django.db.models.functions import RowNumber
+from .models import Applicant, Job, JobMatch
+from .scoring import score_applicants
+from .tasks import enqueue_job
+from .vector_db import get_vector_db
+
+def _job_vectors(vdb):
+    ids, matrix = vdb.jobs.live_arrays()
+    return np.asarray([int(vid) for vid in ids], dtype=np.int64), matrix
+
+def _applicant_vectors(vdb, applicant_ids):
+    """(ids, matrix) of the given applicants that have a stored vector."""
+    ids, rows = [], []
+    for pk in applicant_ids:
+        stored = vdb.store.get(pk)
+        if stored is not None:
+            ids.append(int(pk))
+            rows.append(stored['embedding'])
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty((0, vdb.store.dim or 0), dtype=np.float32)
+    return np.asarray(ids, dtype=np.int64), np.stack(rows)
+
+def _same_backend(vdb):
+    # Job and applicant vectors from different backends aren't comparable
+    return vdb.compatible(vdb.store) and vdb.compatible(vdb.jobs)
+
+def _replace(kind, field, keys, rows):
+    """Replace the `kind` rows of the jobs/applicants in `keys` by (job_id, applicant_id, score) rows."""
+    with transaction.atomic():
+        JobMatch.objects.filter(kind=kind, **{f'{field}__in': list(keys)}).delete()
+        JobMatch.objects.bulk_create([
+            JobMatch(kind=kind, job_id=job_id, applicant_id=applicant_id, score=score)
+            for job_id, applicant_id, score in rows
+        ], batch_size=1000)
+
+def _thresholds(kind, field, keys):
+    """{key: (row count, lowest score)} of the current top lists of `keys`."""
+    keys = set(keys)
+    rows = JobMatch.objects.filter(kind=kind).values(field).annotate(count=Count('pk'), low=Min('score'))
+    return {key: (count, low) for key, count, low in rows.values_list(field, 'count', 'low') if key in keys}
+
+def _qualifying(keys, scores, thresholds, k):
+    # A new entry enters a list if it beats the k-th entry, or the list isn't full yet
+    return [(key, score) for key, score in zip(keys, scores)
+            if np.isfinite(score) and (thresholds.get(key, (0, None))[0] < k or score > thresholds[key][1])]
+
+def _insert_and_trim(kind, field, rows, k):
+    """
+    Add (job_id, applicant_id, score) rows to the `field` side's top lists
+    and drop whatever falls beyond position k. Exact as long as the lists
+    were the top k before, which spares rewriting the unchanged entries.
+    """
+    keys = sorted({row[0] if field == 'job' else row[1] for row in rows})
+    with transaction.atomic():
+        JobMatch.objects.bulk_create([
+            JobMatch(kind=kind, job_id=job_id, applicant_id=applicant_id, score=score)
+            for job_id, applicant_id, score in rows
+        ], batch_size=1000)
+        for start in range(0, len(keys), 500):
+            ranked = JobMatch.objects.filter(kind=kind, **{f'{field}__in': keys[start:start + 500]}).annotate(
+                position=Window(RowNumber(), partition_by=[F(field)], order_by=[F('score').desc(), F('pk').asc()])
+            )
+            extra = list(ranked.filter(position__gt=k).values_list('pk', flat=True))
+            if extra:
+                JobMatch.objects.filter(pk__in=extra).delete()
+
+def refresh_top_jobs(applicant_ids, vdb):
+    """Recompute the JOB rows (top jobs) of these applicants from the job vectors."""
+    k = settings.ATS_MATCHING['TOP_K']
+    applicant_ids = list(applicant_ids)
+    job_ids, job_matrix = _job_vectors(vdb)
+    ids, matrix = _applicant_vectors(vdb, applicant_ids)
+    rows = []
+    if len(job_ids) and len(ids):
+        scores = matrix @ job_matrix.T
+        top = np.argsort(-scores, axis=1, kind='stable')[:, :k]
+        rows = [(int(job_ids[j]), int(ids[i]), float(scores[i, j])) for i in range(len(ids)) for j in top[i]]
+    _replace(JobMatch.JOB, 'applicant', applicant_ids, rows)
+
+def refresh_candidates(job_ids, vdb):
+    """Recompute the CANDIDATE rows (top applicants) of these jobs from the applicant vectors."""
+    k = settings.ATS_MATCHING['TOP_K']
+    job_ids = list(job_ids)
+    found = {}
+    for job_id in job_ids:
+        stored = vdb.jobs.get(job_id)
+        if stored is not None:
+            # Over-fetch: the vector store may still hold applicants deleted since
+            found[job_id] = vdb.search_by_vector(stored['embedding'], n_results=2 * k, exact=True)
+    existing = set(Applicant.objects.filter(
+        pk__in={int(hit['id']) for hits in found.values() for hit in hits}
+    ).values_list('pk', flat=True))
+    rows = []
+    for job_id, hits in found.items():
+        hits = [hit for hit in hits if int(hit['id']) in existing][:k]
+        rows.extend((job_id, int(hit['id']), hit['score']) for hit in hits)
+    _replace(JobMatch.CANDIDATE, 'job', job_ids, rows)
+
+def update_for_jobs(job_ids, vdb):
+    """After jobs were (re-)embedded: their candidates and the affected applicants' top jobs."""
+    k = settings.ATS_MATCHING['TOP_K']
+    job_ids = [pk for pk in job_ids if pk in vdb.jobs]
+    if not job_ids or not len(vdb.store) or not _same_backend(vdb):
+        return
+    refresh_candidates(job_ids, vdb)
+
+    # Lists that held an edited job may have to take another job in its place
+    held = set(JobMatch.objects.filter(kind=JobMatch.JOB, job__in=job_ids).values_list('applicant_id', flat=True))
+    if held:
+        refresh_top_jobs(sorted(held), vdb)
+
+    applicant_ids = [pk for pk in Applicant.objects.values_list('pk', flat=True) if pk not in held]
+    thresholds = _thresholds(JobMatch.JOB, 'applicant', applicant_ids)
+    rows = []
+    for job_id in job_ids:
+        scores = vdb.similarities(applicant_ids, vdb.jobs.get(job_id)['embedding'])
+        rows.extend((job_id, pk, float(score)) for pk, score in _qualifying(applicant_ids, scores, thresholds, k))
+    if rows:
+        _insert_and_trim(JobMatch.JOB, 'applicant', rows, k)
+
+def update_for_applicants(applicant_ids, vdb):
+    """After applicants were (re-)embedded: their top jobs and the affected jobs' candidates."""
+    k = settings.ATS_MATCHING['TOP_K']
+    if not len(vdb.jobs) or not _same_backend(vdb):
+        return
+    applicant_ids = list(applicant_ids)
+    refresh_top_jobs(applicant_ids, vdb)
+
+    held = set(JobMatch.objects.filter(kind=JobMatch.CANDIDATE, applicant__in=applicant_ids).values_list('job_id', flat=True))
+    if held:
+        refresh_candidates(sorted(held), vdb)
+
+    job_ids, job_matrix = _job_vectors(vdb)
+    ids, matrix = _applicant_vectors(vdb, applicant_ids)
+    keep = [i for i, job_id in enumerate(job_ids) if job_id not in held]
+    if not len(ids) or not keep:
+        return
+    job_ids, scores = job_ids[keep].tolist(), matrix @ job_matrix[keep].T
+    thresholds = _thresholds(JobMatch.CANDIDATE, 'job', job_ids)
+    rows = []
+    for i, pk in enumerate(ids.tolist()):
+        rows.extend((job_id, pk, float(score)) for job_id, score in _qualifying(job_ids, scores[i], thresholds, k))
+    if rows:
+        _insert_and_trim(JobMatch.CANDIDATE, 'job', rows, k)
+
+def rebuild_matches(vdb=None, embed_missing=True):
+    """
+    Recompute every match. Jobs without a stored vector are embedded first
+    (one request each) unless `embed_missing` is off.
+    Returns {"jobs": count, "applicants": count}.
+    """
+    vdb = vdb or get_vector_db()
+    jobs = list(Job.objects.all())
+    if embed_missing and not vdb.compatible(vdb.jobs):
+        # Written by another backend; every job is embedded again below
+        vdb.jobs.clear()
+    if not _same_backend(vdb):
+        print("Job and applicant vectors come from different embedding backends; run `python manage.py reindex_vectors`.")
+        return {"jobs": 0, "applicants": 0}
+    if embed_missing:
+        for job in jobs:
+            if job.pk not in vdb.jobs:
+                vdb.add_job(job)
+    job_ids = [job.pk for job in jobs if job.pk in vdb.jobs]
+    applicant_ids = [pk for pk in Applicant.objects.values_list('pk', flat=True) if pk in vdb.store]
+
+    with transaction.atomic():
+        JobMatch.objects.all().delete()
+        refresh_candidates(job_ids, vdb)
+        for start in range(0, len(applicant_ids), 1000):
+            refresh_top_jobs(applicant_ids[start:start + 1000], vdb)
+    return {"jobs": len(job_ids), "applicants": len(applicant_ids)}
+
+def refresh_job(job, vdb=None):
+    """
+    Embed a saved job, update the matches it takes part in and re-score its
+    applicants (the description or requirements may have changed). Raises
+    when the job can't be embedded, so a queued run is retried.
+    """
+    vdb = vdb or get_vector_db()
+    if not len(vdb.add_job(job)):
+        raise ValueError(f"Job {job.pk} could not be embedded.")
+    update_for_jobs([job.pk], vdb)
+    score_applicants(job, vdb=vdb)
+
+def _job_saved(job):
+    try:
+        refresh_job(job)
+    except Exception as e:
+        print(f"Error updating matches for job {job.pk}: {e}")
+
+def _job_deleted(job_id):
+    try:
+        get_vector_db().delete_job(job_id)
+    except Exception as e:
+        print(f"Error removing the vector of job {job_id}: {e}")
+
+# Receivers, connected in AtsConfig.ready()
+
+def embed_saved_job(sender, instance, created, raw=False, **kwargs):
+    """
+    Embed and match a saved job. With ATS_PROCESSING['ASYNC'] this goes on
+    the ProcessingJob queue like uploads, so the save doesn't wait for the
+    embedding API or the rate limiter. Otherwise (no workers, e.g. on
+    Vercel) it runs after the commit and failures are printed.
+    """
+    if raw:
+        return
+    if settings.ATS_PROCESSING['ASYNC']:
+        enqueue_job(instance)
+    else:
+        transaction.on_commit(lambda: _job_saved(instance))
+
+def forget_deleted_job(sender, instance, **kwargs):
+    job_id = instance.pk
+    transaction.on_commit(lambda: _job_deleted(job_id))
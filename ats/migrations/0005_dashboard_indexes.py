@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ats', '0004_resumedocument'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='evaluation',
+            name='total_score',
+            field=models.IntegerField(db_index=True, default=0),
+        ),
+        migrations.AddIndex(
+            model_name='applicant',
+            index=models.Index(fields=['job', 'created_at'], name='ats_applica_job_id_a3d68c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='applicant',
+            index=models.Index(fields=['created_at'], name='ats_applica_created_325f8d_idx'),
+        ),
+    ]
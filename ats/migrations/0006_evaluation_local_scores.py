@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ats', '0005_dashboard_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='evaluation',
+            name='local_experience_score',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='evaluation',
+            name='local_score',
+            field=models.FloatField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='evaluation',
+            name='local_scored_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='evaluation',
+            name='local_similarity_score',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='evaluation',
+            name='local_skill_score',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='evaluation',
+            name='experience_score',
+            field=models.IntegerField(blank=True, default=0, null=True),
+        ),
+        migrations.AlterField(
+            model_name='evaluation',
+            name='skill_score',
+            field=models.IntegerField(blank=True, default=0, null=True),
+        ),
+        migrations.AlterField(
+            model_name='evaluation',
+            name='total_score',
+            field=models.IntegerField(blank=True, db_index=True, default=0, null=True),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ats', '0006_evaluation_local_scores'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobMatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('candidate', 'Top candidate for the job'), ('job', 'Top job for the applicant')], max_length=10)),
+                ('score', models.FloatField()),
+                ('applicant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='job_matches', to='ats.applicant')),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='matches', to='ats.job')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', 'job', '-score'], name='ats_jobmatc_kind_257d55_idx'), models.Index(fields=['kind', 'applicant', '-score'], name='ats_jobmatc_kind_62e21c_idx')],
+                'unique_together': {('kind', 'job', 'applicant')},
+            },
+        ),
+    ]
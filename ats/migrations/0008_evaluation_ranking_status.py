@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ats', '0007_jobmatch'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='evaluation',
+            name='prefilter_similarity',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='evaluation',
+            name='ranking_status',
+            field=models.CharField(choices=[('ranked', 'Ranked'), ('deferred', 'Provisional'), ('requested', 'Ranking requested')], default='ranked', max_length=10),
+        ),
+    ]
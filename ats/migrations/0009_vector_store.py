@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ats', '0008_evaluation_ranking_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VectorCollection',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('version', models.BigIntegerField(default=0)),
+                ('dim', models.IntegerField(blank=True, null=True)),
+                ('backend', models.CharField(blank=True, max_length=255, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StoredVector',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('vid', models.CharField(max_length=64)),
+                ('embedding', models.BinaryField()),
+                ('metadata', models.JSONField(blank=True, default=dict)),
+                ('text', models.TextField(blank=True, default='')),
+                ('collection', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='vectors', to='ats.vectorcollection')),
+            ],
+            options={
+                'unique_together': {('collection', 'vid')},
+            },
+        ),
+    ]
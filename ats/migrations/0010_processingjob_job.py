@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ats', '0009_vector_store'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='processingjob',
+            name='job',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='processing_jobs', to='ats.job'),
+        ),
+        migrations.AlterField(
+            model_name='processingjob',
+            name='applicant',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='processing_jobs', to='ats.applicant'),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 
 class Skill(models.Model):
     name = models.CharField(max_length=255, unique=True)
@@ -15,6 +16,22 @@ class Job(models.Model):
     def __str__(self):
         return self.title
 
+class ResumeDocument(models.Model):
+    """
+    One stored resume file per distinct content (sha256 of the bytes), with
+    the extracted text and agent results, so identical uploads reuse them.
+    """
+    sha256 = models.CharField(max_length=64, unique=True)
+    file = models.FileField(upload_to='resumes/')
+    text = models.TextField(blank=True, default='')
+    parsed_data = models.JSONField(null=True, blank=True)
+    skills = models.JSONField(null=True, blank=True)
+    rankings = models.JSONField(default=dict, blank=True) # Ranking agent output keyed by job description hash
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.file.name} ({self.sha256[:12]})"
+
 class Applicant(models.Model):
     job = models.ForeignKey(Job, on_delete=models.SET_NULL, null=True, blank=True, related_name='applicants')
     name = models.CharField(max_length=255, null=True, blank=True)
@@ -23,7 +40,14 @@ class Applicant(models.Model):
     experience_summary = models.TextField(null=True, blank=True)
     resume = models.FileField(upload_to='resumes/')
     parsed_data = models.JSONField(null=True, blank=True) # Full structured JSON from Parse Agent
+    document = models.ForeignKey(ResumeDocument, on_delete=models.SET_NULL, null=True, blank=True, related_name='applicants')
     created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['job', 'created_at']),
+            models.Index(fields=['created_at']),
+        ]
     
     def __str__(self):
         return self.name or self.email or "Unknown Applicant"
@@ -37,12 +61,120 @@ class ApplicantSkill(models.Model):
         unique_together = ('applicant', 'skill')
 
 class Evaluation(models.Model):
+    RANKED = 'ranked'
+    DEFERRED = 'deferred'
+    REQUESTED = 'requested'
+    RANKING_STATUS_CHOICES = [
+        (RANKED, 'Ranked'),
+        (DEFERRED, 'Provisional'),
+        (REQUESTED, 'Ranking requested'),
+    ]
+
     applicant = models.OneToOneField(Applicant, on_delete=models.CASCADE, related_name='evaluation')
-    total_score = models.IntegerField(default=0)
-    skill_score = models.IntegerField(default=0)
-    experience_score = models.IntegerField(default=0)
+    # Ranking agent scores; null when only the local score has been computed
+    total_score = models.IntegerField(default=0, null=True, blank=True, db_index=True)
+    skill_score = models.IntegerField(default=0, null=True, blank=True)
+    experience_score = models.IntegerField(default=0, null=True, blank=True)
     reason = models.TextField(null=True, blank=True)
+    # DEFERRED: below the embedding prefilter, so the scores above are a
+    # provisional estimate until a full ranking is REQUESTED (ats/pipeline.py)
+    ranking_status = models.CharField(max_length=10, choices=RANKING_STATUS_CHOICES, default=RANKED)
+    prefilter_similarity = models.FloatField(null=True, blank=True)
+    # Deterministic local scores (0-100) from ats/scoring.py
+    local_score = models.FloatField(null=True, blank=True, db_index=True)
+    local_skill_score = models.FloatField(null=True, blank=True)
+    local_similarity_score = models.FloatField(null=True, blank=True)
+    local_experience_score = models.FloatField(null=True, blank=True)
+    local_scored_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
         return f"Score: {self.total_score} for {self.applicant}"
+
+class JobMatch(models.Model):
+    """
+    Precomputed job/applicant similarity (ats/matching.py). CANDIDATE rows
+    are a job's top applicants, JOB rows an applicant's top jobs; each side
+    keeps ATS_MATCHING['TOP_K'] rows.
+    """
+    CANDIDATE = 'candidate'
+    JOB = 'job'
+    KIND_CHOICES = [
+        (CANDIDATE, 'Top candidate for the job'),
+        (JOB, 'Top job for the applicant'),
+    ]
+
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='matches')
+    applicant = models.ForeignKey(Applicant, on_delete=models.CASCADE, related_name='job_matches')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    score = models.FloatField()
+
+    class Meta:
+        unique_together = ('kind', 'job', 'applicant')
+        indexes = [
+            models.Index(fields=['kind', 'job', '-score']),
+            models.Index(fields=['kind', 'applicant', '-score']),
+        ]
+
+    def __str__(self):
+        return f"{self.applicant} / {self.job}: {self.score:.3f}"
+
+class ProcessingJob(models.Model):
+    PENDING = 'pending'
+    PROCESSING = 'processing'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (PROCESSING, 'Processing'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    # Either an uploaded resume to process or a saved job to embed and match
+    applicant = models.ForeignKey(Applicant, on_delete=models.CASCADE, related_name='processing_jobs', null=True, blank=True)
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='processing_jobs', null=True, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=3)
+    last_error = models.TextField(null=True, blank=True)
+    run_after = models.DateTimeField(default=timezone.now) # Earliest time a worker may claim it (retry backoff)
+    locked_by = models.CharField(max_length=255, null=True, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_after']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_status_display()} job for {self.applicant or self.job}"
+
+class VectorCollection(models.Model):
+    """
+    One vector store kept in the database (ats/db_store.py), e.g. the
+    applicant or the job vectors. Every committed write bumps `version`,
+    which is how each process knows its in-memory copy is stale.
+    """
+    name = models.CharField(max_length=255, unique=True)
+    version = models.BigIntegerField(default=0)
+    dim = models.IntegerField(null=True, blank=True)
+    backend = models.CharField(max_length=255, null=True, blank=True) # Key of the embedding backend that wrote it
+
+    def __str__(self):
+        return f"{self.name} (v{self.version})"
+
+class StoredVector(models.Model):
+    collection = models.ForeignKey(VectorCollection, on_delete=models.CASCADE, related_name='vectors')
+    vid = models.CharField(max_length=64)
+    embedding = models.BinaryField() # L2-normalized float32, packed little-endian
+    metadata = models.JSONField(default=dict, blank=True)
+    text = models.TextField(blank=True, default='')
+
+    class Meta:
+        unique_together = ('collection', 'vid')
+
+    def __str__(self):
+        return f"{self.collection.name}/{self.vid}"
@@ -0,0 +1,268 @@
+import logging
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+from .models import Applicant, Evaluation, ResumeDocument
+
+from .agents import get_orchestrator
+from .caching import content_key, normalize_text
+from .compaction import compact_resume
+from .vector_db import get_vector_db
+from .vector_store import normalize_rows
+from .extraction import extract_text_from_file
+from .matching import update_for_applicants
+from .scoring import score_applicants
+from .skills import save_applicant_skills, save_skills_bulk
+
+logger = logging.getLogger(__name__)
+
+def ranking_key(job_description):
+    # Re-rank a known resume only when the job it is evaluated against differs
+    return content_key(normalize_text(job_description))
+
+def prefilter(resume_embedding, job, vdb):
+    """
+    Cheap first ranking tier: cosine similarity of the resume to the job's
+    stored vector. Returns (rank_now, similarity). Without a job, with the
+    prefilter disabled or when either embedding is unavailable, the full
+    ranking runs (similarity None).
+    """
+    config = settings.ATS_PREFILTER
+    if not config['ENABLED'] or job is None or not len(resume_embedding):
+        return True, None
+    job_embedding = vdb.job_embedding(job)
+    if not len(job_embedding):
+        return True, None
+    similarity = float(normalize_rows(np.asarray(resume_embedding, dtype=np.float32))
+                       @ normalize_rows(np.asarray(job_embedding, dtype=np.float32)))
+    return similarity >= config['THRESHOLD'], similarity
+
+def process_applicant(applicant):
+    """
+    Run text extraction, the agent pipeline, skill/evaluation writes,
+    embedding, job matching and local scoring for a saved Applicant.
+    Raises on failure.
+
+    If the applicant's ResumeDocument was processed before (same file bytes),
+    its text and parsed/skill results are reused; only the ranking is
+    requested again, and only for a job it hasn't been ranked against.
+
+    Ranking is tiered: a resume whose embedding is less similar to the job
+    than ATS_PREFILTER['THRESHOLD'] isn't sent to the ranking agent. Its
+    evaluation gets a provisional score from the local scoring engine and
+    is marked DEFERRED until a ranking is requested (request_ranking).
+
+    Safe to run again for the same applicant (e.g. a retried queue job):
+    previously written skills and evaluation are replaced.
+    """
+    job = applicant.job
+    document = applicant.document
+    # Pass Job Description context
+    jd_context = job.description if job else ""
+    key = ranking_key(jd_context)
+    vdb = get_vector_db()
+    requested = Evaluation.objects.filter(applicant=applicant, ranking_status=Evaluation.REQUESTED).exists()
+
+    if document is not None and document.parsed_data:
+        resume_text = document.text
+    else:
+        resume_text = extract_text_from_file(applicant.resume.path)
+        if not resume_text:
+            # Not done: a queued job goes through retry/backoff and ends up FAILED
+            raise ValueError("No text could be extracted from the resume.")
+
+    # Cleaned, sectioned and digested once for every agent below
+    resume = compact_resume(resume_text)
+    known_ranking = document.rankings.get(key) if document is not None else None
+    resume_embedding = []
+    rank, similarity = True, None
+    if known_ranking is None and not requested:
+        resume_embedding = vdb._get_embedding(resume_text)
+        rank, similarity = prefilter(resume_embedding, job, vdb)
+        if similarity is not None:
+            logger.info("Prefilter for applicant %s: similarity %.3f, %s", applicant.pk, similarity,
+                        "ranking now" if rank else "ranking deferred")
+
+    if document is not None and document.parsed_data:
+        results = {"parsed": document.parsed_data, "skills": document.skills, "ranking": known_ranking}
+        if results["ranking"] is None and rank:
+            results["ranking"] = get_orchestrator().ranker.rank_candidate(resume.digest("ranking"), jd_context)
+            if results["ranking"] is None and requested:
+                # Keep the provisional score and let the queue retry
+                raise ValueError("Ranking failed or AI quota exceeded.")
+    else:
+        results = get_orchestrator().process_resume(resume, job_description=jd_context, rank=rank)
+
+        if not results or not results.get('parsed'):
+            raise ValueError("Failed to parse resume or AI quota exceeded.")
+    deferred = not results.get('ranking') and not rank
+
+    if document is not None:
+        document.text = resume_text
+        document.parsed_data = results['parsed']
+        document.skills = results.get('skills')
+        if results.get('ranking'):
+            document.rankings[key] = results['ranking']
+        document.save(update_fields=['text', 'parsed_data', 'skills', 'rankings'])
+
+    # Update Applicant
+    parsed = results['parsed']
+    email = parsed.get('email')
+
+    if email:
+        # Handle Duplicate: Delete existing applicant with same email to replace with new one
+        # BUT, maybe we want to allow same person applying for different jobs?
+        # For now, let's keep it per-job unique or global unique.
+        # To keep it simple, global unique overwrite for now as per previous logic.
+        existing = Applicant.objects.filter(email=email).exclude(pk=applicant.pk)
+        if existing.exists():
+           existing.delete()
+
+        applicant.email = email
+
+    applicant.name = parsed.get('name')
+    applicant.phone = parsed.get('phone')
+    applicant.experience_summary = parsed.get('experience_summary')
+    applicant.parsed_data = parsed
+    applicant.save()
+
+    # Save Skills
+    skills = results.get('skills') or {}
+    save_applicant_skills(applicant, skills.get('tech_skills', []), skills.get('confidence_score', 0.0))
+
+    # Save Evaluation (the local scores on the same row are kept)
+    if results.get('ranking'):
+        Evaluation.objects.update_or_create(applicant=applicant, defaults={
+            'total_score': results['ranking'].get('total_score', 0),
+            'skill_score': results['ranking'].get('skill_score', 0),
+            'experience_score': results['ranking'].get('experience_score', 0),
+            'reason': results['ranking'].get('reason', ''),
+            'ranking_status': Evaluation.RANKED,
+            'prefilter_similarity': similarity,
+        })
+    else:
+        Evaluation.objects.filter(applicant=applicant).update(total_score=None, skill_score=None, experience_score=None, reason=None)
+
+    # Save to VectorDB
+    vdb.add_applicant(applicant.id, resume_text, metadata={"name": applicant.name or "Unknown", "job": job.title if job else "General"},
+                      embedding=resume_embedding)
+
+    update_for_applicants([applicant.pk], vdb)
+    if job:
+        local = score_applicants(job, [applicant.pk], vdb=vdb)
+        if deferred:
+            save_provisional(applicant, local[0] if local else {}, similarity)
+
+def _provisional(value):
+    return None if value is None else int(round(value))
+
+def save_provisional(applicant, local, similarity):
+    """Evaluation of a deferred applicant: the local scores stand in for the ranking agent's."""
+    Evaluation.objects.update_or_create(applicant=applicant, defaults={
+        'total_score': _provisional(local.get('score')),
+        'skill_score': _provisional(local.get('skills')),
+        'experience_score': _provisional(local.get('experience')),
+        'reason': f"Provisional score: resume/job similarity {similarity:.2f} is below the ranking threshold "
+                  f"({settings.ATS_PREFILTER['THRESHOLD']}). Request a full ranking to evaluate it with the ranking agent.",
+        'ranking_status': Evaluation.DEFERRED,
+        'prefilter_similarity': similarity,
+    })
+
+def request_ranking(applicant):
+    """
+    Mark a deferred applicant for a full ranking; the next processing run
+    (queued, or inline when ASYNC is off) skips the prefilter.
+    """
+    Evaluation.objects.filter(applicant=applicant).update(ranking_status=Evaluation.REQUESTED)
+
+def ranking_counts():
+    """
+    Evaluations by ranking status and the share of ranking-agent calls the
+    prefilter avoided (applicants still on a provisional score).
+    """
+    counts = dict.fromkeys((Evaluation.RANKED, Evaluation.DEFERRED, Evaluation.REQUESTED), 0)
+    # Rows with only local scores were never up for ranking
+    rows = Evaluation.objects.filter(Q(total_score__isnull=False) | ~Q(ranking_status=Evaluation.RANKED))
+    for row in rows.values('ranking_status').annotate(n=Count('pk')):
+        counts[row['ranking_status']] = row['n']
+    total = sum(counts.values())
+    counts['avoided_fraction'] = counts[Evaluation.DEFERRED] / total if total else 0.0
+    return counts
+
+def attach_document(applicant, sha256):
+    """
+    Link a saved applicant to the ResumeDocument for its file contents,
+    creating it around the applicant's stored file on first sight.
+    """
+    document, created = ResumeDocument.objects.get_or_create(sha256=sha256, defaults={'file': applicant.resume.name})
+    if not created and document.file.name != applicant.resume.name:
+        # The shared file went missing from storage; adopt this upload's copy
+        document.file = applicant.resume.name
+        document.save(update_fields=['file'])
+    applicant.document = document
+    applicant.save(update_fields=['document'])
+    return document
+
+def persist_results_bulk(items, job=None):
+    """
+    Write many processed resumes at once: one transaction with bulk inserts
+    for applicants, skills, applicant skills and evaluations, then a single
+    batched VectorDB commit.
+
+    `items` is a list of (resume_name, resume_text, results) where resume_name
+    is the stored file name and results is Orchestrator output with a
+    parsed part. Within the batch, and against existing rows, the latest
+    resume wins for a given email (as in process_applicant).
+    Returns the created applicants in input order (superseded items excluded).
+    """
+    latest = {}
+    for index, (_, _, results) in enumerate(items):
+        latest[results['parsed'].get('email') or index] = index
+    emails = [key for key in latest if isinstance(key, str)]
+    items = [items[index] for index in sorted(latest.values())]
+
+    with transaction.atomic():
+        if emails:
+            Applicant.objects.filter(email__in=emails).delete()
+
+        applicants = Applicant.objects.bulk_create([
+            Applicant(
+                job=job,
+                resume=resume_name,
+                name=results['parsed'].get('name'),
+                email=results['parsed'].get('email') or None,
+                phone=results['parsed'].get('phone'),
+                experience_summary=results['parsed'].get('experience_summary'),
+                parsed_data=results['parsed'],
+            )
+            for resume_name, _, results in items
+        ])
+
+        skill_rows = []
+        for applicant, (_, _, results) in zip(applicants, items):
+            if results.get('skills'):
+                confidence = results['skills'].get('confidence_score', 0.0)
+                skill_rows.extend((applicant, name, confidence) for name in results['skills'].get('tech_skills', []))
+        save_skills_bulk(skill_rows)
+
+        Evaluation.objects.bulk_create([
+            Evaluation(
+                applicant=applicant,
+                total_score=results['ranking'].get('total_score', 0),
+                skill_score=results['ranking'].get('skill_score', 0),
+                experience_score=results['ranking'].get('experience_score', 0),
+                reason=results['ranking'].get('reason', ''),
+            )
+            for applicant, (_, _, results) in zip(applicants, items) if results.get('ranking')
+        ])
+
+    vdb = get_vector_db()
+    vdb.add_applicants_bulk(
+        (applicant.pk, resume_text, {"name": applicant.name or "Unknown", "job": job.title if job else "General"})
+        for applicant, (_, resume_text, _) in zip(applicants, items)
+    )
+    update_for_applicants([applicant.pk for applicant in applicants], vdb)
+    if job:
+        score_applicants(job, [applicant.pk for applicant in applicants], vdb=vdb)
+    return applicants
@@ -0,0 +1,288 @@
+"""
+Client-side rate limiting for Gemini calls.
+
+Every agent request and embedding request goes through one process-wide
+RateLimiter (see ATS_RATE_LIMIT in settings). Per model it keeps:
+
+- a requests/minute and a tokens/minute token bucket, so bursts are spread
+  out before they reach the API instead of turning into 429s;
+- a circuit breaker that stops sending to a model after repeated 429s or
+  server errors, and lets a single trial request through after a cool-down.
+
+A call is routed over an ordered list of models: the first model whose
+breaker is closed and whose buckets have room wins. Rate-limit and
+transient errors are retried with jittered exponential backoff, moving to
+another model straight away when one is available.
+"""
+import logging
+import random
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class RateLimitError(Exception):
+    """No model could serve the request within the retry/wait budget."""
+
+# HTTP statuses as whole numbers in an error message, not inside ids or sizes ("15003 tokens")
+STATUS_RE = re.compile(r"\b(429|50[0234])\b")
+TRANSIENT_STATUSES = {500, 502, 503, 504}
+
+def error_status(error):
+    """
+    HTTP status of an API error: its `code` (google.api_core exceptions)
+    or `status_code` attribute, else a 429/50x standing alone in the
+    message. None when there is neither.
+    """
+    for name in ("code", "status_code"):
+        value = getattr(error, name, None)
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+    match = STATUS_RE.search(str(error))
+    return int(match.group(1)) if match else None
+
+def is_rate_limit_error(error):
+    message = str(error)
+    return (error_status(error) == 429 or "Quota exceeded" in message or "RESOURCE_EXHAUSTED" in message
+            or type(error).__name__ == "ResourceExhausted")
+
+def is_transient_error(error):
+    return (is_rate_limit_error(error) or error_status(error) in TRANSIENT_STATUSES or "UNAVAILABLE" in str(error)
+            or type(error).__name__ in ("ServiceUnavailable", "InternalServerError", "DeadlineExceeded"))
+
+def estimate_tokens(text):
+    # Gemini averages ~4 characters per token for English text
+    if isinstance(text, (list, tuple)):
+        return sum(estimate_tokens(part) for part in text)
+    return max(1, len(str(text)) // 4)
+
+class TokenBucket:
+    """
+    `rate` units per minute, bursting up to `capacity`. reserve() always
+    succeeds and returns how long the caller must wait for its units, which
+    keeps concurrent callers in arrival order without a polling loop.
+    """
+    def __init__(self, rate, capacity=None, clock=time.monotonic):
+        self.rate = rate / 60.0
+        self.capacity = float(capacity if capacity is not None else rate)
+        self.clock = clock
+        self.tokens = self.capacity
+        self.updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount):
+        with self._lock:
+            self._refill()
+            deficit = min(amount, self.capacity) - self.tokens
+            return max(0.0, deficit / self.rate) if self.rate else float('inf')
+
+    def reserve(self, amount):
+        with self._lock:
+            self._refill()
+            self.tokens -= min(amount, self.capacity)
+            return max(0.0, -self.tokens / self.rate) if self.rate else float('inf')
+
+    def adjust(self, amount):
+        # Correct an estimate once the real usage is known (positive = more used)
+        with self._lock:
+            self._refill()
+            self.tokens -= amount
+
+    def drain(self):
+        # After a 429 the server's view of our quota wins over ours
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.tokens, 0.0)
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive failures; after `reset_timeout`
+    seconds one trial request is allowed (half-open), whose outcome closes
+    or re-opens the breaker.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, threshold=3, reset_timeout=60, clock=time.monotonic):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.OPEN and self.clock() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._trial_running = False
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_running = False
+
+    def retry_after(self):
+        """Seconds until allow() may return True again."""
+        with self._lock:
+            if self.state == self.OPEN:
+                return max(0.0, self.opened_at + self.reset_timeout - self.clock())
+            if self.state == self.HALF_OPEN and self._trial_running:
+                # Another caller's trial request decides; check back shortly
+                return min(1.0, self.reset_timeout)
+            return 0.0
+
+    def release(self):
+        # The request was not sent or failed for reasons unrelated to the model
+        with self._lock:
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.threshold:
+                self.state = self.OPEN
+                self.opened_at = self.clock()
+            self._trial_running = False
+
+class ModelLimits:
+    def __init__(self, rpm, tpm, breaker_threshold, breaker_reset, clock):
+        self.requests = TokenBucket(rpm, clock=clock)
+        self.tokens = TokenBucket(tpm, clock=clock)
+        self.breaker = CircuitBreaker(breaker_threshold, breaker_reset, clock=clock)
+
+    def wait_time(self, tokens):
+        return max(self.requests.wait_time(1), self.tokens.wait_time(tokens))
+
+    def reserve(self, tokens):
+        return max(self.requests.reserve(1), self.tokens.reserve(tokens))
+
+class RateLimiter:
+    def __init__(self, config, clock=time.monotonic, sleep=time.sleep):
+        self.limits_config = config.get('LIMITS', {})
+        self.max_retries = config.get('MAX_RETRIES', 4)
+        self.backoff_base = config.get('BACKOFF_BASE', 1.0)
+        self.backoff_max = config.get('BACKOFF_MAX', 30)
+        self.max_wait = config.get('MAX_WAIT', 60)
+        self.breaker_threshold = config.get('BREAKER_THRESHOLD', 3)
+        self.breaker_reset = config.get('BREAKER_RESET', 60)
+        self.clock = clock
+        self.sleep = sleep
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def limits(self, model_name):
+        with self._lock:
+            if model_name not in self._models:
+                config = self.limits_config.get(model_name) or self.limits_config.get('default', {})
+                self._models[model_name] = ModelLimits(
+                    config.get('RPM', 60), config.get('TPM', 1000000),
+                    self.breaker_threshold, self.breaker_reset, self.clock,
+                )
+            return self._models[model_name]
+
+    def backoff(self, attempt):
+        # "Full jitter": spreads retries of concurrent callers apart
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def record_tokens(self, model_name, actual, estimated):
+        self.limits(model_name).tokens.adjust(actual - estimated)
+
+    def _choose(self, models, tokens):
+        # First model (in routing order) that can go soonest; breakers are checked last
+        # so that a half-open trial is only claimed by the model actually used
+        for name in sorted(models, key=lambda name: (self.limits(name).wait_time(tokens), models.index(name))):
+            if self.limits(name).breaker.allow():
+                return name
+        return None
+
+    def call(self, models, fn, tokens=1, max_retries=None):
+        """
+        Run fn(model_name) for the first available model in `models`,
+        retrying rate-limit and transient errors up to `max_retries` times.
+        Waits for bucket capacity or an open circuit's cool-down for at most
+        `max_wait` seconds in total. Other exceptions are raised to the caller
+        unchanged. Raises RateLimitError when the request could not be served.
+        """
+        models = list(dict.fromkeys(models))
+        max_retries = self.max_retries if max_retries is None else max_retries
+        deadline = self.clock() + self.max_wait
+        attempt, last_error, failed_model, delay = 0, None, None, 0.0
+        while True:
+            model_name = self._choose(models, tokens)
+            if model_name is None:
+                # Every circuit is open: wait for the first one to allow a trial request
+                wait = max(min(self.limits(name).breaker.retry_after() for name in models), delay)
+                if self.clock() + wait > deadline:
+                    raise RateLimitError(f"Circuit open for {', '.join(models)}") from last_error
+                self.sleep(wait)
+                delay = 0.0
+                continue
+            limits = self.limits(model_name)
+            wait = limits.reserve(tokens)
+            if model_name == failed_model:
+                # No other model to route to: back off before hitting it again
+                wait = max(wait, delay)
+            if self.clock() + wait > deadline:
+                limits.requests.adjust(-1)
+                limits.tokens.adjust(-tokens)
+                limits.breaker.release()
+                raise RateLimitError(f"{model_name} would need {wait:.0f}s for {tokens} tokens") from last_error
+            if wait:
+                self.sleep(wait)
+            try:
+                result = fn(model_name)
+            except Exception as e:
+                if not is_transient_error(e):
+                    limits.breaker.release()
+                    raise
+                limits.breaker.record_failure()
+                if is_rate_limit_error(e):
+                    limits.requests.drain()
+                    limits.tokens.drain()
+                logger.warning("%s failed on attempt %d: %s", model_name, attempt + 1, e)
+                if attempt == max_retries:
+                    raise RateLimitError(f"Gave up after {attempt + 1} attempts: {e}") from e
+                last_error, failed_model, delay = e, model_name, self.backoff(attempt)
+                attempt += 1
+                continue
+            limits.breaker.record_success()
+            return result
+
+    def stats(self):
+        with self._lock:
+            models = dict(self._models)
+        return {
+            name: {"breaker": limits.breaker.state, "failures": limits.breaker.failures}
+            for name, limits in models.items()
+        }
+
+_rate_limiter = None
+_rate_limiter_lock = threading.Lock()
+
+def get_rate_limiter():
+    """
+    Process-wide RateLimiter configured by ATS_RATE_LIMIT.
+    """
+    global _rate_limiter
+    from django.conf import settings
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            _rate_limiter = RateLimiter(settings.ATS_RATE_LIMIT)
+    return _rate_limiter
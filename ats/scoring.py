@@ -0,0 +1,162 @@
+"""
+Deterministic local scoring of a job's applicants, without the LLM.
+
+Three signals, each 0-100:
+    skills       confidence-weighted share of the job's required skills the
+                 applicant has (ApplicantSkill vs. Job.requirements)
+    similarity   cosine similarity of the resume vector to the job text,
+                 rescaled from ATS_SCORING['SIMILARITY_RANGE']
+    experience   years of experience found in the applicant's summary,
+                 relative to the years the job asks for
+
+The local score is their weighted mean (ATS_SCORING['WEIGHTS']); a signal
+that is unavailable for an applicant (no vector, no years found) is left
+out and the remaining weights are renormalized. All applicants of a job are
+scored at once with NumPy, so a re-rank after editing the job or the
+weights costs a few queries instead of one ranking request per applicant.
+"""
+import re
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from .models import Applicant, ApplicantSkill, Evaluation, Skill
+from .skills import normalize_skill
+
+SIGNALS = ("skills", "similarity", "experience")
+YEARS_RE = re.compile(r"(\d{1,2}(?:\.\d)?)\s*\+?\s*(?:years?|yrs?)\b", re.IGNORECASE)
+REQUIREMENT_SPLIT_RE = re.compile(r"[,;\n•]|^\s*[-*]\s*", re.MULTILINE)
+WORD_RE = re.compile(r"[a-z0-9][a-z0-9+#.]*[a-z0-9+#]|[a-z0-9]")
+
+def experience_years(text):
+    """Largest "N years"/"N+ yrs" mentioned in the text, or None."""
+    years = [float(match) for match in YEARS_RE.findall(text or "")]
+    return max(years) if years else None
+
+def required_years(job):
+    return experience_years(f"{job.requirements or ''}\n{job.description}") or settings.ATS_SCORING['EXPERIENCE_YEARS']
+
+def job_skill_ids(job):
+    """
+    {skill_id: name} of the skills the job asks for: the comma/line separated
+    entries of Job.requirements that are known skills. Without requirements,
+    known skills named in the description (phrases of up to three words).
+    """
+    if job.requirements:
+        names = {normalize_skill(part) for part in REQUIREMENT_SPLIT_RE.split(job.requirements)}
+        names = {name for name in names if name and not YEARS_RE.search(name)}
+    else:
+        words = WORD_RE.findall(job.description.lower())
+        names = {" ".join(words[i:i + n]) for n in (1, 2, 3) for i in range(len(words) - n + 1)}
+    return dict(Skill.objects.filter(name__in=names).values_list('pk', 'name'))
+
+def _weights(weights):
+    weights = {**settings.ATS_SCORING['WEIGHTS'], **(weights or {})}
+    return np.array([max(float(weights.get(signal, 0.0)), 0.0) for signal in SIGNALS], dtype=np.float64)
+
+def _skill_scores(job, applicant_ids):
+    required = job_skill_ids(job)
+    if not required:
+        return np.full(len(applicant_ids), np.nan)
+    rows = np.array(list(ApplicantSkill.objects.filter(applicant__job=job, skill_id__in=list(required),
+                                                       applicant_id__in=applicant_ids.tolist())
+                         .values_list('applicant_id', 'confidence')), dtype=np.float64).reshape(-1, 2)
+    # applicant_ids is sorted: sum each applicant's matched confidences by position
+    row_ids = rows[:, 0].astype(np.int64)
+    positions = np.searchsorted(applicant_ids, row_ids)
+    matched = positions < len(applicant_ids)
+    matched[matched] = applicant_ids[positions[matched]] == row_ids[matched]
+    totals = np.bincount(positions[matched], weights=np.clip(rows[matched, 1], 0.0, 1.0), minlength=len(applicant_ids))
+    return 100.0 * totals / len(required)
+
+def _similarity_scores(job, applicant_ids, vdb):
+    if vdb is None:
+        from .vector_db import get_vector_db
+        vdb = get_vector_db()
+    embedding = vdb.job_embedding(job)
+    if not len(embedding):
+        return np.full(len(applicant_ids), np.nan)
+    similarity = vdb.similarities([str(pk) for pk in applicant_ids], embedding).astype(np.float64)
+    low, high = settings.ATS_SCORING['SIMILARITY_RANGE']
+    return 100.0 * np.clip((similarity - low) / (high - low), 0.0, 1.0)
+
+def _experience_scores(job, summaries):
+    years = np.array([np.nan if y is None else y for y in map(experience_years, summaries)], dtype=np.float64)
+    return 100.0 * np.minimum(years / required_years(job), 1.0)
+
+def combine(signals, weights=None):
+    """
+    Weighted mean over the available signals. `signals` is an (n, 3) array in
+    SIGNALS order with NaN for missing values; rows with nothing are NaN.
+    """
+    weights = _weights(weights)
+    available = ~np.isnan(signals)
+    total_weight = available @ weights
+    weighted = np.where(available, signals, 0.0) @ weights
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(total_weight > 0, weighted / total_weight, np.nan)
+
+def score_applicants(job, applicant_ids=None, weights=None, vdb=None, save=True):
+    """
+    Score the job's applicants (or the given subset) locally. `weights`
+    overrides ATS_SCORING['WEIGHTS'] per signal. With `save`, the scores are
+    written to each applicant's Evaluation (created without LLM scores if
+    missing). Returns [{'applicant_id', 'score', 'skills', 'similarity',
+    'experience'}] best first; unavailable values are None.
+    """
+    applicants = Applicant.objects.filter(job=job)
+    if applicant_ids is not None:
+        applicants = applicants.filter(pk__in=list(applicant_ids))
+    rows = list(applicants.order_by('pk').values_list('pk', 'experience_summary'))
+    if not rows:
+        return []
+    ids = np.array([pk for pk, _ in rows], dtype=np.int64)
+
+    signals = np.column_stack([
+        _skill_scores(job, ids),
+        _similarity_scores(job, ids, vdb),
+        _experience_scores(job, [summary for _, summary in rows]),
+    ])
+    scores = combine(signals, weights)
+
+    order = np.lexsort((ids, -np.nan_to_num(scores, nan=-1.0)))
+    results = [
+        {
+            'applicant_id': int(ids[i]),
+            'score': _rounded(scores[i]),
+            **{signal: _rounded(value) for signal, value in zip(SIGNALS, signals[i])},
+        }
+        for i in order
+    ]
+    if save:
+        save_scores(results)
+    return results
+
+def _rounded(value):
+    return None if np.isnan(value) else round(float(value), 1)
+
+LOCAL_FIELDS = {
+    'local_score': 'score',
+    'local_skill_score': 'skills',
+    'local_similarity_score': 'similarity',
+    'local_experience_score': 'experience',
+}
+
+def save_scores(results):
+    """Write score_applicants results to Evaluation rows in bulk."""
+    now = timezone.now()
+    with transaction.atomic():
+        existing = Evaluation.objects.in_bulk([r['applicant_id'] for r in results], field_name='applicant_id')
+        new = []
+        for result in results:
+            values = {field: result[key] for field, key in LOCAL_FIELDS.items()}
+            evaluation = existing.get(result['applicant_id'])
+            if evaluation is None:
+                new.append(Evaluation(applicant_id=result['applicant_id'], total_score=None, skill_score=None,
+                                      experience_score=None, local_scored_at=now, **values))
+                continue
+            for field, value in values.items():
+                setattr(evaluation, field, value)
+            evaluation.local_scored_at = now
+        Evaluation.objects.bulk_create(new)
+        Evaluation.objects.bulk_update(list(existing.values()), [*LOCAL_FIELDS, 'local_scored_at'], batch_size=500)
@@ -0,0 +1,174 @@
+"""
+In-memory inverted index over ApplicantSkill for skill-set searches.
+
+Each skill id maps to a posting: a sorted int64 array of applicant ids and
+an aligned float32 array of confidences. Queries intersect (must) and merge
+(should) postings with NumPy instead of joining ApplicantSkill once per
+skill in SQL.
+
+The process-wide index (get_skill_index) is updated after skill writes in
+this process commit (see ats/skills.py) and rebuilt from the database once
+it is older than ATS_SKILL_INDEX['MAX_AGE'] seconds, which picks up writes
+made by other processes such as queue workers.
+"""
+import threading
+import time
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from .models import ApplicantSkill, Skill
+
+EMPTY_IDS = np.empty(0, dtype=np.int64)
+EMPTY_CONF = np.empty(0, dtype=np.float32)
+
+def _postings(rows):
+    """
+    (skill_id, applicant_id, confidence) rows sorted by skill then applicant
+    -> {skill_id: (applicant_ids, confidences)}.
+    """
+    if not rows:
+        return {}
+    data = np.array(rows, dtype=np.float64)
+    skill_ids = data[:, 0].astype(np.int64)
+    applicant_ids = data[:, 1].astype(np.int64)
+    confidences = data[:, 2].astype(np.float32)
+    starts = np.flatnonzero(np.r_[True, skill_ids[1:] != skill_ids[:-1]])
+    ends = np.r_[starts[1:], len(skill_ids)]
+    return {
+        int(skill_ids[start]): (applicant_ids[start:end].copy(), confidences[start:end].copy())
+        for start, end in zip(starts, ends)
+    }
+
+class SkillIndex:
+    def __init__(self):
+        self._postings = {}
+        self._skill_ids = {}
+        self.built_at = None
+        self._lock = threading.Lock()
+
+    def build(self):
+        rows = list(ApplicantSkill.objects.order_by('skill_id', 'applicant_id')
+                    .values_list('skill_id', 'applicant_id', 'confidence'))
+        postings = _postings(rows)
+        skill_ids = dict(Skill.objects.values_list('name', 'pk'))
+        with self._lock:
+            self._postings = postings
+            self._skill_ids = skill_ids
+            self.built_at = time.monotonic()
+        return self
+
+    def is_stale(self, max_age):
+        return self.built_at is None or time.monotonic() - self.built_at > max_age
+
+    def refresh_applicants(self, applicant_ids):
+        """Re-read the skills of these applicants (after they were written or deleted)."""
+        applicant_ids = np.unique(np.asarray(list(applicant_ids), dtype=np.int64))
+        if not len(applicant_ids):
+            return
+        rows = list(ApplicantSkill.objects.filter(applicant_id__in=applicant_ids.tolist())
+                    .order_by('skill_id', 'applicant_id').values_list('skill_id', 'applicant_id', 'confidence'))
+        fresh = _postings(rows)
+        names = dict(Skill.objects.filter(pk__in=list(fresh)).values_list('name', 'pk'))
+        with self._lock:
+            postings = dict(self._postings)
+            for skill_id in set(postings) | set(fresh):
+                ids, confidences = postings.get(skill_id, (EMPTY_IDS, EMPTY_CONF))
+                keep = ~np.isin(ids, applicant_ids, assume_unique=True)
+                new_ids, new_confidences = fresh.get(skill_id, (EMPTY_IDS, EMPTY_CONF))
+                if keep.all() and not len(new_ids):
+                    continue
+                ids = np.concatenate([ids[keep], new_ids])
+                confidences = np.concatenate([confidences[keep], new_confidences])
+                order = np.argsort(ids, kind='stable')
+                if len(ids):
+                    postings[skill_id] = (ids[order], confidences[order])
+                else:
+                    postings.pop(skill_id, None)
+            # Arrays are replaced, never mutated, so running searches keep a consistent view
+            self._postings = postings
+            self._skill_ids = {**self._skill_ids, **names}
+
+    def skill_id(self, name):
+        with self._lock:
+            return self._skill_ids.get(name)
+
+    def posting(self, skill_id):
+        with self._lock:
+            return self._postings.get(skill_id, (EMPTY_IDS, EMPTY_CONF))
+
+    def search(self, must=(), should=(), weights=None, limit=50):
+        """
+        Applicants having every skill in `must`; if `must` is empty, any
+        skill in `should`. Ranked by number of matched query skills, then by
+        the sum of weight * confidence over them. `weights` maps skill name
+        to weight (default 1). Names are normalized skill names.
+        Returns [(applicant_id, matched, score)].
+        """
+        weights = weights or {}
+        must = list(dict.fromkeys(must))
+        should = [name for name in dict.fromkeys(should) if name not in must]
+        must_postings = [self.posting(self.skill_id(name)) for name in must]
+        should_postings = [self.posting(self.skill_id(name)) for name in should]
+
+        if must:
+            # Intersect smallest first: every step can only shrink the candidate set
+            candidates = None
+            for ids, _ in sorted(must_postings, key=lambda posting: len(posting[0])):
+                candidates = ids if candidates is None else np.intersect1d(candidates, ids, assume_unique=True)
+                if not len(candidates):
+                    return []
+        else:
+            if not should:
+                return []
+            candidates = np.unique(np.concatenate([ids for ids, _ in should_postings]))
+
+        matched = np.zeros(len(candidates), dtype=np.int32)
+        score = np.zeros(len(candidates), dtype=np.float64)
+        for name, (ids, confidences) in zip(must + should, must_postings + should_postings):
+            if not len(ids):
+                continue
+            # Positions of the posting's applicants within the (sorted) candidates
+            positions = np.searchsorted(candidates, ids)
+            positions[positions == len(candidates)] = 0
+            hit = candidates[positions] == ids
+            matched[positions[hit]] += 1
+            score[positions[hit]] += weights.get(name, 1.0) * confidences[hit]
+
+        order = np.lexsort((candidates, -score, -matched))[:limit]
+        return [(int(candidates[i]), int(matched[i]), float(score[i])) for i in order]
+
+    def stats(self):
+        with self._lock:
+            postings = list(self._postings.values())
+        return {
+            "skills": len(postings),
+            "postings": sum(len(ids) for ids, _ in postings),
+            "bytes": sum(ids.nbytes + confidences.nbytes for ids, confidences in postings),
+        }
+
+_skill_index = None
+_skill_index_lock = threading.Lock()
+
+def get_skill_index():
+    """
+    Process-wide SkillIndex, rebuilt once older than ATS_SKILL_INDEX['MAX_AGE'].
+    """
+    global _skill_index
+    with _skill_index_lock:
+        if _skill_index is None:
+            _skill_index = SkillIndex()
+        index = _skill_index
+        if index.is_stale(settings.ATS_SKILL_INDEX['MAX_AGE']):
+            index.build()
+    return index
+
+def applicants_changed(applicant_ids):
+    """Update the live index, if one was built in this process, after a commit."""
+    index = _skill_index
+    if index is not None and index.built_at is not None:
+        applicant_ids = list(applicant_ids)
+        transaction.on_commit(lambda: index.refresh_applicants(applicant_ids))
+
+def forget_deleted_applicant(sender, instance, **kwargs):
+    # post_delete receiver for Applicant, connected in AtsConfig.ready()
+    applicants_changed([instance.pk])
@@ -0,0 +1,88 @@
+import threading
+from django.db import transaction
+from .models import ApplicantSkill, Skill
+from .skill_index import applicants_changed
+
+def normalize_skill(name):
+    # "  Machine   Learning " and "machine learning" are the same Skill row
+    return " ".join(str(name).split()).lower()
+
+class SkillIdCache:
+    """
+    Process-wide Skill name -> id map. Ids are only cached once the
+    transaction that read or created them has committed, so a rollback
+    can't leave ids of rows that don't exist.
+    """
+    def __init__(self):
+        self._ids = {}
+        self._lock = threading.Lock()
+
+    def get_many(self, names):
+        with self._lock:
+            return {name: self._ids[name] for name in names if name in self._ids}
+
+    def add(self, ids):
+        with self._lock:
+            self._ids.update(ids)
+
+    def discard(self, name):
+        with self._lock:
+            self._ids.pop(name, None)
+
+    def clear(self):
+        with self._lock:
+            self._ids.clear()
+
+skill_ids = SkillIdCache()
+
+def forget_deleted_skill(sender, instance, **kwargs):
+    # post_delete receiver for Skill, connected in AtsConfig.ready()
+    transaction.on_commit(lambda: skill_ids.discard(instance.name))
+
+def resolve_skill_ids(names):
+    """
+    Ids for the given (normalized) skill names, inserting the missing Skill
+    rows with one bulk_create. Concurrent inserts of the same name are
+    absorbed by ignore_conflicts and the re-read.
+    """
+    names = set(names)
+    ids = skill_ids.get_many(names)
+    missing = names - ids.keys()
+    if missing:
+        with transaction.atomic():
+            found = dict(Skill.objects.filter(name__in=missing).values_list('name', 'pk'))
+            new = missing - found.keys()
+            if new:
+                Skill.objects.bulk_create([Skill(name=name) for name in new], ignore_conflicts=True)
+                found.update(Skill.objects.filter(name__in=new).values_list('name', 'pk'))
+            transaction.on_commit(lambda: skill_ids.add(found))
+        ids.update(found)
+    return ids
+
+def save_skills_bulk(rows, replace=()):
+    """
+    Write ApplicantSkill rows for (applicant, skill_name, confidence) tuples
+    in one transaction. Names are normalized and duplicates per applicant
+    collapsed (first confidence wins). Skills of the applicants in `replace`
+    are deleted first, so re-processing an applicant doesn't hit the
+    (applicant, skill) unique constraint.
+    """
+    unique = {}
+    for applicant, name, confidence in rows:
+        name = normalize_skill(name)
+        if name:
+            unique.setdefault((applicant.pk, name), (applicant, confidence))
+
+    with transaction.atomic():
+        if replace:
+            ApplicantSkill.objects.filter(applicant__in=list(replace)).delete()
+        ids = resolve_skill_ids(name for _, name in unique)
+        ApplicantSkill.objects.bulk_create([
+            ApplicantSkill(applicant=applicant, skill_id=ids[name], confidence=confidence)
+            for (_, name), (applicant, confidence) in unique.items()
+        ], ignore_conflicts=True)
+        applicants_changed({applicant.pk for applicant in replace} | {pk for pk, _ in unique})
+
+def save_applicant_skills(applicant, names, confidence=0.0):
+    """Replace an applicant's skills with `names`."""
+    save_skills_bulk([(applicant, name, confidence) for name in names], replace=[applicant])
@@ -0,0 +1,163 @@
+import os
+import socket
+import threading
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Count, F
+from django.utils import timezone
+from .models import ProcessingJob
+
+def enqueue_applicant(applicant):
+    """
+    Queue a saved Applicant for background processing.
+    """
+    return ProcessingJob.objects.create(
+        applicant=applicant,
+        max_attempts=settings.ATS_PROCESSING['MAX_ATTEMPTS'],
+    )
+
+def enqueue_job(job):
+    """
+    Queue embedding and matching of a saved Job, unless that is already
+    waiting (the worker reads the job's latest text when it runs).
+    """
+    if ProcessingJob.objects.filter(job=job, status=ProcessingJob.PENDING).exists():
+        return None
+    return ProcessingJob.objects.create(
+        job=job,
+        max_attempts=settings.ATS_PROCESSING['MAX_ATTEMPTS'],
+    )
+
+def claim_next(worker_id):
+    """
+    Atomically move the oldest runnable pending job to processing.
+
+    The conditional UPDATE only succeeds for one worker per job, so a job is
+    never handed out twice; losers of the race simply try the next one.
+    """
+    while True:
+        now = timezone.now()
+        candidate = (
+            ProcessingJob.objects
+            .filter(status=ProcessingJob.PENDING, run_after__lte=now)
+            .order_by('run_after', 'pk')
+            .values_list('pk', flat=True)
+            .first()
+        )
+        if candidate is None:
+            return None
+        claimed = ProcessingJob.objects.filter(pk=candidate, status=ProcessingJob.PENDING).update(
+            status=ProcessingJob.PROCESSING,
+            locked_by=worker_id,
+            locked_at=now,
+            attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return ProcessingJob.objects.select_related('applicant', 'applicant__job', 'job').get(pk=candidate)
+
+def complete(job, worker_id):
+    ProcessingJob.objects.filter(pk=job.pk, status=ProcessingJob.PROCESSING, locked_by=worker_id).update(
+        status=ProcessingJob.DONE, locked_by=None, locked_at=None, last_error=None,
+    )
+
+def fail(job, worker_id, error):
+    """
+    Retry with exponential backoff until max_attempts, then mark failed.
+    """
+    if job.attempts < job.max_attempts:
+        delay = settings.ATS_PROCESSING['RETRY_DELAY'] * (2 ** (job.attempts - 1))
+        status, run_after = ProcessingJob.PENDING, timezone.now() + timedelta(seconds=delay)
+    else:
+        status, run_after = ProcessingJob.FAILED, job.run_after
+    ProcessingJob.objects.filter(pk=job.pk, status=ProcessingJob.PROCESSING, locked_by=worker_id).update(
+        status=status, run_after=run_after, locked_by=None, locked_at=None, last_error=str(error)[:2000],
+    )
+
+def requeue_stale(lock_timeout=None):
+    """
+    Hand jobs whose worker died mid-run back to the queue. The timeout must
+    exceed the longest legitimate processing time.
+    """
+    lock_timeout = lock_timeout or settings.ATS_PROCESSING['LOCK_TIMEOUT']
+    cutoff = timezone.now() - timedelta(seconds=lock_timeout)
+    stale = ProcessingJob.objects.filter(status=ProcessingJob.PROCESSING, locked_at__lt=cutoff)
+    exhausted = stale.filter(attempts__gte=F('max_attempts')).update(
+        status=ProcessingJob.FAILED, locked_by=None, locked_at=None, last_error="Worker lock expired",
+    )
+    return exhausted + stale.update(status=ProcessingJob.PENDING, locked_by=None, locked_at=None)
+
+def queue_counts():
+    counts = dict.fromkeys((ProcessingJob.PENDING, ProcessingJob.PROCESSING, ProcessingJob.DONE, ProcessingJob.FAILED), 0)
+    for row in ProcessingJob.objects.values('status').annotate(n=Count('pk')):
+        counts[row['status']] = row['n']
+    return counts
+
+def run_job(job, worker_id):
+    from .matching import refresh_job
+    from .pipeline import process_applicant
+    try:
+        if job.job_id is not None:
+            refresh_job(job.job)
+        else:
+            process_applicant(job.applicant)
+    except Exception as e:
+        subject = f"job {job.job_id}" if job.job_id is not None else f"resume for applicant {job.applicant_id}"
+        print(f"Error processing {subject} (attempt {job.attempts}/{job.max_attempts}): {e}")
+        fail(job, worker_id, e)
+        return False
+    complete(job, worker_id)
+    return True
+
+def worker_loop(worker_id, stop_event, poll_interval=None, once=False):
+    """
+    Claim and run jobs until `stop_event` is set (or the queue is empty, with `once`).
+    Every REQUEUE_INTERVAL seconds, jobs of crashed workers are re-queued first.
+    Returns the number of jobs handled.
+    """
+    poll_interval = poll_interval or settings.ATS_PROCESSING['POLL_INTERVAL']
+    requeue_interval = settings.ATS_PROCESSING['REQUEUE_INTERVAL']
+    handled = 0
+    next_requeue = time.monotonic()
+    while not stop_event.is_set():
+        close_old_connections()
+        if time.monotonic() >= next_requeue:
+            requeue_stale()
+            next_requeue = time.monotonic() + requeue_interval
+        job = claim_next(worker_id)
+        if job is None:
+            if once:
+                break
+            stop_event.wait(poll_interval)
+            continue
+        run_job(job, worker_id)
+        handled += 1
+    close_old_connections()
+    return handled
+
+def make_worker_id(index):
+    return f"{socket.gethostname()}:{os.getpid()}:{index}"
+
+def run_workers(workers, stop_event=None, poll_interval=None, once=False):
+    """
+    Run `workers` worker threads in this process and wait for them.
+    """
+    stop_event = stop_event or threading.Event()
+    handled = [0] * workers
+
+    def target(index):
+        handled[index] = worker_loop(make_worker_id(index), stop_event, poll_interval, once)
+
+    threads = [threading.Thread(target=target, args=(i,), name=f"ats-worker-{i}", daemon=True) for i in range(workers)]
+    for thread in threads:
+        thread.start()
+    try:
+        while any(thread.is_alive() for thread in threads):
+            for thread in threads:
+                thread.join(timeout=0.5)
+    except KeyboardInterrupt:
+        stop_event.set()
+        for thread in threads:
+            thread.join()
+    return sum(handled)
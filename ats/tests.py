@@ -1,6 +1,37 @@
-from django.test import TestCase, Client
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, TransactionTestCase, Client, override_settings
 from django.urls import reverse
-from .models import Job
+from django.utils import timezone
+from unittest import mock
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from .models import (Applicant, ApplicantSkill, Evaluation, Job, JobMatch, ProcessingJob, ResumeDocument, Skill,
+                     StoredVector, VectorCollection)
+from .db_store import DatabaseStore
+from .vector_db import VectorDB, get_vector_db
+from .vector_store import SegmentStore, normalize_rows
+from .lexical import BM25Index, reciprocal_rank_fusion, tokenize
+from .caching import EmbeddingCache, ResponseCache
+from .embeddings import EmbeddingBackend, GeminiBackend, LocalHashingBackend
+from .agents import Orchestrator, ParsingAgent, RankingAgent, get_orchestrator
+from .lazy import LazyImport
+from . import compaction, embeddings, extraction, matching, scoring, skill_index, skills, tasks
+from .ratelimit import RateLimiter, RateLimitError, is_rate_limit_error, is_transient_error
+from .pipeline import attach_document, process_applicant, ranking_counts, ranking_key
 
 class CareerPageTest(TestCase):
     def setUp(self):
@@ -15,3 +46,1427 @@ class CareerPageTest(TestCase):
         response = self.client.get('/')
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, "Test Job")
+
+class VectorDBTest(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.vdb = VectorDB(path=self.tmp.name, embedding_cache=False)
+        embeddings = {
+            "python": [1.0, 0.0, 0.0],
+            "django": [0.9, 0.1, 0.0],
+            "design": [0.0, 0.0, 2.0],
+        }
+        with mock.patch.object(VectorDB, '_get_embedding', side_effect=lambda text: embeddings[text]):
+            self.vdb.add_applicant(1, "python", metadata={"job": "Backend"})
+            self.vdb.add_applicant(2, "django", metadata={"job": "Backend"})
+            self.vdb.add_applicant(3, "design", metadata={"job": "Design"})
+
+    def test_query_ranks_by_cosine_similarity(self):
+        """Test that results come back best-first with normalized scores"""
+        with mock.patch.object(VectorDB, '_get_embedding', return_value=[2.0, 0.0, 0.0]):
+            results = self.vdb.query_similar_applicants("python", n_results=2)
+        self.assertEqual([r['id'] for r in results], ["1", "2"])
+        self.assertAlmostEqual(results[0]['score'], 1.0, places=5)
+
+    def test_query_filters_by_metadata(self):
+        """Test that a metadata filter restricts the candidate set"""
+        with mock.patch.object(VectorDB, '_get_embedding', return_value=[1.0, 0.0, 0.0]):
+            results = self.vdb.query_similar_applicants("python", where={"job": "Design"})
+        self.assertEqual([r['id'] for r in results], ["3"])
+
+    def test_delete_removes_from_results(self):
+        self.vdb.delete_applicant(1)
+        reloaded = VectorDB(path=self.vdb.path, embedding_cache=False)
+        with mock.patch.object(VectorDB, '_get_embedding', return_value=[1.0, 0.0, 0.0]):
+            results = reloaded.query_similar_applicants("python")
+        self.assertEqual([r['id'] for r in results], ["2", "3"])
+
+class SegmentStoreTest(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_appends_are_memory_mapped_and_compacted(self):
+        """Test that appends add segments without rewriting and reload via mmap"""
+        store = SegmentStore(self.tmp.name)
+        for i in range(8):
+            store.append([i], [[float(i + 1), 1.0]], [{"n": i}], [f"text {i}"])
+        self.assertEqual(len(store), 8)
+        # Geometric merging keeps the segment count logarithmic
+        self.assertLessEqual(len(store.segments), 4)
+
+        reloaded = SegmentStore(self.tmp.name)
+        self.assertEqual(len(reloaded), 8)
+        self.assertIsInstance(reloaded.segments[0].matrix, np.memmap)
+        self.assertEqual(reloaded.get(3)["metadata"], {"n": 3})
+
+    def test_replace_and_delete_use_tombstones(self):
+        store = SegmentStore(self.tmp.name)
+        store.append([1, 2], [[1.0, 0.0], [0.0, 1.0]])
+        store.append([1], [[0.0, 1.0]], [{"v": 2}])
+        store.delete([2])
+
+        reloaded = SegmentStore(self.tmp.name)
+        self.assertEqual(len(reloaded), 1)
+        self.assertEqual(reloaded.get(1)["metadata"], {"v": 2})
+        self.assertIsNone(reloaded.get(2))
+        self.assertEqual(int(reloaded.alive.sum()), 1)
+
+    def test_int8_codes_approximate_scores(self):
+        """Test that segments carry int8 codes, created on first use for older segments"""
+        rng = np.random.default_rng(0)
+        vectors = rng.standard_normal((50, 16)).astype(np.float32)
+        store = SegmentStore(self.tmp.name)
+        store.append(range(50), vectors)
+        name = store.segments[0].name
+        self.assertEqual(store.segments[0].codes.dtype, np.int8)
+
+        for ext in ('.i8.npy', '.scale.npy'):
+            os.remove(os.path.join(self.tmp.name, name + ext))
+        reloaded = SegmentStore(self.tmp.name)
+        self.assertIsNone(reloaded.segments[0].codes)
+        query = normalize_rows(vectors[3])
+        np.testing.assert_allclose(reloaded.dot_quantized(query), reloaded.dot(query), atol=0.02)
+        self.assertTrue(os.path.exists(os.path.join(self.tmp.name, name + '.i8.npy')))
+        np.testing.assert_allclose(reloaded.dot_rows([7, 3], query), reloaded.dot(query)[[7, 3]], rtol=1e-6)
+
+        # Concurrent first searches, in this process and another store, write the codes once and completely
+        for ext in ('.i8.npy', '.scale.npy'):
+            os.remove(os.path.join(self.tmp.name, name + ext))
+        stores = [SegmentStore(self.tmp.name) for _ in range(2)]
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda i: stores[i % 2].dot_quantized(query), range(8)))
+        for result in results:
+            np.testing.assert_array_equal(result, results[0])
+        self.assertFalse([f for f in os.listdir(self.tmp.name) if f.endswith('.tmp')])
+        # A segment compacted away meanwhile is quantized in memory only
+        for ext in ('.i8.npy', '.scale.npy'):
+            os.remove(os.path.join(self.tmp.name, name + ext))
+        stale = SegmentStore(self.tmp.name)
+        store.append(["extra"], vectors[:1])
+        store.compact()
+        np.testing.assert_array_equal(stale.dot_quantized(query), results[0])
+        self.assertFalse(os.path.exists(os.path.join(self.tmp.name, name + '.i8.npy')))
+
+    def test_converts_legacy_json(self):
+        legacy = os.path.join(self.tmp.name, 'vectors.json')
+        with open(legacy, 'w') as f:
+            json.dump({
+                "1": {"embedding": [3.0, 4.0], "metadata": {"job": "A"}, "text": "a"},
+                "2": {"embedding": [], "metadata": {}, "text": "b"},
+            }, f)
+        store, converted, skipped = SegmentStore.from_json(legacy, os.path.join(self.tmp.name, 'store'))
+        self.assertEqual((converted, skipped), (1, 1))
+        self.assertAlmostEqual(float(store.get(1)["embedding"][0]), 0.6, places=5)
+
+    def test_refresh_picks_up_other_writers(self):
+        """Test that a long-lived store sees another writer's rows and keeps its open segments"""
+        reader = SegmentStore(self.tmp.name)
+        writer = SegmentStore(self.tmp.name)
+        writer.append([1, 2], [[1.0, 0.0], [0.0, 1.0]])
+        self.assertTrue(reader.refresh())
+        self.assertFalse(reader.refresh())
+        first = reader.segments[0]
+        writer.delete([1])
+        self.assertTrue(reader.refresh())
+        self.assertEqual((len(reader), 1 in reader, 2 in reader), (1, False, True))
+        self.assertIn(first, reader.segments)
+
+        # Writes start from the latest manifest instead of overwriting it
+        reader.append([3], [[1.0, 1.0]])
+        reloaded = SegmentStore(self.tmp.name)
+        self.assertEqual((len(reloaded), 2 in reloaded, 3 in reloaded), (2, True, True))
+
+class DatabaseStoreTest(TransactionTestCase):
+    def test_writes_are_shared_through_the_version(self):
+        """Test that a second process-like copy sees writes after one cheap refresh"""
+        writer = DatabaseStore("vectors")
+        reader = DatabaseStore("vectors")
+        writer.append([1, 2], [[3.0, 4.0], [0.0, 1.0]], [{"job": "A"}, {"job": "B"}], ["a", "b"], backend="test")
+        self.assertFalse(writer.refresh())  # Its own write was applied in place
+        self.assertEqual(len(reader), 0)
+        self.assertTrue(reader.refresh())
+        self.assertAlmostEqual(float(reader.get(1)["embedding"][0]), 0.6, places=5)
+
+        writer.append([1], [[0.0, 2.0]], [{"job": "C"}], backend="test")
+        self.assertEqual(writer.delete([2, 9]), 1)
+        self.assertEqual(writer.delete([9]), 0)
+        self.assertTrue(reader.refresh())
+        self.assertEqual((len(reader), reader.get(1)["metadata"], 2 in reader), (1, {"job": "C"}, False))
+        with self.assertNumQueries(1):
+            self.assertFalse(reader.refresh())
+        np.testing.assert_allclose(reader.dot([0.0, 1.0])[reader.alive], [1.0])
+
+        with self.assertRaises(ValueError):
+            writer.append([3], [[1.0, 0.0]], backend="other")
+        self.assertEqual(StoredVector.objects.count(), 1)
+        self.assertEqual(VectorCollection.objects.get(name="vectors").version, 3)
+
+    def test_vector_db_on_the_database(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        ivf = {'TYPE': 'ivf', 'NLIST': 2, 'NPROBE': 2, 'MIN_TRAIN_SIZE': 2, 'RETRAIN_FACTOR': 4}
+        vdb = VectorDB(path=tmp.name, index=ivf, embedding_cache=False, store='database')
+        embeddings = {"python": [1.0, 0.0, 0.0], "django": [0.9, 0.1, 0.0], "design": [0.0, 0.0, 2.0]}
+        with mock.patch.object(VectorDB, '_get_embedding', side_effect=lambda text: embeddings[text]):
+            for pk, text in enumerate(embeddings, start=1):
+                vdb.add_applicant(pk, text, metadata={"job": "Design" if text == "design" else "Backend"})
+        self.assertEqual(vdb.store.name, "ats.applicants")
+        # Collections are found by name, wherever the process keeps its files
+        other = VectorDB(path=os.path.join(tmp.name, 'elsewhere'), embedding_cache=False, store='database')
+        results = other.search_by_vector([1.0, 0.0, 0.0], n_results=2, where={"job": "Backend"})
+        self.assertEqual([r['id'] for r in results], ["1", "2"])
+        self.assertEqual(len(VectorDB(path=tmp.name, embedding_cache=False, store='database', collection='staging').store), 0)
+        # The IVF index is trained in memory; only the keyword index is on disk
+        self.assertEqual(len(vdb.search_by_vector([1.0, 0.0, 0.0], n_results=3)), 3)
+        self.assertTrue(vdb.ann.is_trained)
+        self.assertEqual(os.listdir(tmp.name), ['lexical'])
+
+    def test_concurrent_writers_lose_nothing(self):
+        """Test that processes appending and deleting at once keep every committed write"""
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        path = os.path.join(tmp.name, 'db.sqlite3')
+        setup = ("import os, sys, django; os.environ['DJANGO_SETTINGS_MODULE'] = 'config.settings'; "
+                 "from django.conf import settings; settings.DATABASES['default']['NAME'] = sys.argv[1]; "
+                 "django.setup(); ")
+        subprocess.run([sys.executable, '-c', setup + "from django.core.management import call_command; "
+                        "call_command('migrate', verbosity=0)", path], cwd=settings.BASE_DIR, check=True)
+        writer = setup + (
+            "from ats.db_store import DatabaseStore\n"
+            "store, worker = DatabaseStore('stress'), sys.argv[2]\n"
+            "for batch in range(20):\n"
+            "    ids = [f'{worker}-{batch}-{i}' for i in range(5)]\n"
+            "    store.append(ids, [[float(batch + 1), float(i)] for i in range(5)])\n"
+            "    if batch % 4 == 3:\n"
+            "        store.delete(ids[:1])\n"
+            "    assert all((vid in store) == (batch % 4 != 3 or vid != ids[0]) for vid in ids)\n"
+        )
+        workers = [subprocess.Popen([sys.executable, '-c', writer, path, str(n)], cwd=settings.BASE_DIR,
+                                    stderr=subprocess.PIPE, text=True) for n in range(4)]
+        for worker in workers:
+            _, errors = worker.communicate(timeout=120)
+            self.assertEqual(worker.returncode, 0, errors)
+
+        import sqlite3
+        with sqlite3.connect(path) as db:
+            rows = db.execute("SELECT COUNT(*) FROM ats_storedvector").fetchone()[0]
+            version = db.execute("SELECT version FROM ats_vectorcollection WHERE name = 'stress'").fetchone()[0]
+        self.assertEqual(rows, 4 * (20 * 5 - 5))
+        self.assertEqual(version, 4 * (20 + 5))
+
+class QuantizedSearchTest(TestCase):
+    def test_rescored_results_match_exact_search(self):
+        """Test that the int8 scan plus float32 re-scoring returns the exact top results and scores"""
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        config = {'TYPE': 'exact', 'QUANTIZE': 'int8', 'RESCORE': 20}
+        vdb = VectorDB(path=tmp.name, index=config, embedding_cache=False)
+        rng = np.random.default_rng(2)
+        corpus = rng.standard_normal((500, 32)).astype(np.float32)
+        vdb.store.append(range(500), corpus, [{"job": "A" if i % 3 else "B"} for i in range(500)])
+
+        for query, where in [(corpus[11], None), (corpus[40] + corpus[41], {"job": "B"})]:
+            with mock.patch.object(vdb.store, 'dot', side_effect=AssertionError("float32 scan")):
+                quantized = vdb.search_by_vector(query, n_results=5, where=where)
+            exact = vdb.search_by_vector(query, n_results=5, where=where, exact=True)
+            self.assertEqual([r['id'] for r in quantized], [r['id'] for r in exact])
+            self.assertAlmostEqual(quantized[0]['score'], exact[0]['score'], places=5)
+
+    def test_search_while_other_threads_append_and_reload(self):
+        """Test that a shared VectorDB's searches see one consistent store while it is appended to and reloaded"""
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        config = {'TYPE': 'exact', 'QUANTIZE': 'int8', 'RESCORE': 20}
+        vdb = VectorDB(path=tmp.name, index=config, embedding_cache=False)
+        other = VectorDB(path=tmp.name, index=config, embedding_cache=False)  # Another process's writes
+        rng = np.random.default_rng(3)
+        corpus = rng.standard_normal((400, 32)).astype(np.float32)
+        vdb.store.append(range(100), corpus[:100])
+        done = threading.Event()
+        errors = []
+
+        def append():
+            try:
+                for i in range(100, 400):
+                    # Every other write comes from "another process", so searches run into reloads too
+                    db = vdb if i % 2 else other
+                    db.add_applicant(i, f"applicant {i}", {"job": "A"}, embedding=corpus[i])
+            except Exception as e:
+                errors.append(e)
+
+        def search():
+            while not done.is_set():
+                try:
+                    vdb.refresh()
+                    vdb.search_by_vector(corpus[7], n_results=5, where={"job": "A"})
+                    vdb.search_by_vector(corpus[7], n_results=5)
+                    vdb.similarities([str(i) for i in range(0, 400, 7)], corpus[7])
+                except Exception as e:
+                    errors.append(e)
+                    return
+
+        writer = threading.Thread(target=append)
+        searchers = [threading.Thread(target=search) for _ in range(2)]
+        for thread in [writer] + searchers:
+            thread.start()
+        writer.join()
+        done.set()
+        for searcher in searchers:
+            searcher.join()
+        self.assertEqual(errors, [])
+        vdb.refresh()
+        self.assertEqual(vdb.search_by_vector(corpus[250], n_results=1)[0]['id'], "250")
+
+class IVFIndexTest(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        config = {'TYPE': 'ivf', 'NLIST': 4, 'NPROBE': 4, 'MIN_TRAIN_SIZE': 20, 'RETRAIN_FACTOR': 4}
+        self.vdb = VectorDB(path=self.tmp.name, index=config, embedding_cache=False)
+        rng = np.random.default_rng(1)
+        self.corpus = rng.standard_normal((40, 8)).astype(np.float32)
+        self.vdb.store.append(range(40), self.corpus, [{"job": "A" if i % 2 else "B"} for i in range(40)])
+
+    def test_full_probe_matches_exact_search(self):
+        query = self.corpus[7]
+        approx = self.vdb.search_by_vector(query, n_results=5)
+        exact = self.vdb.search_by_vector(query, n_results=5, exact=True)
+        self.assertTrue(self.vdb.ann.is_trained)
+        self.assertEqual([r['id'] for r in approx], [r['id'] for r in exact])
+        filtered = self.vdb.search_by_vector(query, n_results=3, where={"job": "A"})
+        self.assertTrue(all(r['metadata']['job'] == "A" for r in filtered))
+
+    def test_index_updates_incrementally(self):
+        """Test that add/delete through VectorDB reach a trained index without retraining"""
+        self.vdb.search_by_vector(self.corpus[0])
+        centroids = self.vdb.ann.centroids
+        new_vector = [10.0] * 8
+        with mock.patch.object(VectorDB, '_get_embedding', return_value=new_vector):
+            self.vdb.add_applicant("new", "text")
+        self.assertIs(self.vdb.ann.centroids, centroids)
+        self.assertEqual(len(self.vdb.ann), 41)
+        self.assertEqual(self.vdb.search_by_vector(new_vector, n_results=1)[0]['id'], "new")
+
+        self.vdb.delete_applicant("new")
+        self.assertEqual(len(self.vdb.ann), 40)
+        self.assertNotEqual(self.vdb.search_by_vector(new_vector, n_results=1)[0]['id'], "new")
+
+class EmbeddingCacheTest(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.cache_path = os.path.join(self.tmp.name, 'cache.sqlite3')
+
+    def test_repeated_text_skips_remote_call(self):
+        """Test that the same text (modulo whitespace) is embedded only once"""
+        cache = EmbeddingCache(self.cache_path, max_memory_items=8)
+        vdb = VectorDB(path=self.tmp.name, embedding_cache=cache)
+        with mock.patch('ats.embeddings.genai.embed_content', return_value={'embedding': [0.5, 0.25]}) as embed:
+            first = vdb._get_embedding("Senior  Python\nEngineer")
+            second = vdb._get_embedding("Senior Python Engineer")
+            vdb._get_embedding("Senior Python Engineer", task_type="retrieval_query")
+        self.assertEqual(first, second)
+        self.assertEqual(embed.call_count, 2)
+        self.assertEqual(cache.stats()["memory_hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 2)
+
+    def test_persists_across_processes(self):
+        EmbeddingCache(self.cache_path).set("m", "t", "text", [1.0, 2.0])
+        fresh = EmbeddingCache(self.cache_path)
+        self.assertEqual(fresh.get("m", "t", "text"), [1.0, 2.0])
+        self.assertEqual(fresh.get("m", "t", "text"), [1.0, 2.0])
+        self.assertEqual((fresh.disk_hits, fresh.memory_hits), (1, 1))
+        self.assertEqual(fresh.stats()["total"]["misses"], 0)
+
+class FakeGenai:
+    """
+    Stand-in for google.generativeai.embed_content that checks arguments like
+    the library does (a title only goes with retrieval_document). Vectors
+    come from the local backend, so related texts stay close.
+    """
+    def __init__(self):
+        self.task_types = []
+        self.local = LocalHashingBackend(dim=64)
+
+    def embed_content(self, model, content, task_type=None, title=None):
+        if title is not None and task_type != "retrieval_document":
+            raise ValueError("Invalid task type: When a title is specified, the task must be of a 'retrieval document' type.")
+        self.task_types.append(task_type)
+        if isinstance(content, str):
+            return {'embedding': self.local.embed_one(content)}
+        return {'embedding': self.local.embed(content)}
+
+def fake_gemini_backend(test):
+    """A GeminiBackend whose API calls go to a FakeGenai until the test ends."""
+    fake = FakeGenai()
+    patcher = mock.patch('ats.embeddings.genai', fake)
+    patcher.start()
+    test.addCleanup(patcher.stop)
+    return GeminiBackend()
+
+class EmbeddingBackendTest(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.local = LocalHashingBackend(dim=64)
+
+    def test_local_backend_is_deterministic_and_normalized(self):
+        """Test that the local backend embeds offline, with related texts closer than unrelated ones"""
+        job, python, design = self.local.embed([
+            "Python engineer: Django, REST APIs, PostgreSQL",
+            "Backend developer with Python, Django and PostgreSQL",
+            "Graphic designer, Photoshop and typography",
+        ])
+        self.assertEqual(len(job), 64)
+        self.assertAlmostEqual(float(np.linalg.norm(job)), 1.0, places=5)
+        self.assertEqual(LocalHashingBackend(dim=64).embed_one("Python engineer: Django, REST APIs, PostgreSQL"), job)
+        self.assertGreater(np.dot(job, python), np.dot(job, design) + 0.2)
+
+    def test_gemini_backend_sends_a_title_only_with_documents(self):
+        backend = fake_gemini_backend(self)
+        self.assertEqual(len(backend.embed_one("Python engineer", "retrieval_query")), 64)
+        self.assertEqual(len(backend.embed(["Python engineer", "Designer"])), 2)
+        self.assertEqual(embeddings.genai.task_types, ["retrieval_query", "retrieval_document"])
+        vdb = VectorDB(path=self.tmp.name, backend=backend, embedding_cache=False)
+        self.assertEqual(len(vdb._get_embedding("Python engineer", task_type="retrieval_query")), 64)
+
+    def test_incomplete_backend_fails_when_created(self):
+        class NoKey(EmbeddingBackend):
+            def embed(self, texts, task_type="retrieval_document"):
+                return [[1.0] for _ in texts]
+        with self.assertRaises(TypeError):
+            NoKey()
+
+    def test_store_refuses_vectors_of_another_backend(self):
+        """Test that stores record their backend and never mix vectors from two backends"""
+        vdb = VectorDB(path=self.tmp.name, backend=self.local)
+        self.assertTrue(vdb.add_applicant(1, "python django"))
+        self.assertEqual(SegmentStore(self.tmp.name).backend, self.local.key)
+
+        other = VectorDB(path=self.tmp.name, backend=LocalHashingBackend(dim=64, seed=1))
+        self.assertFalse(other.compatible())
+        self.assertFalse(other.add_applicant(2, "python flask"))
+        self.assertEqual(other.query_similar_applicants("python"), [])
+        self.assertEqual(len(other.store), 1)
+
+        other.reset_vectors()
+        self.assertTrue(other.add_applicant(2, "python flask"))
+        self.assertEqual([hit['id'] for hit in other.query_similar_applicants("python")], ["2"])
+
+class BulkEmbeddingTest(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.vdb = VectorDB(path=self.tmp.name, embedding_cache=False)
+
+    @mock.patch('ats.vector_db.time.sleep')
+    def test_batches_requests_and_retries(self, sleep):
+        """Test that documents are embedded in chunks, failed chunks retried, and the store committed per batch"""
+        calls = []
+        def embed_batch(texts, task_type="retrieval_document"):
+            calls.append(len(texts))
+            if len(calls) == 1:
+                raise RuntimeError("429 Quota exceeded")
+            return [[float(len(t)), 1.0] for t in texts]
+
+        docs = ((i, "x" * (i + 1), {"job": "A"}) for i in range(25))
+        with mock.patch.object(VectorDB, '_embed_batch', side_effect=embed_batch), \
+                mock.patch.object(self.vdb.store, 'append', wraps=self.vdb.store.append) as append:
+            result = self.vdb.add_applicants_bulk(docs, commit_every=10, batch_size=4, max_workers=2)
+
+        self.assertEqual(result, {"added": 25, "failed": []})
+        self.assertEqual(len(self.vdb.store), 25)
+        self.assertEqual(append.call_count, 3)
+        self.assertTrue(all(size <= 4 for size in calls))
+        self.assertEqual(sum(calls), 25 + calls[0])
+        sleep.assert_called_once()
+
+    def test_reports_chunks_that_keep_failing(self):
+        with mock.patch.object(VectorDB, '_embed_batch', side_effect=RuntimeError("down")):
+            result = self.vdb.add_applicants_bulk([(1, "a", {}), (2, "b", {})], max_retries=0)
+        self.assertEqual(result, {"added": 0, "failed": [1, 2]})
+
+class HybridSearchTest(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.vdb = VectorDB(path=self.tmp.name, embedding_cache=False)
+        docs = [
+            (1, "Backend engineer, Python and Django, AWS Certified Solutions Architect", [1.0, 0.0]),
+            (2, "Python developer at Initech building data pipelines", [0.9, 0.1]),
+            (3, "Product designer, Figma and user research", [0.0, 1.0]),
+        ]
+        embeddings = {text: embedding for _, text, embedding in docs}
+        with mock.patch.object(VectorDB, '_get_embedding', side_effect=lambda text: embeddings[text]):
+            for applicant_id, text, _ in docs:
+                self.vdb.add_applicant(applicant_id, text, metadata={"job": "Design" if applicant_id == 3 else "Backend"})
+
+    def test_tokenizer_keeps_compounds_and_parts(self):
+        terms = tokenize("Node.js, CI/CD and C++ at the AWS-certified level")
+        for term in ["node.js", "node", "js", "ci/cd", "ci", "cd", "c++", "aws-certified", "aws", "certified"]:
+            self.assertIn(term, terms)
+        self.assertNotIn("the", terms)
+
+    def test_bm25_ranks_exact_keyword_matches(self):
+        results = self.vdb.lexical.search("initech")
+        self.assertEqual([r['id'] for r in results], ["2"])
+        results = self.vdb.lexical.search("python aws certified")
+        self.assertEqual([r['id'] for r in results], ["1", "2"])
+        self.assertEqual(self.vdb.lexical.search("python", where={"job": "Design"}), [])
+
+    def test_incremental_updates_survive_compaction_and_reload(self):
+        index = BM25Index(os.path.join(self.tmp.name, 'bm25'), min_compact=2, compact_ratio=0.5)
+        index.add(["a", "b"], ["kubernetes operator", "terraform modules"])
+        index.add(["a"], ["golang services"])  # Re-indexing replaces the old text
+        index.delete(["b"])
+        self.assertEqual(index.search("kubernetes terraform"), [])
+
+        index.add(["c", "d", "e"], ["kubernetes", "terraform kubernetes", "golang"])
+        self.assertEqual(os.path.getsize(os.path.join(index.path, 'delta.jsonl')), 0)  # Compacted
+
+        reloaded = BM25Index(index.path)
+        self.assertEqual(len(reloaded), 4)
+        self.assertEqual([r['id'] for r in reloaded.search("terraform")], ["d"])
+        # Appends by another instance are picked up without a compaction
+        index.add(["f"], ["terraform"])
+        self.assertEqual({r['id'] for r in reloaded.search("terraform")}, {"d", "f"})
+
+    def test_compaction_keeps_concurrent_appends(self):
+        # One instance per writer, as separate processes would have: only the lock file orders them
+        path = os.path.join(self.tmp.name, 'bm25')
+
+        def write(worker):
+            index = BM25Index(path, min_compact=5, compact_ratio=0.1)
+            for n in range(40):
+                index.add([f"{worker}-{n}"], [f"kubernetes worker{worker}"])
+
+        writers = [threading.Thread(target=write, args=(worker,)) for worker in range(4)]
+        for writer in writers:
+            writer.start()
+        for writer in writers:
+            writer.join()
+        self.assertEqual(len(BM25Index(path)), 160)
+
+    def test_fuses_vector_and_lexical_rankings(self):
+        with mock.patch.object(VectorDB, '_get_embedding', return_value=[0.0, 1.0]):
+            results = self.vdb.hybrid_search("initech", n_results=3)
+        by_id = {r['id']: r for r in results}
+        self.assertEqual(by_id["2"]['sources'], ["vector", "lexical"])
+        self.assertEqual(by_id["3"]['sources'], ["vector"])
+        self.assertEqual(results[0]['id'], "2")  # Found by both
+
+    def test_query_is_embedded_through_the_backend(self):
+        vdb = VectorDB(path=os.path.join(self.tmp.name, 'gemini'), backend=fake_gemini_backend(self), embedding_cache=False)
+        vdb.add_applicant(1, "Backend engineer, Python and Django")
+        vdb.add_applicant(2, "Product designer, Figma and user research")
+        results = vdb.hybrid_search("python django engineer", n_results=2)
+        self.assertEqual(results[0]['id'], "1")
+        self.assertEqual(results[0]['sources'], ["vector", "lexical"])
+        self.assertIn("retrieval_query", embeddings.genai.task_types)
+
+    def test_falls_back_to_lexical_when_embedding_is_unavailable(self):
+        with mock.patch.object(VectorDB, '_get_embedding', return_value=[]):
+            results = self.vdb.hybrid_search("initech")
+        self.assertEqual([(r['id'], r['sources']) for r in results], [("2", ["lexical"])])
+
+        release = threading.Event()
+        self.addCleanup(release.set)
+        with mock.patch.object(VectorDB, '_get_embedding', side_effect=lambda *args: release.wait(5) and [0.0, 1.0]):
+            results = self.vdb.hybrid_search("django", embed_timeout=0.05)
+        self.assertEqual([(r['id'], r['sources']) for r in results], [("1", ["lexical"])])
+
+    def test_reciprocal_rank_fusion(self):
+        fused = reciprocal_rank_fusion({
+            "vector": [{'id': "a", 'metadata': {}}, {'id': "b", 'metadata': {}}],
+            "lexical": [{'id': "b", 'metadata': {}}, {'id': "c", 'metadata': {}}],
+        }, k=60)
+        self.assertEqual([r['id'] for r in fused], ["b", "a", "c"])
+        self.assertAlmostEqual(fused[0]['score'], 1 / 62 + 1 / 61)
+
+    def test_delete_removes_from_lexical_index(self):
+        self.vdb.delete_applicant(2)
+        reloaded = VectorDB(path=self.vdb.path, embedding_cache=False)
+        self.assertEqual(reloaded.lexical.search("initech"), [])
+
+class StubModel:
+    """Stand-in for genai.GenerativeModel returning canned JSON per agent prompt."""
+    responses = {
+        "Resume Parsing Agent": '{"name": "Jane", "email": "jane@example.com"}',
+        "Skill Extraction Agent": '{"tech_skills": ["Python"], "soft_skills": [], "confidence_score": 0.9}',
+        "Ranking Agent": '{"total_score": 80, "skill_score": 70, "experience_score": 90, "reason": "ok"}',
+        "Resume Screening Agent": json.dumps({
+            "parsed": {"name": "Jane", "email": "jane@example.com"},
+            "skills": {"tech_skills": ["Python"], "soft_skills": [], "confidence_score": 0.9},
+            "ranking": {"total_score": 80, "skill_score": 70, "experience_score": 90, "reason": "ok"},
+        }),
+    }
+    block = {}
+
+    def __init__(self, model_name, **kwargs):
+        self.model_name = model_name
+
+    def generate_content(self, prompt, **kwargs):
+        for marker, text in self.responses.items():
+            if marker in prompt:
+                if marker in self.block:
+                    self.block[marker].wait(5)
+                # Roughly one token per word of prompt
+                usage = mock.Mock(prompt_token_count=len(prompt.split()), candidates_token_count=20, total_token_count=len(prompt.split()) + 20)
+                return mock.Mock(text=text, usage_metadata=usage)
+        raise ValueError("unexpected prompt")
+
+# A fresh limiter per agent, so the shared per-minute budget doesn't slow the tests down
+@mock.patch('ats.agents.get_rate_limiter', lambda: RateLimiter({}))
+@mock.patch('ats.agents.genai.GenerativeModel', StubModel)
+class OrchestratorTest(TestCase):
+    def test_sequential_and_concurrent_agree(self):
+        sequential = Orchestrator(mode="sequential").process_resume("resume", "job")
+        concurrent = Orchestrator(mode="concurrent").process_resume("resume", "job")
+        self.assertEqual(sequential, concurrent)
+        self.assertEqual(concurrent["ranking"]["total_score"], 80)
+
+    def test_concurrent_timeout_returns_partial_results(self):
+        """Test that a slow agent is dropped after its timeout while the others succeed"""
+        release = threading.Event()
+        self.addCleanup(release.set)
+        with mock.patch.dict(StubModel.block, {"Ranking Agent": release}):
+            results = Orchestrator(mode="concurrent", timeouts={"ranking": 0.05}).process_resume("resume")
+        self.assertEqual(results["parsed"]["name"], "Jane")
+        self.assertIsNotNone(results["skills"])
+        self.assertIsNone(results["ranking"])
+        self.assertEqual(results["errors"], {"ranking": "timeout"})
+
+    @override_settings(ATS_COMPACTION={'ENABLED': False})
+    def test_fused_mode_sends_resume_once(self):
+        """Test that fused mode returns the same shape with one request and fewer prompt tokens"""
+        resume = "Python engineer " * 500
+        sequential = Orchestrator(mode="sequential")
+        fused = Orchestrator(mode="fused")
+        expected = sequential.process_resume(resume, "job")
+        self.assertEqual(fused.process_resume(resume, "job"), expected)
+        self.assertEqual(fused.last_usage["requests"], 1)
+        self.assertEqual(sequential.last_usage["requests"], 3)
+        self.assertLess(fused.last_usage["prompt_tokens"] * 2, sequential.last_usage["prompt_tokens"])
+
+    def test_agents_get_compacted_digests(self):
+        """Test that each agent's prompt holds its digest and the savings are recorded"""
+        resume = compaction.compact_resume(CompactionTest.resume())
+        orchestrator = Orchestrator(mode="sequential")
+        with mock.patch.object(RankingAgent, 'rank_candidate', wraps=orchestrator.ranker.rank_candidate) as rank:
+            orchestrator.process_resume(resume, "job")
+        rank.assert_called_once_with(resume.digest("ranking"), "job")
+        self.assertLess(orchestrator.last_compaction["sent_tokens"], orchestrator.last_compaction["raw_tokens"])
+
+class CompactionTest(TestCase):
+    @staticmethod
+    def resume():
+        header = "Jane Doe\njane@example.com | +1 (555) 123-4567"
+        lines = [header, "", "SUMMARY", "Backend engineer, 9 years of Python.", "", "Work Experience:"]
+        for job in range(30):
+            lines += [f"Engineer, Company {job}", f"•   Built   service {job} with Django and PostgreSQL."]
+            if job % 10 == 9:
+                lines += [f"Page {job // 10 + 1} of 3", "\f", header]
+        lines += ["EDUCATION", "B.Sc. Computer Science, 2014", "Skills", "Python, Kubernetes", "References", "On request"]
+        return "\n".join(lines)
+
+    def test_clean_text_drops_running_headers_and_page_numbers(self):
+        text = compaction.clean_text(self.resume())
+        self.assertEqual(text.count("jane@example.com"), 1)
+        self.assertEqual(text.count("Jane Doe"), 1)
+        self.assertNotIn("Page 2 of 3", text)
+        self.assertIn("- Built service 3 with Django and PostgreSQL.", text)
+
+    def test_digests_fit_budget_and_keep_every_section(self):
+        """Test that a long experience section is cut instead of the sections after it"""
+        resume = compaction.compact_resume(self.resume(), budgets={'ranking': 200})
+        self.assertEqual([section for section, _, _ in resume.sections],
+                         ['header', 'summary', 'experience', 'education', 'skills', 'references'])
+        ranking = resume.digest("ranking")
+        self.assertLessEqual(len(ranking), 200 * 4)
+        self.assertIn("B.Sc. Computer Science", ranking)
+        self.assertIn("Python, Kubernetes", ranking)
+        self.assertIn("[...]", ranking)
+        self.assertNotIn("On request", ranking)
+        self.assertNotIn("jane@example.com", ranking)
+        self.assertIn("jane@example.com", resume.digest("parsing"))
+        self.assertNotIn("B.Sc.", resume.legacy_digest("ranking")[:200 * 4])
+
+class StartupTest(TestCase):
+    def test_heavy_dependencies_load_on_first_use(self):
+        """Test that serving a request needs neither the Gemini SDK nor the PDF/DOCX readers"""
+        code = ("import sys, django; django.setup(); import config.wsgi, ats.views; "
+                "print(sorted(m for m in ('google.generativeai', 'pypdf', 'docx2txt') if m in sys.modules))")
+        output = subprocess.run([sys.executable, '-c', code], cwd=settings.BASE_DIR, capture_output=True, text=True,
+                                env={**os.environ, 'DJANGO_SETTINGS_MODULE': 'config.settings'}, check=True).stdout
+        self.assertEqual(output.strip(), "[]")
+
+    def test_lazy_import(self):
+        configured = []
+        json_module = LazyImport('json', on_import=configured.append)
+        self.assertFalse(json_module.loaded)
+        self.assertEqual(json_module.dumps([1]), "[1]")
+        self.assertEqual(LazyImport('json', 'loads')("[2]"), [2])
+        self.assertEqual(configured, [json])
+        self.assertFalse(LazyImport('ats_missing_module'))
+
+    def test_shared_clients(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        with override_settings(ATS_VECTOR_STORE_DIR=tmp.name), \
+                mock.patch('ats.vector_db._vector_dbs', {}), mock.patch('ats.agents._orchestrators', {}):
+            vdb = get_vector_db()
+            SegmentStore(tmp.name).append([7], [[1.0, 0.0]])
+            self.assertIs(get_vector_db(), vdb)
+            self.assertIn(7, vdb.store)
+            self.assertIs(get_orchestrator(), get_orchestrator())
+
+class ResponseCacheTest(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, 'llm.sqlite3')
+
+    @mock.patch('ats.agents.get_rate_limiter', lambda: RateLimiter({}))
+    @mock.patch('ats.agents.genai.GenerativeModel', StubModel)
+    def test_agent_reuses_cached_response(self):
+        cache = ResponseCache(self.path)
+        agent = ParsingAgent(response_cache=cache)
+        with mock.patch.object(StubModel, 'generate_content', wraps=agent.model.generate_content) as generate:
+            first = agent.parse_resume("same resume")
+            second = ParsingAgent(response_cache=ResponseCache(self.path)).parse_resume("same resume")
+        self.assertEqual(first, second)
+        self.assertEqual(generate.call_count, 1)
+        self.assertEqual(cache.stats()["total"]["misses"], 1)
+
+    @override_settings(ATS_LLM_CACHE={'AGENTS': ['RankingAgent'], 'PATH': 'unused'})
+    @mock.patch('ats.agents.genai.GenerativeModel', StubModel)
+    def test_cache_is_opt_in_per_agent(self):
+        self.assertIsNone(ParsingAgent().response_cache)
+
+    def test_ttl_and_size_eviction(self):
+        cache = ResponseCache(self.path, ttl=60, max_entries=2, prune_every=1)
+        clock = iter(range(1000, 2000))
+        with mock.patch('ats.caching.time.time', side_effect=lambda: float(next(clock))):
+            cache.set("m", "old", "a")
+            self.assertEqual(cache.get("m", "old"), "a")
+            clock = iter(range(1100, 2000))
+            self.assertIsNone(cache.get("m", "old"))
+            for prompt in ("p1", "p2", "p3"):
+                cache.set("m", prompt, prompt.upper())
+            self.assertEqual(cache.stats()["entries"], 2)
+            self.assertIsNone(cache.get("m", "p1"))
+            self.assertEqual(cache.get("m", "p3"), "P3")
+
+# Saved jobs are embedded after commit instead of queued, so only the applicants' jobs below are queued
+@override_settings(ATS_PROCESSING={**settings.ATS_PROCESSING, 'ASYNC': False})
+class ProcessingQueueTest(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        media = override_settings(MEDIA_ROOT=self.tmp.name)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.job = Job.objects.create(title="Backend", description="Python")
+
+    def _upload(self):
+        resume = SimpleUploadedFile("resume.pdf", b"%PDF-1.4 stub", content_type="application/pdf")
+        return self.client.post(reverse('apply_job', args=[self.job.pk]), {'resume': resume})
+
+    @override_settings(ATS_PROCESSING={**settings.ATS_PROCESSING, 'ASYNC': True})
+    def test_upload_enqueues_without_processing(self):
+        with mock.patch('ats.views.process_applicant') as process:
+            response = self._upload()
+        self.assertRedirects(response, reverse('dashboard'))
+        process.assert_not_called()
+        job = ProcessingJob.objects.get()
+        self.assertEqual(job.status, ProcessingJob.PENDING)
+        self.assertEqual(job.applicant.job, self.job)
+        self.assertEqual(self.client.get(reverse('queue_status')).json()["pending"], 1)
+
+    def test_job_is_claimed_once(self):
+        applicant = Applicant.objects.create(resume="resumes/a.pdf")
+        tasks.enqueue_applicant(applicant)
+        first = tasks.claim_next("w1")
+        self.assertIsNotNone(first)
+        self.assertIsNone(tasks.claim_next("w2"))
+        self.assertEqual(first.attempts, 1)
+        tasks.complete(first, "w2")  # not the owner: ignored
+        self.assertEqual(ProcessingJob.objects.get().status, ProcessingJob.PROCESSING)
+        tasks.complete(first, "w1")
+        self.assertEqual(ProcessingJob.objects.get().status, ProcessingJob.DONE)
+
+    def test_failures_retry_then_fail(self):
+        applicant = Applicant.objects.create(resume="resumes/a.pdf")
+        tasks.enqueue_applicant(applicant)
+        with mock.patch('ats.pipeline.process_applicant', side_effect=ValueError("quota")):
+            for attempt in range(settings.ATS_PROCESSING['MAX_ATTEMPTS']):
+                ProcessingJob.objects.update(run_after=timezone.now())
+                self.assertFalse(tasks.run_job(tasks.claim_next("w1"), "w1"))
+        job = ProcessingJob.objects.get()
+        self.assertEqual(job.status, ProcessingJob.FAILED)
+        self.assertEqual(job.last_error, "quota")
+
+    @mock.patch('ats.pipeline.get_vector_db')
+    def test_resume_without_text_is_not_done(self, vector_db):
+        tasks.enqueue_applicant(Applicant.objects.create(resume="resumes/a.pdf", job=self.job))
+        with mock.patch('ats.pipeline.extract_text_from_file', return_value=""):
+            self.assertFalse(tasks.run_job(tasks.claim_next("w1"), "w1"))
+        job = ProcessingJob.objects.get()
+        self.assertEqual(job.status, ProcessingJob.PENDING)
+        self.assertIn("No text", job.last_error)
+        self.assertIsNone(tasks.claim_next("w1"))
+
+    @override_settings(ATS_PROCESSING={**settings.ATS_PROCESSING, 'ASYNC': True})
+    def test_saved_jobs_are_embedded_by_the_workers(self):
+        job = Job.objects.create(title="Frontend", description="React")
+        job.description = "React and TypeScript"
+        job.save()  # Still pending: not queued twice
+        queued = ProcessingJob.objects.get()
+        self.assertEqual((queued.job, queued.applicant), (job, None))
+        with mock.patch('ats.matching.refresh_job') as refresh:
+            self.assertTrue(tasks.run_job(tasks.claim_next("w1"), "w1"))
+        self.assertEqual(refresh.call_args.args[0].description, "React and TypeScript")
+        self.assertEqual(ProcessingJob.objects.get().status, ProcessingJob.DONE)
+        # A failed embedding raises, so the queued run is retried
+        with self.assertRaises(ValueError):
+            matching.refresh_job(job, vdb=mock.Mock(add_job=mock.Mock(return_value=[])))
+
+    def test_workers_requeue_jobs_of_crashed_workers(self):
+        for _ in range(3):
+            tasks.enqueue_applicant(Applicant.objects.create(resume="resumes/a.pdf"))
+        crashed = tasks.claim_next("dead-worker")
+        ProcessingJob.objects.filter(pk=crashed.pk).update(locked_at=timezone.now() - timedelta(hours=1))
+        with mock.patch('ats.pipeline.process_applicant'), \
+                mock.patch('ats.tasks.requeue_stale', wraps=tasks.requeue_stale) as requeue:
+            handled = tasks.worker_loop("w1", threading.Event(), once=True)
+        self.assertEqual(handled, 3)
+        self.assertEqual(requeue.call_count, 1)  # Not on every poll
+        self.assertEqual(ProcessingJob.objects.get(pk=crashed.pk).status, ProcessingJob.DONE)
+
+    def test_worker_pool_drains_queue(self):
+        for _ in range(3):
+            tasks.enqueue_applicant(Applicant.objects.create(resume="resumes/a.pdf"))
+        with mock.patch('ats.pipeline.process_applicant') as process:
+            handled = tasks.worker_loop("w1", threading.Event(), once=True)
+        self.assertEqual(handled, 3)
+        self.assertEqual(process.call_count, 3)
+        self.assertEqual(tasks.queue_counts()["done"], 3)
+
+def write_docx(path, text):
+    """Minimal .docx containing one paragraph, enough for docx2txt."""
+    with zipfile.ZipFile(path, 'w') as archive:
+        archive.writestr('word/document.xml', (
+            '<?xml version="1.0"?><w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+            f'<w:body><w:p><w:r><w:t>{text}</w:t></w:r></w:p></w:body></w:document>'
+        ))
+
+class IngestResumesTest(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.source = os.path.join(self.tmp.name, 'batch')
+        os.makedirs(self.source)
+        for i in range(3):
+            write_docx(os.path.join(self.source, f"r{i}.docx"), f"Candidate {i} knows Python")
+        self.job = Job.objects.create(title="Backend", description="Python")
+        media = override_settings(MEDIA_ROOT=os.path.join(self.tmp.name, 'media'))
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def _results(self, text, job_description="", rank=True):
+        n = text.split()[1]
+        if n == "1":
+            return {"parsed": None, "skills": None, "ranking": None}
+        return {
+            "parsed": {"name": f"Candidate {n}", "email": f"c{n}@example.com"},
+            "skills": {"tech_skills": ["Python", "python", "Go"], "confidence_score": 0.8},
+            "ranking": {"total_score": 70, "skill_score": 60, "experience_score": 80, "reason": "ok"},
+        }
+
+    @mock.patch('ats.pipeline.get_vector_db')
+    def test_ingests_in_bulk_and_resumes_from_checkpoint(self, vector_db):
+        args = [self.source, '--job', str(self.job.pk), '--extract-workers', '1', '--batch-size', '2']
+        with mock.patch.object(Orchestrator, 'process_resume', side_effect=self._results) as process:
+            call_command('ingest_resumes', *args, stdout=io.StringIO())
+        self.assertEqual(process.call_count, 3)
+        self.assertEqual(Applicant.objects.filter(job=self.job).count(), 2)
+        self.assertEqual(ApplicantSkill.objects.count(), 4)
+        self.assertEqual(Evaluation.objects.count(), 2)
+
+        with open(self.source + '.ingest-checkpoint.json') as f:
+            checkpoint = json.load(f)
+        self.assertEqual(sorted(checkpoint['done']), ['r0.docx', 'r2.docx'])
+        self.assertEqual(list(checkpoint['failed']), ['r1.docx'])
+
+        # A rerun only retries what is not done yet
+        with mock.patch.object(Orchestrator, 'process_resume', side_effect=self._results) as process:
+            call_command('ingest_resumes', *args, stdout=io.StringIO())
+        self.assertEqual(process.call_count, 1)
+        self.assertEqual(Applicant.objects.count(), 2)
+
+class ExtractionTest(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def _fake_reader(self, pages, calls):
+        def page(i):
+            def extract_text():
+                calls.append(i)
+                return f"page {i} " + "x" * 90
+            return mock.Mock(extract_text=extract_text)
+        return mock.Mock(return_value=mock.Mock(pages=[page(i) for i in range(pages)]))
+
+    def test_pdf_stops_at_char_and_page_budgets(self):
+        path = os.path.join(self.tmp.name, 'long.pdf')
+        calls = []
+        with mock.patch.object(extraction, 'PdfReader', self._fake_reader(50, calls)):
+            result = extraction.extract_text(path, max_chars=250, parallel=False)
+            self.assertEqual(calls, [0, 1, 2])
+            self.assertEqual(len(result.text), 250)
+            self.assertTrue(result.truncated)
+            self.assertEqual((result.pages_read, result.total_pages), (3, 50))
+
+            calls.clear()
+            result = extraction.extract_text(path, max_pages=4, max_chars=10**6, parallel=False)
+            self.assertEqual(calls, [0, 1, 2, 3])
+            self.assertTrue(result.text.startswith("page 0 "))
+
+    def test_slow_page_is_cut_off_at_the_timeout(self):
+        path = os.path.join(self.tmp.name, 'slow.pdf')
+        release = threading.Event()
+        self.addCleanup(release.set)
+        reader = self._fake_reader(3, [])
+        reader.return_value.pages[1].extract_text = lambda: release.wait(5) and "late"
+        with mock.patch.object(extraction, 'PdfReader', reader):
+            started = time.perf_counter()
+            result = extraction.extract_text(path, timeout=0.2, parallel=False)
+        self.assertLess(time.perf_counter() - started, 2)
+        self.assertTrue(result.timed_out)
+        self.assertTrue(result.text.startswith("page 0 "))
+        self.assertEqual(result.pages_read, 1)
+
+    def test_docx_is_capped(self):
+        path = os.path.join(self.tmp.name, 'r.docx')
+        write_docx(path, "Python " * 100)
+        result = extraction.extract_text(path, max_chars=50)
+        self.assertEqual(result.text, ("Python " * 100)[:50])
+        self.assertTrue(result.truncated)
+        self.assertEqual(extraction.extract_text_from_file(path), ("Python " * 100).strip())
+
+class UploadDedupTest(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        media = override_settings(MEDIA_ROOT=self.tmp.name)
+        media.enable()
+        self.addCleanup(media.disable)
+        path = os.path.join(self.tmp.name, 'upload.docx')
+        write_docx(path, "Jane Doe knows Python")
+        with open(path, 'rb') as f:
+            self.content = f.read()
+        self.backend = Job.objects.create(title="Backend", description="Python")
+        self.frontend = Job.objects.create(title="Frontend", description="React")
+
+    def _upload(self, job):
+        resume = SimpleUploadedFile("jane.docx", self.content)
+        return self.client.post(reverse('apply_job', args=[job.pk]), {'resume': resume})
+
+    def _results(self, text, job_description="", rank=True):
+        return {
+            "parsed": {"name": "Jane Doe", "email": "jane@example.com"},
+            "skills": {"tech_skills": ["Python"], "confidence_score": 0.9},
+            "ranking": {"total_score": 80, "skill_score": 80, "experience_score": 80, "reason": "ok"},
+        }
+
+    @override_settings(ATS_PROCESSING={**settings.ATS_PROCESSING, 'ASYNC': False})
+    @mock.patch('ats.pipeline.get_vector_db')
+    def test_identical_upload_skips_agents(self, vector_db):
+        ranking = {"total_score": 40, "skill_score": 30, "experience_score": 50, "reason": "no React"}
+        with mock.patch.object(Orchestrator, 'process_resume', side_effect=self._results) as process, \
+                mock.patch.object(RankingAgent, 'rank_candidate', return_value=ranking) as rank:
+            self._upload(self.backend)
+            first = Applicant.objects.get()
+            self._upload(self.backend)
+            self.assertEqual(process.call_count, 1)
+            rank.assert_not_called()
+
+            # Same file for another job: only the ranking is redone
+            self._upload(self.frontend)
+            self.assertEqual(process.call_count, 1)
+            self.assertEqual(rank.call_count, 1)
+
+        document = ResumeDocument.objects.get()
+        applicant = Applicant.objects.get()
+        self.assertEqual(applicant.job, self.frontend)
+        self.assertEqual(applicant.resume.name, first.resume.name)
+        self.assertEqual(applicant.evaluation.total_score, 40)
+        self.assertEqual(len(document.rankings), 2)
+        self.assertEqual(ApplicantSkill.objects.get(applicant=applicant).skill.name, "python")
+        self.assertEqual(len(os.listdir(os.path.join(self.tmp.name, 'resumes'))), 1)
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+class QuotaStubModel(StubModel):
+    """StubModel whose calls to models in `exhausted` fail like the Gemini API on quota."""
+    exhausted = set()
+    calls = []
+
+    def generate_content(self, prompt, **kwargs):
+        self.calls.append(self.model_name)
+        if self.model_name in self.exhausted:
+            raise Exception("429 Resource has been exhausted (e.g. check quota).")
+        return super().generate_content(prompt, **kwargs)
+
+@override_settings(ATS_RATE_LIMIT={**settings.ATS_RATE_LIMIT, 'MODELS': ['model-a', 'model-b']})
+@mock.patch('ats.agents.genai.GenerativeModel', QuotaStubModel)
+class RateLimiterTest(TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        QuotaStubModel.calls = []
+
+    def _limiter(self, rpm=60, **config):
+        config = {'LIMITS': {'default': {'RPM': rpm, 'TPM': 10**6}}, 'BREAKER_THRESHOLD': 2, 'BREAKER_RESET': 30,
+                  'MAX_WAIT': 10, **config}
+        return RateLimiter(config, clock=self.clock, sleep=self.clock.sleep)
+
+    def test_routes_to_next_model_on_429(self):
+        agent = ParsingAgent(rate_limiter=self._limiter())
+        with mock.patch.object(QuotaStubModel, 'exhausted', {'model-a'}):
+            for _ in range(3):
+                self.assertEqual(agent.parse_resume("resume")["name"], "Jane")
+        # One 429 drains model-a's bucket, so later calls go straight to model-b
+        self.assertEqual(QuotaStubModel.calls, ['model-a', 'model-b', 'model-b', 'model-b'])
+        self.assertEqual(self.clock.sleeps, [])
+
+    def test_circuit_opens_then_recovers(self):
+        limiter = self._limiter()
+        agent = ParsingAgent(model_name='model-a', rate_limiter=limiter)
+        agent.model_names = ['model-a']
+        with mock.patch.object(QuotaStubModel, 'exhausted', {'model-a'}):
+            with self.assertRaisesRegex(RateLimitError, "Circuit open"):
+                limiter.call(['model-a'], lambda name: agent._call(name, "Resume Parsing Agent", 1))
+            self.assertEqual(len(QuotaStubModel.calls), 2)
+            self.assertEqual(limiter.stats()['model-a']['breaker'], 'open')
+            self.assertIsNone(agent.parse_resume("resume"))
+            self.assertEqual(len(QuotaStubModel.calls), 2)
+
+        self.clock.now += 30
+        self.assertEqual(agent.parse_resume("resume")["name"], "Jane")
+        self.assertEqual(limiter.stats()['model-a']['breaker'], 'closed')
+
+    def test_transient_errors_by_status_not_digits(self):
+        class APIError(Exception):
+            def __init__(self, message, code=None):
+                super().__init__(message)
+                self.code = code
+        self.assertTrue(is_transient_error(APIError("Service busy", code=503)))
+        self.assertTrue(is_rate_limit_error(APIError("Too many requests", code=429)))
+        self.assertFalse(is_transient_error(APIError("Prompt of 15003 tokens is too long (id 5042)", code=400)))
+        self.assertTrue(is_transient_error(ValueError("502 Bad Gateway")))
+        self.assertFalse(is_transient_error(ValueError("Resume 4500 has no text")))
+        self.assertFalse(is_rate_limit_error(ValueError("Job 1429 not found")))
+
+    def test_requests_per_minute_are_spread_out(self):
+        limiter = self._limiter(rpm=2, MAX_WAIT=60)
+        for _ in range(3):
+            limiter.call(['model-a'], lambda name: name)
+        self.assertEqual(len(self.clock.sleeps), 1)
+        self.assertAlmostEqual(self.clock.sleeps[0], 30.0)
+
+@override_settings(ATS_DASHBOARD={'PAGE_SIZE': 10})
+class DashboardTest(TestCase):
+    def setUp(self):
+        self.jobs = [Job.objects.create(title=title, description=title) for title in ("Backend", "Frontend")]
+        python = Skill.objects.create(name="python")
+        for i in range(25):
+            applicant = Applicant.objects.create(name=f"Candidate {i}", resume=f"resumes/{i}.pdf", job=self.jobs[i % 2])
+            ApplicantSkill.objects.create(applicant=applicant, skill=python, confidence=0.5)
+            ProcessingJob.objects.create(applicant=applicant, status=ProcessingJob.DONE)
+            if i % 5:
+                # Ties on score and applicants without an evaluation exercise the cursor
+                Evaluation.objects.create(applicant=applicant, total_score=(i * 7) % 50)
+
+    def _pages(self, **params):
+        rows, after = [], None
+        while True:
+            query = {**params, **({'after': after} if after else {})}
+            with self.assertNumQueries(4):
+                response = self.client.get(reverse('dashboard'), query)
+            rows.extend(response.context['applicants'])
+            after = response.context['next_cursor']
+            if not after:
+                return rows
+
+    def test_keyset_pages_cover_ranking_with_constant_queries(self):
+        rows = self._pages()
+        scores = [a.evaluation.total_score if hasattr(a, 'evaluation') else -1 for a in rows]
+        self.assertEqual(len({a.pk for a in rows}), 25)
+        self.assertEqual(scores, sorted(scores, reverse=True))
+
+    def test_filters_by_job_and_score(self):
+        rows = self._pages(job=self.jobs[0].pk, min_score=10, max_score=40)
+        expected = Applicant.objects.filter(job=self.jobs[0], evaluation__total_score__range=(10, 40))
+        self.assertEqual({a.pk for a in rows}, set(expected.values_list('pk', flat=True)))
+
+    def test_detail_skills_are_prefetched(self):
+        applicant = Applicant.objects.first()
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('applicant_detail', args=[applicant.pk]))
+        self.assertContains(response, "python (0.5)")
+
+class SkillPersistenceTest(TestCase):
+    def setUp(self):
+        skills.skill_ids.clear()
+        self.addCleanup(skills.skill_ids.clear)
+
+    def _save(self, applicant, names):
+        with CaptureQueriesContext(connection) as queries:
+            skills.save_applicant_skills(applicant, names, 0.7)
+        return len(queries)
+
+    def test_query_count_does_not_grow_with_skills(self):
+        Skill.objects.create(name="python")
+        few = self._save(Applicant.objects.create(resume="resumes/a.pdf"), [f"skill {i}" for i in range(5)])
+        many = self._save(Applicant.objects.create(resume="resumes/b.pdf"), [f"skill {i}" for i in range(5, 45)] + ["Python"])
+        self.assertEqual(few, many)
+        self.assertEqual(Skill.objects.count(), 46)
+        self.assertEqual(ApplicantSkill.objects.count(), 46)
+
+    def test_names_are_normalized_and_replaced_on_reprocessing(self):
+        applicant = Applicant.objects.create(resume="resumes/a.pdf")
+        skills.save_applicant_skills(applicant, ["Machine  Learning", "machine learning ", "SQL"])
+        skills.save_applicant_skills(applicant, ["sql", "Go"])
+        self.assertEqual(sorted(applicant.skills.values_list('skill__name', flat=True)), ["go", "sql"])
+        self.assertEqual(Skill.objects.filter(name="machine learning").count(), 1)
+
+    def test_committed_ids_are_cached(self):
+        applicant = Applicant.objects.create(resume="resumes/a.pdf")
+        with self.captureOnCommitCallbacks(execute=True):
+            skills.save_applicant_skills(applicant, ["python", "go"])
+        with self.assertNumQueries(0):
+            ids = skills.resolve_skill_ids(["python", "go"])
+        self.assertEqual(ids, dict(Skill.objects.values_list('name', 'pk')))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Skill.objects.get(name="go").delete()
+        # Not served from the cache: the skill is created again
+        self.assertNotEqual(skills.resolve_skill_ids(["go"])["go"], ids["go"])
+
+@mock.patch.object(skill_index, '_skill_index', None)
+class SkillIndexTest(TestCase):
+    def setUp(self):
+        skills.skill_ids.clear()
+        self.addCleanup(skills.skill_ids.clear)
+        self.people = {}
+        for name, skill_set in {
+            "ana": {"python": 0.9, "kubernetes": 0.8, "go": 0.9},
+            "ben": {"python": 0.6, "kubernetes": 0.9},
+            "cy": {"python": 0.9, "go": 0.5},
+            "di": {"kubernetes": 0.7, "go": 0.8},
+        }.items():
+            applicant = Applicant.objects.create(name=name, resume=f"resumes/{name}.pdf")
+            skills.save_skills_bulk([(applicant, skill, confidence) for skill, confidence in skill_set.items()])
+            self.people[name] = applicant.pk
+        self.names = {pk: name for name, pk in self.people.items()}
+
+    def _names(self, results):
+        return [self.names[pk] for pk, _, _ in results]
+
+    def test_and_or_and_weighted_queries(self):
+        index = skill_index.SkillIndex().build()
+        self.assertEqual(self._names(index.search(must=["python", "kubernetes"], should=["go"])), ["ana", "ben"])
+        self.assertEqual(self._names(index.search(should=["python", "go"])), ["ana", "cy", "di", "ben"])
+        # Weights outrank confidence: Go counts triple
+        self.assertEqual(self._names(index.search(must=["kubernetes"], should=["python", "go"], weights={"go": 3})),
+                         ["ana", "di", "ben"])
+        self.assertEqual(index.search(must=["python", "rust"]), [])
+        self.assertEqual(index.search(), [])
+
+    def test_index_follows_writes(self):
+        index = skill_index.get_skill_index()
+        new = Applicant.objects.create(name="eve", resume="resumes/eve.pdf")
+        with self.captureOnCommitCallbacks(execute=True):
+            skills.save_skills_bulk([(new, "Rust", 1.0), (new, "python", 1.0)])
+        self.assertEqual(index.search(must=["rust"])[0][0], new.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            skills.save_applicant_skills(Applicant.objects.get(name="ana"), ["rust"])
+            Applicant.objects.filter(name="cy").delete()
+        self.assertEqual(sorted(pk for pk, _, _ in index.search(must=["python"])), sorted([self.people["ben"], new.pk]))
+        self.assertEqual(len(index.search(must=["rust"])), 2)
+
+    def test_search_view(self):
+        response = self.client.get(reverse('skill_search'), {'must': 'Python', 'should': 'go:2, kubernetes'})
+        self.assertEqual([row['applicant'].name for row in response.context['results']], ["ana", "cy", "ben"])
+        self.assertContains(response, "3/3")
+
+class LocalScoringTest(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.vdb = VectorDB(path=self.tmp.name, embedding_cache=False)
+        self.job = Job.objects.create(title="Backend", description="Backend engineer", requirements="Python, Django, 4+ years")
+        self.people = {}
+        for name, skill_set, summary, vector in [
+            ("ana", {"python": 1.0, "django": 1.0}, "8 years of backend work", [1.0, 0.0]),
+            ("ben", {"python": 0.5}, "2 years as a developer", [0.8, 0.6]),
+            ("cy", {}, "Designer", None),
+        ]:
+            applicant = Applicant.objects.create(name=name, resume=f"resumes/{name}.pdf", job=self.job, experience_summary=summary)
+            skills.save_skills_bulk([(applicant, skill, confidence) for skill, confidence in skill_set.items()])
+            if vector:
+                self.vdb.store.append([str(applicant.pk)], np.asarray([vector], dtype=np.float32), [{}], [""])
+            self.people[name] = applicant.pk
+        Evaluation.objects.create(applicant_id=self.people["ben"], total_score=90, skill_score=90, experience_score=90)
+        self.embedding = mock.patch.object(VectorDB, '_get_embedding', return_value=[1.0, 0.0])
+        self.embedding.start()
+        self.addCleanup(self.embedding.stop)
+
+    def _name(self, result):
+        return next(name for name, pk in self.people.items() if pk == result['applicant_id'])
+
+    def test_scores_signals_and_stores_them_next_to_llm_scores(self):
+        with override_settings(ATS_SCORING={**settings.ATS_SCORING, 'SIMILARITY_RANGE': (0.0, 1.0)}):
+            results = scoring.score_applicants(self.job, vdb=self.vdb)
+        by_name = {self._name(r): r for r in results}
+        self.assertEqual([self._name(r) for r in results], ["ana", "ben", "cy"])
+        self.assertEqual(by_name["ana"], {'applicant_id': self.people["ana"], 'score': 100.0, 'skills': 100.0,
+                                          'similarity': 100.0, 'experience': 100.0})
+        self.assertEqual((by_name["ben"]['skills'], by_name["ben"]['similarity'], by_name["ben"]['experience']), (25.0, 80.0, 50.0))
+        # No vector and no years: only the skill signal counts
+        self.assertEqual((by_name["cy"]['score'], by_name["cy"]['similarity']), (0.0, None))
+
+        ben = Evaluation.objects.get(applicant_id=self.people["ben"])
+        self.assertEqual((ben.total_score, ben.local_score), (90, by_name["ben"]['score']))
+        cy = Evaluation.objects.get(applicant_id=self.people["cy"])
+        self.assertIsNone(cy.total_score)
+        self.assertIsNotNone(cy.local_scored_at)
+
+    def test_weights_rerank_without_saving(self):
+        Applicant.objects.filter(pk=self.people["ben"]).update(experience_summary="12 years")
+        results = scoring.score_applicants(self.job, weights={'skills': 0, 'similarity': 0, 'experience': 1},
+                                           vdb=self.vdb, save=False)
+        self.assertEqual([r['score'] for r in results[:2]], [100.0, 100.0])
+        self.assertFalse(Evaluation.objects.filter(local_score__isnull=False).exists())
+
+    def test_similarity_uses_the_backends_job_embedding(self):
+        vdb = VectorDB(path=os.path.join(self.tmp.name, 'gemini'), backend=fake_gemini_backend(self), embedding_cache=False)
+        self.embedding.stop()
+        self.addCleanup(self.embedding.start)
+        vdb.add_applicant(self.people["ana"], "Backend engineer: Python, Django, 8 years")
+        vdb.add_applicant(self.people["ben"], "Illustrator and designer")
+        by_name = {self._name(r): r for r in scoring.score_applicants(self.job, vdb=vdb, save=False)}
+        self.assertIn(self.job.pk, vdb.jobs)
+        self.assertIsNotNone(by_name["ana"]['similarity'])
+        self.assertGreater(by_name["ana"]['similarity'], by_name["ben"]['similarity'])
+        self.assertIsNone(by_name["cy"]['similarity'])
+
+    def test_subset_scores_match_the_whole_job(self):
+        # Uploads score one applicant at a time: others' skills must not leak in
+        everyone = {r['applicant_id']: r for r in scoring.score_applicants(self.job, vdb=self.vdb, save=False)}
+        for pk in self.people.values():
+            self.assertEqual(scoring.score_applicants(self.job, [pk], vdb=self.vdb, save=False), [everyone[pk]])
+        alone = scoring.score_applicants(self.job, [self.people["cy"]], vdb=self.vdb, save=False)
+        self.assertEqual(alone[0]['skills'], 0.0)
+
+    def test_skills_from_description_without_requirements(self):
+        Job.objects.filter(pk=self.job.pk).update(requirements="", description="We use Django and some Python")
+        self.job.refresh_from_db()
+        self.assertEqual(sorted(scoring.job_skill_ids(self.job).values()), ["django", "python"])
+
+    @override_settings(ATS_PROCESSING={**settings.ATS_PROCESSING, 'ASYNC': False})
+    def test_edited_job_is_rescored_and_dashboard_sorts_by_local_score(self):
+        with mock.patch('ats.matching.get_vector_db', return_value=self.vdb), \
+                self.captureOnCommitCallbacks(execute=True):
+            self.job.requirements = "Python"
+            self.job.save()
+        self.assertEqual(Evaluation.objects.filter(local_score__isnull=False).count(), 3)
+
+        response = self.client.get(reverse('dashboard'), {'sort': 'local'})
+        self.assertEqual([a.name for a in response.context['applicants']], ["ana", "ben", "cy"])
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.context['applicants'][0].name, "ben")
+
+@override_settings(ATS_MATCHING={'TOP_K': 2}, ATS_PROCESSING={**settings.ATS_PROCESSING, 'ASYNC': False})
+class JobMatchingTest(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.vdb = VectorDB(path=self.tmp.name, embedding_cache=False)
+        patcher = mock.patch('ats.matching.get_vector_db', return_value=self.vdb)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.applicants = {}
+        for name, vector in [("ana", [1.0, 0.0, 0.0]), ("ben", [0.7, 0.7, 0.0]), ("cy", [0.0, 1.0, 0.0]), ("di", [0.0, 0.0, 1.0])]:
+            self._add_applicant(name, vector)
+        self.job_vectors = {"Backend": [1.0, 0.1, 0.0], "Frontend": [0.0, 1.0, 0.1], "Design": [0.0, 0.2, 1.0]}
+        self.jobs = {title: self._add_job(title) for title in ["Backend", "Frontend"]}
+
+    def _add_applicant(self, name, vector):
+        applicant = Applicant.objects.create(name=name, resume=f"resumes/{name}.pdf")
+        self.vdb.store.append([str(applicant.pk)], np.asarray([vector], dtype=np.float32), [{}], [""])
+        self.applicants[name] = applicant
+        return applicant
+
+    def _add_job(self, title):
+        with mock.patch.object(VectorDB, '_get_embedding', return_value=self.job_vectors[title]), \
+                self.captureOnCommitCallbacks(execute=True):
+            return Job.objects.create(title=title, description=title)
+
+    def _table(self):
+        return sorted(JobMatch.objects.values_list('kind', 'job__title', 'applicant__name'))
+
+    def _suggested(self, job):
+        return [m.applicant.name for m in JobMatch.objects.filter(kind=JobMatch.CANDIDATE, job=job).order_by('-score')]
+
+    def test_incremental_updates_match_a_full_rebuild(self):
+        self.assertEqual(self._suggested(self.jobs["Backend"]), ["ana", "ben"])
+        self.assertEqual([m.job.title for m in self.applicants["di"].job_matches.filter(kind=JobMatch.JOB).order_by('-score')],
+                         ["Frontend", "Backend"])
+
+        design = self._add_job("Design")
+        eve = self._add_applicant("eve", [0.9, 0.0, 0.1])
+        matching.update_for_applicants([eve.pk], self.vdb)
+        self.assertEqual(self._suggested(self.jobs["Backend"]), ["ana", "eve"])
+        self.assertEqual(self._suggested(design), ["di", "cy"])
+        self.assertEqual(JobMatch.objects.filter(kind=JobMatch.JOB, applicant=self.applicants["di"]).count(), 2)
+
+        incremental = self._table()
+        self.assertEqual(matching.rebuild_matches(self.vdb), {"jobs": 3, "applicants": 5})
+        self.assertEqual(self._table(), incremental)
+
+    def test_edited_job_moves_its_matches(self):
+        self.job_vectors["Backend"] = [0.0, 0.0, 1.0]
+        with mock.patch.object(VectorDB, '_get_embedding', return_value=self.job_vectors["Backend"]), \
+                self.captureOnCommitCallbacks(execute=True):
+            self.jobs["Backend"].description = "Now a design job"
+            self.jobs["Backend"].save()
+        self.assertEqual(self._suggested(self.jobs["Backend"])[0], "di")
+        incremental = self._table()
+        matching.rebuild_matches(self.vdb)
+        self.assertEqual(self._table(), incremental)
+
+    def test_saved_job_is_embedded_through_the_backend(self):
+        # No mocked _get_embedding: the job goes through GeminiBackend as a retrieval_query
+        vdb = VectorDB(path=os.path.join(self.tmp.name, 'gemini'), backend=fake_gemini_backend(self), embedding_cache=False)
+        for applicant_id, text in [(self.applicants["ana"].pk, "Python Django backend"), (self.applicants["cy"].pk, "Figma designer")]:
+            self.assertTrue(vdb.add_applicant(applicant_id, text))
+        with mock.patch('ats.matching.get_vector_db', return_value=vdb), self.captureOnCommitCallbacks(execute=True):
+            job = Job.objects.create(title="Python", description="Python Django backend")
+        self.assertIn(job.pk, vdb.jobs)
+        self.assertEqual(self._suggested(job)[0], "ana")
+
+    def test_deleted_job_loses_its_vector_and_store_errors_are_contained(self):
+        frontend = self.jobs["Frontend"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.jobs["Backend"].delete()
+        self.assertIn(frontend.pk, self.vdb.jobs)
+        self.assertEqual(len(self.vdb.jobs), 1)
+        with mock.patch.object(self.vdb, 'delete_job', side_effect=OSError("disk full")), \
+                self.captureOnCommitCallbacks(execute=True):
+            frontend.delete()
+        self.assertFalse(Job.objects.exists())
+
+    def test_pages_serve_suggestions_without_remote_calls(self):
+        with mock.patch.object(VectorDB, '_get_embedding', side_effect=AssertionError("remote call")), \
+                self.assertNumQueries(2):
+            response = self.client.get(reverse('job_detail', args=[self.jobs["Frontend"].pk]))
+        self.assertEqual([m.applicant.name for m in response.context['suggestions']], ["cy", "ben"])
+        response = self.client.get(reverse('applicant_detail', args=[self.applicants["cy"].pk]))
+        self.assertContains(response, "Frontend")
+
+@override_settings(ATS_PROCESSING={**settings.ATS_PROCESSING, 'ASYNC': False},
+                   ATS_PREFILTER={'ENABLED': True, 'THRESHOLD': 0.6})
+class PrefilterTest(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        media = override_settings(MEDIA_ROOT=self.tmp.name)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.vdb = VectorDB(path=os.path.join(self.tmp.name, 'vectors'), embedding_cache=False)
+        self.get_vector_db = mock.Mock(return_value=self.vdb)
+        self.embedding = mock.patch('ats.vector_db.VectorDB._get_embedding', mock.Mock(side_effect=self._embedding))
+        for patcher in (mock.patch('ats.pipeline.get_vector_db', self.get_vector_db), self.embedding):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.job = Job.objects.create(title="Backend", description="Python backend engineer", requirements="Python")
+
+    @staticmethod
+    def _embedding(text, task_type="retrieval_document"):
+        return [1.0, 0.1] if "ython" in text else [0.1, 1.0]
+
+    def _results(self, resume, job_description="", rank=True):
+        text = str(resume)
+        name = text.split()[0]
+        return {
+            "parsed": {"name": name, "email": f"{name.lower()}@example.com", "experience_summary": "6 years"},
+            "skills": {"tech_skills": ["Python"] if "ython" in text else ["Figma"], "confidence_score": 0.9},
+            "ranking": {"total_score": 75, "skill_score": 70, "experience_score": 80, "reason": "ok"} if rank else None,
+        }
+
+    def _applicant(self, name, text):
+        path = os.path.join(self.tmp.name, 'resumes', f'{name}.docx')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        write_docx(path, text)
+        applicant = Applicant.objects.create(job=self.job, resume=f'resumes/{name}.docx')
+        attach_document(applicant, name)
+        return applicant
+
+    def test_only_similar_resumes_are_ranked(self):
+        ana, ben = self._applicant("ana", "Ana writes Python services"), self._applicant("ben", "Ben designs brand identities")
+        with mock.patch.object(Orchestrator, 'process_resume', side_effect=self._results) as process:
+            process_applicant(ana)
+            process_applicant(ben)
+        self.assertEqual([call.kwargs['rank'] for call in process.call_args_list], [True, False])
+
+        ranked, deferred = Evaluation.objects.get(applicant=ana), Evaluation.objects.get(applicant=ben)
+        self.assertEqual((ranked.ranking_status, ranked.total_score), (Evaluation.RANKED, 75))
+        self.assertEqual(deferred.ranking_status, Evaluation.DEFERRED)
+        # Figma only against a Python job, 6 of 5 years: Ana's Python must not count for Ben
+        self.assertEqual((deferred.local_skill_score, deferred.local_experience_score), (0.0, 100.0))
+        expected = 0.3 * deferred.local_similarity_score + 0.2 * 100.0
+        self.assertEqual(deferred.total_score, round(expected))
+        self.assertEqual(Evaluation.objects.get(applicant=ana).local_skill_score, 90.0)
+        self.assertLess(deferred.prefilter_similarity, 0.6)
+        self.assertEqual(ranking_counts(), {'ranked': 1, 'deferred': 1, 'requested': 0, 'avoided_fraction': 0.5})
+        self.assertContains(self.client.get(reverse('dashboard')), "50% of ranking calls avoided")
+
+    def test_gemini_job_embedding_lets_the_prefilter_defer(self):
+        # Through GeminiBackend: the job is embedded as a retrieval_query
+        self.embedding.stop()
+        self.addCleanup(self.embedding.start)
+        self.vdb = VectorDB(path=os.path.join(self.tmp.name, 'gemini'), backend=fake_gemini_backend(self), embedding_cache=False)
+        self.get_vector_db.return_value = self.vdb
+        ana = self._applicant("ana", "Ana, Python backend engineer")
+        ben = self._applicant("ben", "Ben designs brand identities")
+        with mock.patch.object(Orchestrator, 'process_resume', side_effect=self._results):
+            process_applicant(ana)
+            process_applicant(ben)
+        self.assertEqual(Evaluation.objects.get(applicant=ben).ranking_status, Evaluation.DEFERRED)
+        self.assertEqual(ranking_counts()['avoided_fraction'], 0.5)
+
+    def test_deferred_applicant_is_ranked_on_request(self):
+        ben = self._applicant("ben", "Ben designs brand identities")
+        with mock.patch.object(Orchestrator, 'process_resume', side_effect=self._results):
+            process_applicant(ben)
+        ranking = {"total_score": 30, "skill_score": 20, "experience_score": 60, "reason": "no Python"}
+        with mock.patch.object(RankingAgent, 'rank_candidate', return_value=ranking) as rank:
+            response = self.client.post(reverse('request_ranking', args=[ben.pk]))
+        self.assertRedirects(response, reverse('applicant_detail', args=[ben.pk]))
+        rank.assert_called_once()
+        evaluation = Evaluation.objects.get(applicant=ben)
+        self.assertEqual((evaluation.ranking_status, evaluation.total_score), (Evaluation.RANKED, 30))
+        self.assertEqual(ResumeDocument.objects.get(sha256="ben").rankings[ranking_key(self.job.description)], ranking)
@@ -0,0 +1,41 @@
+import hashlib
+from django.core.files.uploadhandler import FileUploadHandler
+
+class HashingUploadHandler(FileUploadHandler):
+    """
+    Computes the sha256 of each uploaded file while it streams through to the
+    next handler (memory or temporary file), so duplicates can be detected
+    without reading the file a second time.
+
+    Must come first in FILE_UPLOAD_HANDLERS. Digests end up on
+    request.upload_hashes, keyed by form field name.
+    """
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.digest = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.digest.update(raw_data)
+        return raw_data
+
+    def file_complete(self, file_size):
+        if not hasattr(self.request, 'upload_hashes'):
+            self.request.upload_hashes = {}
+        self.request.upload_hashes[self.field_name] = self.digest.hexdigest()
+        # Let the next handler build the file object
+        return None
+
+def upload_sha256(request, field_name):
+    """
+    sha256 of an uploaded file: the digest from HashingUploadHandler if it
+    ran, otherwise computed from the file's chunks.
+    """
+    digest = getattr(request, 'upload_hashes', {}).get(field_name)
+    if digest:
+        return digest
+    uploaded = request.FILES[field_name]
+    digest = hashlib.sha256()
+    for chunk in uploaded.chunks():
+        digest.update(chunk)
+    uploaded.seek(0)
+    return digest.hexdigest()
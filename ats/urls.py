@@ -7,4 +7,8 @@ urlpatterns = [
     path('upload/', views.upload_resume, name='upload_resume'),
     path('apply/<int:job_id>/', views.upload_resume, name='apply_job'),
     path('applicant/<int:pk>/', views.applicant_detail, name='applicant_detail'),
+    path('applicant/<int:pk>/rank/', views.request_full_ranking, name='request_ranking'),
+    path('job/<int:pk>/', views.job_detail, name='job_detail'),
+    path('queue/status/', views.queue_status, name='queue_status'),
+    path('search/skills/', views.skill_search, name='skill_search'),
 ]
@@ -1,89 +1,563 @@
-import google.generativeai as genai
 from django.conf import settings
+import numpy as np
 import os
-import json
-import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from itertools import islice
+from .ann import CENTROIDS_FILE, PARAMS_FILE, IVFIndex
+from .caching import get_embedding_cache
+from .embeddings import get_embedding_backend
+from .lexical import BM25Index, reciprocal_rank_fusion
+from .ratelimit import get_rate_limiter
+from .vector_store import SegmentStore, matches_where, normalize_rows
 
-# Configure GenAI
-if settings.GOOGLE_API_KEY:
-    genai.configure(api_key=settings.GOOGLE_API_KEY)
+# Query embeddings for hybrid search run here so a slow call can be abandoned
+_query_pool = None
+_query_pool_lock = threading.Lock()
+
+def _get_query_pool():
+    global _query_pool
+    with _query_pool_lock:
+        if _query_pool is None:
+            _query_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="ats-query-embed")
+    return _query_pool
+
+def open_store(path, kind=None, collection=None):
+    """
+    A vector store of the kind set by ATS_VECTOR_STORE['TYPE']: memory-mapped
+    segment files in the directory `path`, or the rows of the database
+    collection named `collection` (ats/db_store.py).
+    """
+    kind = kind or settings.ATS_VECTOR_STORE['TYPE']
+    if kind == 'files':
+        return SegmentStore(path)
+    if kind == 'database':
+        from .db_store import DatabaseStore
+        return DatabaseStore(collection)
+    raise ValueError(f"Unknown vector store type '{kind}'; expected 'files' or 'database'.")
+
+def collection_names(collection=None):
+    """
+    (applicants, jobs): the database collections of ATS_VECTOR_STORE['COLLECTION']
+    (or `collection`), e.g. ('ats.applicants', 'ats.jobs').
+    """
+    collection = collection or settings.ATS_VECTOR_STORE['COLLECTION']
+    return f"{collection}.applicants", f"{collection}.jobs"
 
 class VectorDB:
-    def __init__(self):
-        # Lightweight JSON storage
-        self.file_path = os.path.join(settings.BASE_DIR, 'vectors.json')
-        self.vectors = self._load_vectors()
-
-    def _load_vectors(self):
-        if os.path.exists(self.file_path):
-            with open(self.file_path, 'r') as f:
-                return json.load(f)
-        return {}
-
-    def _save_vectors(self):
-        with open(self.file_path, 'w') as f:
-            json.dump(self.vectors, f)
-
-    def _get_embedding(self, text):
+    def __init__(self, path=None, index=None, embedding_cache=None, rate_limiter=None, backend=None, store=None,
+                 collection=None):
+        # Segment files under `path` or rows of the `collection` database
+        # collections, see ATS_VECTOR_STORE in settings. The keyword index
+        # is files under `path` either way
+        self.path = path or settings.ATS_VECTOR_STORE_DIR
+        self.kind = store or settings.ATS_VECTOR_STORE['TYPE']
+        applicants, jobs = collection_names(collection)
+        self.store = open_store(self.path, self.kind, applicants)
+        # Optional approximate index, see ATS_VECTOR_INDEX in settings
+        self.index_config = index if index is not None else settings.ATS_VECTOR_INDEX
+        self.ann = None
+        self._ann_generation = None
+        # Where vectors come from, see ATS_EMBEDDINGS in settings
+        self.backend = backend or get_embedding_backend()
+        # Content-addressed embedding cache, shared process-wide by default;
+        # a local backend is cheaper to run than to look up
+        if not self.backend.remote:
+            self.embedding_cache = None
+        else:
+            self.embedding_cache = embedding_cache if embedding_cache is not None else get_embedding_cache()
+        # Retries of failed embedding batches back off like the agents' requests
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        # Job vectors, matched against the applicants' (ats/matching.py)
+        self.jobs = open_store(os.path.join(self.path, 'jobs'), self.kind, jobs)
+        # BM25 over the full resume text, next to the vectors; loaded on first use
+        config = settings.ATS_HYBRID_SEARCH
+        self.lexical = BM25Index(os.path.join(self.path, 'lexical'), k1=config['BM25_K1'], b=config['BM25_B'],
+                                 compact_ratio=config['COMPACT_RATIO'])
+        self._invalidate()
+
+    def _get_embedding(self, text, task_type="retrieval_document"):
+        if self.embedding_cache:
+            cached = self.embedding_cache.get(self.backend.key, task_type, text)
+            if cached is not None:
+                return cached
         try:
-            # Use Gemini for embeddings (lightweight client)
-            result = genai.embed_content(
-                model="models/embedding-001",
-                content=text,
-                task_type="retrieval_document",
-                title="Resume Embedding"
-            )
-            return result['embedding']
+            embedding = self.backend.embed_one(text, task_type)
         except Exception as e:
-            print(f"Error generating embedding: {e}")
+            print(f"Error generating embedding with the {self.backend.name} backend: {e}")
             return []
+        if self.embedding_cache and embedding:
+            self.embedding_cache.set(self.backend.key, task_type, text, embedding)
+        return embedding
+
+    def _embed_batch(self, texts, task_type="retrieval_document"):
+        return self.backend.embed(texts, task_type)
+
+    def _embed_chunk_with_retry(self, texts, task_type, max_retries):
+        for attempt in range(max_retries + 1):
+            try:
+                embeddings = self._embed_batch(texts, task_type)
+                if len(embeddings) != len(texts):
+                    raise ValueError(f"Expected {len(texts)} embeddings, got {len(embeddings)}")
+                return embeddings
+            except Exception as e:
+                if attempt == max_retries:
+                    print(f"Error generating embeddings for a batch of {len(texts)}: {e}")
+                    return [[] for _ in texts]
+                time.sleep(self.rate_limiter.backoff(attempt))
+
+    def _get_embeddings(self, texts, task_type="retrieval_document", batch_size=None, max_workers=None, max_retries=None):
+        """
+        Embed many texts with batched remote requests. Cached texts are served
+        locally; the misses are chunked into requests of `batch_size`, run on at
+        most `max_workers` threads, and each failed chunk is retried. Returns a
+        list aligned with `texts`, holding [] where embedding failed.
+        """
+        config = settings.ATS_EMBEDDING_BATCH
+        batch_size = batch_size or config['BATCH_SIZE']
+        max_workers = max_workers or config['MAX_WORKERS']
+        max_retries = config['MAX_RETRIES'] if max_retries is None else max_retries
+
+        embeddings = [None] * len(texts)
+        missing = []
+        for i, text in enumerate(texts):
+            cached = self.embedding_cache.get(self.backend.key, task_type, text) if self.embedding_cache else None
+            if cached is not None:
+                embeddings[i] = cached
+            else:
+                missing.append(i)
+
+        chunks = [missing[start:start + batch_size] for start in range(0, len(missing), batch_size)]
+        if chunks:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as pool:
+                results = pool.map(
+                    lambda chunk: self._embed_chunk_with_retry([texts[i] for i in chunk], task_type, max_retries),
+                    chunks,
+                )
+                for chunk, chunk_embeddings in zip(chunks, results):
+                    for i, embedding in zip(chunk, chunk_embeddings):
+                        embeddings[i] = embedding
+                        if self.embedding_cache and embedding:
+                            self.embedding_cache.set(self.backend.key, task_type, texts[i], embedding)
+        return embeddings
+
+    def compatible(self, store=None):
+        """
+        Whether `store` (the applicant store by default) holds vectors of
+        this VectorDB's backend, or hasn't recorded one yet.
+        """
+        store = self.store if store is None else store
+        return store.backend in (None, self.backend.key)
+
+    def _warn_incompatible(self, store):
+        print(f"Vector store {store.path} holds '{store.backend}' embeddings but the configured backend is "
+              f"'{self.backend.key}'; run `python manage.py reindex_vectors` to re-embed it.")
+
+    def refresh(self):
+        """
+        Pick up vectors other processes wrote since this VectorDB last looked;
+        a stat of each manifest (or one query per database store) when
+        nothing changed. The keyword index
+        replays its own delta on the next search. A search in another thread
+        holds the store's lock, so a reload waits for it to finish.
+        """
+        self.store.refresh()
+        self.jobs.refresh()
+        return self
+
+    def _invalidate(self):
+        # Search structures are rebuilt lazily on the next query
+        self._generation = None
+        self._ids = None
+        self._metadata = None
+        self._alive = None
+        self._rows = None
+        self._columns = {}
+
+    def _ensure_index(self):
+        """
+        Refresh the id array, metadata and live-row mask from the store.
+        The vectors themselves stay in the store's memory-mapped segments.
+        Callers hold the store's lock until they are done scoring, so the
+        rows can't change between this and the dot products.
+        """
+        if self._generation != self.store.generation:
+            self._ids = self.store.ids
+            self._metadata = self.store.metadata
+            self._alive = self.store.alive
+            self._rows = None
+            self._columns = {}
+            self._generation = self.store.generation
+
+    def _ensure_ann(self):
+        """
+        Returns the IVF index when enabled and trained on enough vectors, else None
+        (callers then fall back to exact search). Centroids are trained once the
+        store reaches MIN_TRAIN_SIZE and retrained after it grows RETRAIN_FACTOR-fold.
+        """
+        config = self.index_config or {}
+        if config.get('TYPE', 'exact') != 'ivf':
+            return None
+
+        if self.ann is None and self.kind == 'database':
+            # Centroids aren't shared through files next to database vectors:
+            # each process trains its own copy in memory
+            self.ann = IVFIndex(nlist=config.get('NLIST', 64), nprobe=config.get('NPROBE', 8))
+        elif self.ann is None:
+            self.ann = IVFIndex.load(self.path, nlist=config.get('NLIST', 64), nprobe=config.get('NPROBE', 8))
+            if self.ann.is_trained and self.ann.centroids.shape[1] != self.store.dim:
+                self.ann = IVFIndex(nlist=config.get('NLIST', 64), nprobe=config.get('NPROBE', 8))
+
+        size = len(self.store)
+        needs_training = (
+            size >= config.get('MIN_TRAIN_SIZE', 1000)
+            and (not self.ann.is_trained or size > self.ann.trained_size * config.get('RETRAIN_FACTOR', 4))
+        )
+        if needs_training:
+            ids, matrix = self.store.live_arrays()
+            self.ann.train(matrix)
+            if self.kind == 'files':
+                self.ann.save(self.path)
+            self.ann.add(ids, matrix)
+            self._ann_generation = self.store.generation
+        elif self.ann.is_trained and self._ann_generation != self.store.generation:
+            # Store changed underneath us (first use, reload): re-assign every vector
+            ids, matrix = self.store.live_arrays()
+            self.ann.clear()
+            self.ann.add(ids, matrix)
+            self._ann_generation = self.store.generation
+
+        return self.ann if self.ann.is_trained else None
+
+    def _metadata_column(self, key):
+        # Column view of one metadata field, cached so repeated filters stay vectorized
+        if key not in self._columns:
+            self._columns[key] = np.asarray([m.get(key) for m in self._metadata], dtype=object)
+        return self._columns[key]
+
+    def _filter_mask(self, where):
+        """
+        Boolean row mask for an equality filter such as {"job": "AI Engineer"}.
+        A list/tuple/set value matches any of its members.
+        """
+        mask = np.ones(len(self._ids), dtype=bool)
+        for key, expected in where.items():
+            column = self._metadata_column(key)
+            if isinstance(expected, (list, tuple, set)):
+                mask &= np.isin(column, list(expected))
+            else:
+                mask &= column == expected
+        return mask
+
+    @staticmethod
+    def _top_k(scores, k):
+        """
+        Indices of the k highest scores, best first, without sorting the whole array.
+        """
+        if k <= 0 or scores.size == 0:
+            return np.empty(0, dtype=np.intp)
+        if k < scores.size:
+            candidates = np.argpartition(-scores, k - 1)[:k]
+        else:
+            candidates = np.arange(scores.size)
+        return candidates[np.argsort(-scores[candidates], kind='stable')]
+
+    def search_by_vector(self, query_embedding, n_results=5, where=None, exact=False, nprobe=None):
+        """
+        Rank stored applicants against an already computed embedding.
+        Uses the ANN index when enabled unless `exact` is set; `nprobe`
+        overrides how many IVF cells are scanned for this query.
+        """
+        with self.store.lock:
+            self._ensure_index()
+            if not len(self.store):
+                return []
+            if not self.compatible():
+                self._warn_incompatible(self.store)
+                return []
+
+            query = np.asarray(query_embedding, dtype=np.float32)
+            if query.shape != (self.store.dim,):
+                print(f"Query dimension {query.shape} does not match index dimension {self.store.dim}")
+                return []
+            query = normalize_rows(query)
 
-    def _cosine_similarity(self, v1, v2):
-        if not v1 or not v2: return 0.0
-        dot_product = sum(a*b for a, b in zip(v1, v2))
-        magnitude1 = math.sqrt(sum(a*a for a in v1))
-        magnitude2 = math.sqrt(sum(b*b for b in v2))
-        if magnitude1 == 0 or magnitude2 == 0: return 0.0
-        return dot_product / (magnitude1 * magnitude2)
+            ann = None if exact else self._ensure_ann()
+            if ann is not None:
+                results = self._search_ann(ann, query, n_results, where, nprobe)
+                if results is not None:
+                    return results
 
-    def add_applicant(self, applicant_id, text_content, metadata=None):
+            # One matrix-vector product per segment; filters and tombstones only pick scores
+            rescore = self._rescore_candidates(n_results) if not exact else None
+            scores = self.store.dot_quantized(query) if rescore else self.store.dot(query)
+            mask = self._filter_mask(where) & self._alive if where else self._alive
+            rows = None if mask.all() else np.flatnonzero(mask)
+            if rows is not None:
+                scores = scores[rows]
+
+            if rescore:
+                # The int8 scan only shortlists; the float32 rows decide the order
+                candidates = self._top_k(scores, rescore)
+                candidates = rows[candidates] if rows is not None else candidates
+                scores = self.store.dot_rows(candidates, query)
+                top = self._top_k(scores, n_results)
+                positions = candidates[top]
+            else:
+                top = self._top_k(scores, n_results)
+                if rows is not None:
+                    positions = rows[top]
+                else:
+                    positions = top
+
+            return [
+                {
+                    'id': self._ids[pos],
+                    'score': float(scores[i]),
+                    'metadata': self._metadata[pos]
+                }
+                for i, pos in zip(top, positions)
+            ]
+
+    def _rescore_candidates(self, n_results):
+        """
+        How many int8-scan candidates to re-score in float32, or None when
+        quantized scans are off or the store is too small for them to pay off.
+        """
+        config = self.index_config or {}
+        if config.get('QUANTIZE', 'none') != 'int8':
+            return None
+        candidates = max(config.get('RESCORE', 100), 4 * n_results)
+        return candidates if len(self.store) > candidates else None
+
+    def similarities(self, ids, query_embedding):
+        """
+        Cosine similarity of each id's stored vector to the query embedding,
+        aligned with `ids`; NaN for ids without a vector.
+        """
+        with self.store.lock:
+            self._ensure_index()
+            scores = np.full(len(ids), np.nan, dtype=np.float32)
+            query = np.asarray(query_embedding, dtype=np.float32)
+            if not len(self.store) or query.shape != (self.store.dim,) or not self.compatible():
+                return scores
+            if self._rows is None:
+                self._rows = {vid: row for row, vid in enumerate(self._ids) if self._alive[row]}
+            positions = np.fromiter((self._rows.get(str(vid), -1) for vid in ids), dtype=np.int64, count=len(ids))
+            found = positions >= 0
+            if found.any():
+                scores[found] = self.store.dot_rows(positions[found], normalize_rows(query))
+            return scores
+
+    def _search_ann(self, ann, query, n_results, where, nprobe):
+        # Over-fetch when filtering; None means "not enough hits, use exact search"
+        fetch = n_results * 4 if where else n_results
+        ids, scores = ann.search(query, fetch, nprobe=nprobe)
+        results = []
+        for vid, score in zip(ids, scores):
+            metadata = self.store.get(vid)['metadata']
+            if where and not self._matches(metadata, where):
+                continue
+            results.append({'id': vid, 'score': float(score), 'metadata': metadata})
+            if len(results) == n_results:
+                break
+        if where and len(results) < n_results:
+            return None
+        return results
+
+    @staticmethod
+    def _matches(metadata, where):
+        return matches_where(metadata, where)
+
+    def add_applicant(self, applicant_id, text_content, metadata=None, embedding=None):
         """
-        Add applicant text to vector store.
+        Add applicant text to vector store. An `embedding` of the text that
+        was already computed (e.g. by the ranking prefilter) saves the request.
+        Returns whether the applicant got a vector; it is indexed for keyword
+        search either way.
         """
         if metadata is None: metadata = {}
         str_id = str(applicant_id)
-        
-        embedding = self._get_embedding(text_content)
-        if embedding:
-            self.vectors[str_id] = {
-                "embedding": embedding,
-                "metadata": metadata,
-                "text": text_content[:200] # Store snippet only
-            }
-            self._save_vectors()
 
-    def query_similar_applicants(self, query_text, n_results=5):
+        # Indexed lexically even if embedding fails, so keyword search still finds it
+        self.lexical.add([str_id], [text_content], [metadata])
+        if embedding is None or not len(embedding):
+            embedding = self._get_embedding(text_content)
+        if not len(embedding):
+            print(f"Applicant {applicant_id} has no vector yet (the {self.backend.name} embedding backend failed); "
+                  f"`python manage.py reindex_vectors` embeds it again.")
+            return False
+        with self.store.lock:
+            generation = self.store.generation
+            try:
+                # Store snippet only
+                self.store.append([str_id], [embedding], [metadata], [text_content[:200]], backend=self.backend.key)
+            except ValueError as e:
+                print(f"Error storing embedding: {e}")
+                return False
+            self._sync_ann([str_id], generation)
+        return True
+
+    def _sync_ann(self, ids, generation_before):
+        """
+        Apply our own write to a live ANN index incrementally instead of
+        re-assigning the whole store on the next query. Only valid if the
+        index was current right before the write and the write was the
+        store's only change (it may also have picked up other processes').
+        """
+        if self.ann is None or not self.ann.is_trained or self._ann_generation != generation_before:
+            return
+        if self.store.generation != generation_before + 1:
+            return
+        live = [vid for vid in ids if vid in self.store]
+        self.ann.remove([vid for vid in ids if vid not in self.store])
+        if live:
+            self.ann.add(live, np.stack([self.store.get(vid)['embedding'] for vid in live]))
+        self._ann_generation = self.store.generation
+
+    def add_applicants_bulk(self, applicants, commit_every=None, batch_size=None, max_workers=None, max_retries=None):
+        """
+        Add many applicants at once. `applicants` is any iterable of
+        (applicant_id, text_content, metadata) tuples and is consumed lazily.
+        Documents are embedded in batched requests and the store is written
+        once per `commit_every` documents instead of once per applicant.
+
+        Returns {"added": count, "failed": [applicant_id, ...]}.
+        """
+        commit_every = commit_every or settings.ATS_EMBEDDING_BATCH['COMMIT_EVERY']
+        added, failed = 0, []
+        iterator = iter(applicants)
+        while True:
+            batch = list(islice(iterator, commit_every))
+            if not batch:
+                break
+            texts = [text for _, text, _ in batch]
+            self.lexical.add([str(applicant_id) for applicant_id, _, _ in batch], texts, [meta or {} for _, _, meta in batch])
+            embeddings = self._get_embeddings(texts, batch_size=batch_size, max_workers=max_workers, max_retries=max_retries)
+
+            dim = self.store.dim or next((len(e) for e in embeddings if e), None)
+            ids, rows, metadata, snippets = [], [], [], []
+            for (applicant_id, text, meta), embedding in zip(batch, embeddings):
+                if not embedding or len(embedding) != dim:
+                    failed.append(applicant_id)
+                    continue
+                ids.append(str(applicant_id))
+                rows.append(embedding)
+                metadata.append(meta or {})
+                snippets.append(text[:200]) # Store snippet only
+            if ids:
+                with self.store.lock:
+                    generation = self.store.generation
+                    self.store.append(ids, np.asarray(rows, dtype=np.float32), metadata, snippets, backend=self.backend.key)
+                    self._sync_ann(ids, generation)
+                added += len(ids)
+        if self.embedding_cache:
+            self.embedding_cache.flush_stats()
+        return {"added": added, "failed": failed}
+
+    def query_similar_applicants(self, query_text, n_results=5, where=None, nprobe=None):
         """
         Find applicants similar to the query text.
+        `where` optionally restricts results by metadata, e.g. {"job": "AI Engineer"}.
         """
         query_embedding = self._get_embedding(query_text)
         if not query_embedding: return []
+        return self.search_by_vector(query_embedding, n_results=n_results, where=where, nprobe=nprobe)
+
+    def hybrid_search(self, query_text, n_results=5, where=None, embed_timeout=None):
+        """
+        BM25 and vector search fused by reciprocal rank. The query embedding
+        runs in the background while the lexical search happens; if it fails
+        or takes longer than `embed_timeout` (ATS_HYBRID_SEARCH['EMBED_TIMEOUT'])
+        the lexical results are returned alone. Each result lists its
+        'sources' ("vector", "lexical").
+        """
+        config = settings.ATS_HYBRID_SEARCH
+        timeout = config['EMBED_TIMEOUT'] if embed_timeout is None else embed_timeout
+        candidates = max(n_results, config['CANDIDATES'])
+
+        future = _get_query_pool().submit(self._get_embedding, query_text, "retrieval_query")
+        lexical = self.lexical.search(query_text, n_results=candidates, where=where)
+        try:
+            embedding = future.result(timeout=timeout)
+        except FutureTimeoutError:
+            print(f"Warning: query embedding took longer than {timeout}s; using keyword search only")
+            embedding = []
+        vector = self.search_by_vector(embedding, n_results=candidates, where=where) if embedding else []
+
+        if not vector:
+            return [{**result, 'sources': ['lexical']} for result in lexical[:n_results]]
+        return reciprocal_rank_fusion({'vector': vector, 'lexical': lexical}, k=config['RRF_K'], n_results=n_results)
 
-        scores = []
-        for aid, data in self.vectors.items():
-            score = self._cosine_similarity(query_embedding, data['embedding'])
-            scores.append({
-                'id': aid,
-                'score': score,
-                'metadata': data['metadata']
-            })
-        
-        # Sort by score desc
-        scores.sort(key=lambda x: x['score'], reverse=True)
-        return scores[:n_results]
+    @staticmethod
+    def job_text(job):
+        return f"{job.title}\n{job.description}\n{job.requirements or ''}"
+
+    def add_job(self, job):
+        """
+        Embed a job's text as a query and store it (replacing the previous
+        vector after an edit). Returns the embedding, [] on failure.
+        """
+        embedding = self._get_embedding(self.job_text(job), "retrieval_query")
+        if embedding:
+            try:
+                self.jobs.append([str(job.pk)], [embedding], [{"title": job.title}], backend=self.backend.key)
+            except ValueError as e:
+                print(f"Error storing job embedding: {e}")
+                return []
+        return embedding
+
+    def job_embedding(self, job):
+        """The stored vector of a job, embedding the job first if it has none."""
+        row = self.jobs.get(job.pk) if self.compatible(self.jobs) else None
+        if row is not None:
+            return row['embedding']
+        return self.add_job(job)
+
+    def delete_job(self, job_id):
+        return self.jobs.delete([job_id])
+
+    def reset_vectors(self):
+        """
+        Drop every applicant and job vector and the trained IVF centroids,
+        e.g. before re-embedding with another backend. The keyword index
+        doesn't depend on the backend and is kept.
+        """
+        with self.store.lock:
+            self.store.clear()
+            self.jobs.clear()
+            for name in (CENTROIDS_FILE, PARAMS_FILE):
+                try:
+                    os.remove(os.path.join(self.path, name))
+                except FileNotFoundError:
+                    pass
+            self.ann = None
+            self._ann_generation = None
+            self._invalidate()
 
     def delete_applicant(self, applicant_id):
-        str_id = str(applicant_id)
-        if str_id in self.vectors:
-            del self.vectors[str_id]
-            self._save_vectors()
+        self.lexical.delete([applicant_id])
+        with self.store.lock:
+            generation = self.store.generation
+            if self.store.delete([applicant_id]):
+                self._sync_ann([str(applicant_id)], generation)
+
+_vector_dbs = {}
+_vector_dbs_lock = threading.Lock()
+
+def get_vector_db():
+    """
+    Process-wide VectorDB for ATS_VECTOR_STORE_DIR and the configured
+    embedding backend, refreshed from disk (or the database) on every call.
+    Building one reads every stored vector's metadata, so requests share it
+    instead.
+    """
+    backend = get_embedding_backend()
+    key = (settings.ATS_VECTOR_STORE_DIR, settings.ATS_VECTOR_STORE['TYPE'], settings.ATS_VECTOR_STORE['COLLECTION'],
+           backend.key)
+    with _vector_dbs_lock:
+        if key not in _vector_dbs:
+            _vector_dbs[key] = VectorDB(backend=backend)
+        vdb = _vector_dbs[key]
+    return vdb.refresh()
@@ -0,0 +1,547 @@
+import json
+import os
+import threading
+import numpy as np
+
+MANIFEST = 'manifest.json'
+FORMAT_VERSION = 1
+
+def normalize_rows(matrix):
+    """
+    L2-normalize rows so cosine similarity becomes a plain dot product.
+    Zero rows stay zero (and therefore score 0.0).
+    """
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+def quantize_rows(matrix):
+    """
+    Symmetric per-row int8 quantization: row ~= codes * scale, with the
+    row's largest absolute value mapped to 127. Returns (codes, scales).
+    """
+    matrix = np.asarray(matrix, dtype=np.float32)
+    scales = np.abs(matrix).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.clip(np.rint(matrix / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+def dot_int8(codes, scales, query, out, buffer):
+    """
+    `out[:] = (codes * scales[:, None]) @ query` for int8 codes, dequantizing
+    len(buffer) rows at a time into `buffer`, which is small enough to stay
+    in the CPU cache, so no float32 copy of the rows is ever made.
+    """
+    block = len(buffer)
+    for start in range(0, len(codes), block):
+        chunk = codes[start:start + block]
+        rows = buffer[:len(chunk)]
+        np.copyto(rows, chunk, casting='unsafe')
+        np.matmul(rows, query, out=out[start:start + len(chunk)])
+        out[start:start + len(chunk)] *= scales[start:start + block]
+    return out
+
+def last_occurrences(ids, matrix, metadata, texts):
+    """A batch may repeat an id; keep the last occurrence only."""
+    last = {vid: i for i, vid in enumerate(ids)}
+    if len(last) == len(ids):
+        return ids, matrix, metadata, texts
+    keep = sorted(last.values())
+    return [ids[i] for i in keep], matrix[keep], [metadata[i] for i in keep], [texts[i] for i in keep]
+
+def matches_where(metadata, where):
+    """
+    Equality filter on a metadata dict, e.g. {"job": "AI Engineer"}.
+    A list/tuple/set value matches any of its members.
+    """
+    for key, expected in where.items():
+        value = metadata.get(key)
+        if isinstance(expected, (list, tuple, set)):
+            if value not in expected:
+                return False
+        elif value != expected:
+            return False
+    return True
+
+def _atomic_write(path, write):
+    # A temporary name per process and thread, so concurrent writers of one file don't share it
+    tmp_path = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+class Segment:
+    """
+    One immutable block of vectors: a float32 .npy matrix (memory-mapped on load)
+    plus a JSON sidecar holding the ids, metadata and text snippets of its rows.
+    `codes`/`scales` are the int8 copy used for quantized scans; None until
+    opened or, for segments written before they existed, created.
+    """
+    def __init__(self, name, matrix, ids, metadata, texts, codes=None, scales=None):
+        self.name = name
+        self.matrix = matrix
+        self.ids = ids
+        self.metadata = metadata
+        self.texts = texts
+        self.codes = codes
+        self.scales = scales
+
+    def __len__(self):
+        return len(self.ids)
+
+class SegmentStore:
+    """
+    Append-only binary vector store.
+
+    Directory layout:
+        manifest.json         dim, embedding backend, live segment names and
+                              per-segment tombstones
+        seg-000001.npy        pre-normalized float32 rows, opened with mmap
+        seg-000001.i8.npy     int8 codes of the same rows (mmap), for
+        seg-000001.scale.npy  quantized scans, and their per-row scales
+        seg-000001.json       {"ids": [...], "metadata": [...], "text": [...]}
+
+    Appends write a new segment and rewrite only the manifest. Deletes and
+    replacements tombstone rows in the manifest. Small trailing segments are
+    merged geometrically, so the segment count stays logarithmic in the row
+    count and each row is rewritten O(log N) times overall.
+
+    `backend` is the key of the embedding backend that produced the vectors
+    (ats/embeddings.py); appends from another backend are rejected. Stores
+    written before backends were recorded have None until the next append.
+
+    Writes by other processes are picked up by `refresh()`, which re-reads
+    the manifest only when its mtime/inode changed; appends and deletes
+    refresh first.
+
+    Writes and reloads hold `lock`; a reader that combines several calls
+    (ids, alive, dot, ...) holds it too so they all see the same rows.
+    """
+    def __init__(self, path):
+        self.path = str(path)
+        self.dim = None
+        self.backend = None
+        self.segments = []
+        self.tombstones = {}
+        self.generation = 0
+        self._next_segment = 1
+        self._locations = {}
+        self._views = None
+        self._stamp = None
+        self._lock = threading.RLock()
+        self.load()
+
+    # Loading
+
+    def _manifest_stamp(self):
+        # Manifests are replaced atomically, so a new write means a new inode
+        try:
+            stat = os.stat(os.path.join(self.path, MANIFEST))
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_ino)
+
+    def load(self):
+        # Segments are immutable and never renamed: keep the ones already open
+        opened = {segment.name: segment for segment in self.segments}
+        while True:
+            stamp = self._manifest_stamp()
+            if stamp is None:
+                manifest, segments = {}, []
+                break
+            try:
+                with open(os.path.join(self.path, MANIFEST), 'r') as f:
+                    manifest = json.load(f)
+                segments = [opened.get(name) or self._open_segment(name) for name in manifest.get('segments', [])]
+                break
+            except FileNotFoundError:
+                # Another process compacted the segments away after we read the
+                # manifest: its new manifest lists their replacement
+                if self._manifest_stamp() == stamp:
+                    raise
+        self._stamp = stamp
+        if manifest:
+            self.dim = manifest.get('dim')
+            self.backend = manifest.get('backend')
+            self._next_segment = manifest.get('next_segment', 1)
+        self.segments = segments
+        self.tombstones = {name: set(rows) for name, rows in manifest.get('tombstones', {}).items()}
+        self._changed()
+
+    def refresh(self):
+        """
+        Reload if another process (or another SegmentStore) changed the
+        manifest since this one last read or wrote it. Costs one stat call
+        when nothing changed. Returns whether it reloaded.
+        """
+        with self._lock:
+            if self._manifest_stamp() == self._stamp:
+                return False
+            self.load()
+            return True
+
+    def _open_segment(self, name):
+        matrix = np.load(os.path.join(self.path, name + '.npy'), mmap_mode='r')
+        with open(os.path.join(self.path, name + '.json'), 'r') as f:
+            sidecar = json.load(f)
+        segment = Segment(name, matrix, sidecar['ids'], sidecar['metadata'], sidecar['text'])
+        self._open_codes(segment)
+        return segment
+
+    def _open_codes(self, segment):
+        codes_path = os.path.join(self.path, segment.name + '.i8.npy')
+        scales_path = os.path.join(self.path, segment.name + '.scale.npy')
+        if os.path.exists(codes_path) and os.path.exists(scales_path):
+            segment.codes = np.load(codes_path, mmap_mode='r')
+            segment.scales = np.load(scales_path, mmap_mode='r')
+
+    def _write_codes(self, name, matrix):
+        codes, scales = quantize_rows(matrix)
+        # Scales last: _open_codes only uses codes once both files exist
+        _atomic_write(os.path.join(self.path, name + '.i8.npy'), lambda f: np.save(f, codes))
+        _atomic_write(os.path.join(self.path, name + '.scale.npy'), lambda f: np.save(f, scales))
+
+    def _ensure_codes(self, segment):
+        """
+        Segments written before int8 codes existed get them on first use
+        (new and merged segments are written with them). Under the store
+        lock, so concurrent searches write them once; another process may
+        have written them meanwhile.
+        """
+        if segment.codes is not None:
+            return
+        with self._lock:
+            if segment.codes is not None:
+                return
+            self._open_codes(segment)
+            if segment.codes is not None:
+                return
+            if segment in self.segments and os.path.exists(os.path.join(self.path, segment.name + '.npy')):
+                self._write_codes(segment.name, segment.matrix)
+                self._open_codes(segment)
+            else:
+                # Compacted away while we searched it: don't leave files behind
+                segment.codes, segment.scales = quantize_rows(segment.matrix)
+
+    def _changed(self):
+        # Rebuild the id -> (segment, row) map; later segments win for duplicate ids
+        self._locations = {}
+        for seg_index, segment in enumerate(self.segments):
+            dead = self.tombstones.get(segment.name, ())
+            for row, vid in enumerate(segment.ids):
+                if row not in dead:
+                    self._locations[vid] = (seg_index, row)
+        self._views = None
+        self.generation += 1
+
+    # Writing
+
+    def _write_segment(self, matrix, ids, metadata, texts):
+        os.makedirs(self.path, exist_ok=True)
+        name = f"seg-{self._next_segment:06d}"
+        self._next_segment += 1
+        _atomic_write(os.path.join(self.path, name + '.npy'), lambda f: np.save(f, np.ascontiguousarray(matrix, dtype=np.float32)))
+        self._write_codes(name, matrix)
+        sidecar = json.dumps({"ids": ids, "metadata": metadata, "text": texts}).encode()
+        _atomic_write(os.path.join(self.path, name + '.json'), lambda f: f.write(sidecar))
+        return self._open_segment(name)
+
+    def _save_manifest(self):
+        manifest = json.dumps({
+            "format": FORMAT_VERSION,
+            "dim": self.dim,
+            "backend": self.backend,
+            "next_segment": self._next_segment,
+            "segments": [s.name for s in self.segments],
+            "tombstones": {name: sorted(rows) for name, rows in self.tombstones.items() if rows},
+        }).encode()
+        os.makedirs(self.path, exist_ok=True)
+        _atomic_write(os.path.join(self.path, MANIFEST), lambda f: f.write(manifest))
+        self._stamp = self._manifest_stamp()
+
+    def _remove_segment_files(self, names):
+        for name in names:
+            for ext in ('.npy', '.json', '.i8.npy', '.scale.npy'):
+                try:
+                    os.remove(os.path.join(self.path, name + ext))
+                except OSError:
+                    pass
+
+    def _tombstone(self, vid):
+        location = self._locations.pop(vid, None)
+        if location is None:
+            return False
+        seg_index, row = location
+        self.tombstones.setdefault(self.segments[seg_index].name, set()).add(row)
+        return True
+
+    def append(self, ids, embeddings, metadata=None, texts=None, backend=None):
+        """
+        Add (or replace) rows as one new segment. `backend` is the key of
+        the embedding backend that produced them.
+        """
+        with self._lock:
+            ids = [str(vid) for vid in ids]
+            if not ids:
+                return
+            # Start from the latest manifest, not a stale copy of it
+            self.refresh()
+            matrix = normalize_rows(embeddings)
+            if matrix.ndim != 2 or matrix.shape[0] != len(ids):
+                raise ValueError("Expected one embedding per id")
+            if backend is not None and self.backend not in (None, backend):
+                raise ValueError(f"Embeddings from backend '{backend}' cannot be mixed with the store's '{self.backend}' vectors")
+            if self.dim is None:
+                self.dim = int(matrix.shape[1])
+            elif matrix.shape[1] != self.dim:
+                raise ValueError(f"Embedding dimension {matrix.shape[1]} does not match store dimension {self.dim}")
+            if backend is not None:
+                self.backend = backend
+
+            metadata = list(metadata) if metadata is not None else [{} for _ in ids]
+            texts = list(texts) if texts is not None else ["" for _ in ids]
+
+            ids, matrix, metadata, texts = last_occurrences(ids, matrix, metadata, texts)
+
+            for vid in ids:
+                self._tombstone(vid)
+            self.segments.append(self._write_segment(matrix, ids, metadata, texts))
+            obsolete = self._maybe_compact()
+            self._save_manifest()
+            self._remove_segment_files(obsolete)
+            self._changed()
+
+    def delete(self, ids):
+        with self._lock:
+            self.refresh()
+            removed = [vid for vid in (str(v) for v in ids) if self._tombstone(vid)]
+            if removed:
+                self._save_manifest()
+                self._changed()
+            return len(removed)
+
+    def _live_rows(self, segment):
+        dead = self.tombstones.get(segment.name)
+        if not dead:
+            return np.arange(len(segment))
+        return np.asarray([row for row in range(len(segment)) if row not in dead], dtype=np.intp)
+
+    def _merge(self, segments):
+        matrices, ids, metadata, texts = [], [], [], []
+        for segment in segments:
+            rows = self._live_rows(segment)
+            matrices.append(np.asarray(segment.matrix[rows]))
+            ids.extend(segment.ids[i] for i in rows)
+            metadata.extend(segment.metadata[i] for i in rows)
+            texts.extend(segment.texts[i] for i in rows)
+        if not ids:
+            return None
+        return self._write_segment(np.concatenate(matrices), ids, metadata, texts)
+
+    def _live_count(self, segment):
+        return len(segment) - len(self.tombstones.get(segment.name, ()))
+
+    def _maybe_compact(self):
+        """
+        Merge the last two segments while the newer one is at least half the
+        size of the older one. Returns the names of segments made obsolete.
+        """
+        obsolete = []
+        while len(self.segments) >= 2 and self._live_count(self.segments[-1]) * 2 >= self._live_count(self.segments[-2]):
+            pair = self.segments[-2:]
+            merged = self._merge(pair)
+            del self.segments[-2:]
+            for segment in pair:
+                self.tombstones.pop(segment.name, None)
+                obsolete.append(segment.name)
+            if merged is not None:
+                self.segments.append(merged)
+        return obsolete
+
+    def compact(self):
+        """
+        Rewrite every live row into a single segment.
+        """
+        with self._lock:
+            if len(self.segments) <= 1 and not any(self.tombstones.values()):
+                return
+            old = list(self.segments)
+            merged = self._merge(old)
+            self.segments = [merged] if merged is not None else []
+            self.tombstones = {}
+            self._save_manifest()
+            self._remove_segment_files([s.name for s in old])
+            self._changed()
+
+    def clear(self):
+        """
+        Drop every row and forget the dimension and backend, e.g. before
+        re-embedding the store with another backend.
+        """
+        with self._lock:
+            old = list(self.segments)
+            self.segments = []
+            self.tombstones = {}
+            self.dim = None
+            self.backend = None
+            self._save_manifest()
+            self._remove_segment_files([s.name for s in old])
+            self._changed()
+
+    # Reading
+
+    @property
+    def lock(self):
+        return self._lock
+
+    def __len__(self):
+        return len(self._locations)
+
+    def __contains__(self, vid):
+        return str(vid) in self._locations
+
+    def get(self, vid):
+        """
+        Returns {"embedding", "metadata", "text"} for a live id, or None.
+        """
+        with self._lock:
+            location = self._locations.get(str(vid))
+            if location is None:
+                return None
+            segment = self.segments[location[0]]
+            row = location[1]
+            return {
+                "embedding": np.asarray(segment.matrix[row]),
+                "metadata": segment.metadata[row],
+                "text": segment.texts[row],
+            }
+
+    def _build_views(self):
+        ids, metadata, alive = [], [], []
+        offsets = np.cumsum([0] + [len(segment) for segment in self.segments])
+        for segment in self.segments:
+            ids.extend(segment.ids)
+            metadata.extend(segment.metadata)
+            mask = np.ones(len(segment), dtype=bool)
+            dead = self.tombstones.get(segment.name)
+            if dead:
+                mask[list(dead)] = False
+            alive.append(mask)
+        self._views = {
+            "ids": np.asarray(ids, dtype=object),
+            "metadata": metadata,
+            "alive": np.concatenate(alive) if alive else np.empty(0, dtype=bool),
+            "offsets": offsets,
+        }
+
+    @property
+    def ids(self):
+        """All stored row ids (including tombstoned rows), in row order."""
+        if self._views is None:
+            self._build_views()
+        return self._views["ids"]
+
+    @property
+    def metadata(self):
+        if self._views is None:
+            self._build_views()
+        return self._views["metadata"]
+
+    @property
+    def alive(self):
+        """Boolean mask of rows that are neither deleted nor replaced."""
+        if self._views is None:
+            self._build_views()
+        return self._views["alive"]
+
+    def dot(self, query):
+        """
+        Scores of every stored row against a normalized query, computed segment
+        by segment directly on the memory-mapped matrices.
+        """
+        if not self.segments:
+            return np.empty(0, dtype=np.float32)
+        return np.concatenate([segment.matrix @ query for segment in self.segments])
+
+    def dot_quantized(self, query, block=512):
+        """
+        Approximate scores of every stored row (like `dot`) from the int8
+        codes, which are a quarter of the float32 rows' size (see dot_int8).
+        """
+        if not self.segments:
+            return np.empty(0, dtype=np.float32)
+        query = np.asarray(query, dtype=np.float32)
+        scores = np.empty(sum(len(segment) for segment in self.segments), dtype=np.float32)
+        buffer = np.empty((block, len(query)), dtype=np.float32)
+        offset = 0
+        for segment in self.segments:
+            self._ensure_codes(segment)
+            dot_int8(segment.codes, segment.scales, query, scores[offset:offset + len(segment)], buffer)
+            offset += len(segment)
+        return scores
+
+    def dot_rows(self, positions, query):
+        """
+        Exact float32 scores of the rows at `positions` (indices into `ids`),
+        reading only those rows of the memory-mapped matrices.
+        """
+        if self._views is None:
+            self._build_views()
+        positions = np.asarray(positions, dtype=np.int64)
+        scores = np.empty(len(positions), dtype=np.float32)
+        owners = np.searchsorted(self._views["offsets"], positions, side='right') - 1
+        for seg_index in np.unique(owners):
+            selected = np.flatnonzero(owners == seg_index)
+            rows = positions[selected] - self._views["offsets"][seg_index]
+            scores[selected] = self.segments[seg_index].matrix[rows] @ query
+        return scores
+
+    def live_arrays(self):
+        """(ids, matrix) of every live row; the matrix is an in-memory copy."""
+        ids, matrices = [], []
+        with self._lock:
+            for segment in self.segments:
+                rows = self._live_rows(segment)
+                ids.extend(segment.ids[i] for i in rows)
+                matrices.append(np.asarray(segment.matrix[rows]))
+            if not matrices:
+                return [], np.empty((0, self.dim or 0), dtype=np.float32)
+        return ids, np.concatenate(matrices)
+
+    def iter_live(self):
+        """Yields (id, embedding, metadata, text) for every live row."""
+        for segment in self.segments:
+            for row in self._live_rows(segment):
+                yield segment.ids[row], np.asarray(segment.matrix[row]), segment.metadata[row], segment.texts[row]
+
+    @classmethod
+    def from_json(cls, json_path, path):
+        """
+        One-shot migration of a legacy vectors.json into a new store.
+        Returns (store, converted, skipped).
+        """
+        with open(json_path, 'r') as f:
+            vectors = json.load(f)
+        store = cls(path)
+        ids, rows, metadata, texts = [], [], [], []
+        skipped = 0
+        for vid, data in vectors.items():
+            embedding = data.get('embedding')
+            if not embedding or (rows and len(embedding) != len(rows[0])):
+                skipped += 1
+                continue
+            ids.append(vid)
+            rows.append(embedding)
+            metadata.append(data.get('metadata') or {})
+            texts.append(data.get('text', ''))
+        if rows:
+            store.append(ids, np.asarray(rows, dtype=np.float32), metadata, texts)
+        return store, len(ids), skipped
@@ -1,38 +1,16 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.views.decorators.http import require_POST
+from django.http import JsonResponse
+from django.db.models import F, OuterRef, Prefetch, Q, Subquery
 from .forms import ResumeUploadForm
-from .models import Applicant, Evaluation, Skill, ApplicantSkill, Job
+from .models import Applicant, ApplicantSkill, Job, JobMatch, ProcessingJob, ResumeDocument
 
-from .agents import Orchestrator
-from .vector_db import VectorDB
+from .pipeline import attach_document, extract_text_from_file, process_applicant, ranking_counts, ranking_key, request_ranking
+from .skill_index import get_skill_index
+from .skills import normalize_skill
+from .tasks import enqueue_applicant, queue_counts
+from .uploads import upload_sha256
 from django.conf import settings
-import os
-try:
-    import docx2txt
-except ImportError:
-    docx2txt = None
-try:
-    from pypdf import PdfReader
-except ImportError:
-    PdfReader = None
-
-def extract_text_from_file(file_path):
-    ext = os.path.splitext(file_path)[1].lower()
-    text = ""
-    if ext == '.pdf':
-        if PdfReader:
-            try:
-                reader = PdfReader(file_path)
-                for page in reader.pages:
-                    text += page.extract_text() + "\n"
-            except Exception as e:
-                print(f"Error reading PDF: {e}")
-    elif ext == '.docx':
-        if docx2txt:
-            try:
-                text = docx2txt.process(file_path)
-            except Exception as e:
-                print(f"Error reading DOCX: {e}")
-    return text
 
 def upload_resume(request, job_id=None):
     job = None
@@ -45,69 +23,28 @@ def upload_resume(request, job_id=None):
             applicant = form.save(commit=False) # Don't save yet
             if job:
                 applicant.job = job
+            # Identical bytes were uploaded before: point at the stored file instead of writing a copy
+            sha256 = upload_sha256(request, 'resume')
+            document = ResumeDocument.objects.filter(sha256=sha256).first()
+            if document and document.file.storage.exists(document.file.name):
+                applicant.resume = document.file.name
             applicant.save()
-            
+            document = attach_document(applicant, sha256)
+
+            # Results already known for this job need no AI calls, so there is nothing to queue
+            reusable = bool(document.parsed_data) and ranking_key(job.description if job else "") in document.rankings
+            if settings.ATS_PROCESSING['ASYNC'] and not reusable:
+                # Hand off to `manage.py run_ats_worker` and return immediately
+                enqueue_applicant(applicant)
+                return redirect('dashboard')
+
             # Processing Logic (Orchestrator)
-            file_path = applicant.resume.path
-            resume_text = extract_text_from_file(file_path)
-            
-            if resume_text:
-                try:
-                    orchestrator = Orchestrator()
-                    # Pass Job Description context
-                    jd_context = job.description if job else ""
-                    results = orchestrator.process_resume(resume_text, job_description=jd_context)
-                    
-                    if not results or not results.get('parsed'):
-                        raise ValueError("Failed to parse resume or AI quota exceeded.")
-
-                    # Update Applicant
-                    parsed = results['parsed']
-                    email = parsed.get('email')
-                    
-                    if email:
-                        # Handle Duplicate: Delete existing applicant with same email to replace with new one
-                        # BUT, maybe we want to allow same person applying for different jobs?
-                        # For now, let's keep it per-job unique or global unique. 
-                        # To keep it simple, global unique overwrite for now as per previous logic.
-                        existing = Applicant.objects.filter(email=email).exclude(pk=applicant.pk)
-                        if existing.exists():
-                           existing.delete()
-
-                        applicant.email = email
-                    
-                    applicant.name = parsed.get('name')
-                    applicant.phone = parsed.get('phone')
-                    applicant.experience_summary = parsed.get('experience_summary')
-                    applicant.parsed_data = parsed
-                    applicant.save()
-                    
-                    # Save Skills
-                    if results.get('skills'):
-                        tech_skills = results['skills'].get('tech_skills', [])
-                        confidence = results['skills'].get('confidence_score', 0.0)
-                        for skill_name in tech_skills:
-                            skill_obj, created = Skill.objects.get_or_create(name=skill_name.lower())
-                            ApplicantSkill.objects.create(applicant=applicant, skill=skill_obj, confidence=confidence)
-                    
-                    # Save Evaluation
-                    if results.get('ranking'):
-                        Evaluation.objects.create(
-                            applicant=applicant,
-                            total_score=results['ranking'].get('total_score', 0),
-                            skill_score=results['ranking'].get('skill_score', 0),
-                            experience_score=results['ranking'].get('experience_score', 0),
-                            reason=results['ranking'].get('reason', '')
-                        )
-                    
-                    # Save to VectorDB
-                    vdb = VectorDB()
-                    vdb.add_applicant(applicant.id, resume_text, metadata={"name": applicant.name or "Unknown", "job": job.title if job else "General"})
-                
-                except Exception as e:
-                    print(f"Error processing resume: {e}")
-                    applicant.delete()
-                    return render(request, 'ats/upload.html', {'form': form, 'error': f"Processing failed: {str(e)}", 'job': job})
+            try:
+                process_applicant(applicant)
+            except Exception as e:
+                print(f"Error processing resume: {e}")
+                applicant.delete()
+                return render(request, 'ats/upload.html', {'form': form, 'error': f"Processing failed: {str(e)}", 'job': job})
                 
             return redirect('dashboard')
     else:
@@ -119,10 +56,162 @@ def career(request):
     jobs = Job.objects.all().order_by('-created_at')
     return render(request, 'ats/index.html', {'jobs': jobs})
 
+def _int_param(request, name):
+    try:
+        return int(request.GET[name])
+    except (KeyError, ValueError):
+        return None
+
+def _parse_cursor(value, cast=int):
+    # "<score or n>:<pk>:<rows before this page>", see dashboard
+    try:
+        score, pk, position = value.split(':')
+        return (None if score == 'n' else cast(score)), int(pk), int(position)
+    except (AttributeError, ValueError):
+        return None
+
+# Dashboard orderings: ranking agent score or the local score (ats/scoring.py)
+SORT_FIELDS = {
+    'ai': ('total_score', int),
+    'local': ('local_score', float),
+}
+
 def dashboard(request):
-    applicants = Applicant.objects.all().order_by('-evaluation__total_score')
-    return render(request, 'ats/dashboard.html', {'applicants': applicants})
+    """
+    Applicants ranked by total score (or local score with sort=local),
+    filterable by job and score range.
+
+    Pages are keyset-paginated on (score desc, nulls last; pk desc):
+    `after` carries the last row of the previous page, so every page is one
+    indexed range query however deep it is.
+    """
+    page_size = settings.ATS_DASHBOARD['PAGE_SIZE']
+    sort = request.GET.get('sort') if request.GET.get('sort') in SORT_FIELDS else 'ai'
+    field, cast = SORT_FIELDS[sort]
+    score_field = f'evaluation__{field}'
+    job_id = _int_param(request, 'job')
+    min_score = _int_param(request, 'min_score')
+    max_score = _int_param(request, 'max_score')
+    cursor = _parse_cursor(request.GET.get('after'), cast)
+
+    latest_job = ProcessingJob.objects.filter(applicant=OuterRef('pk')).order_by('-created_at', '-pk')
+    applicants = Applicant.objects.select_related('evaluation', 'job').annotate(
+        processing_status=Subquery(latest_job.values('status')[:1])
+    )
+    if job_id is not None:
+        applicants = applicants.filter(job_id=job_id)
+    if min_score is not None:
+        applicants = applicants.filter(**{f'{score_field}__gte': min_score})
+    if max_score is not None:
+        applicants = applicants.filter(**{f'{score_field}__lte': max_score})
+
+    position = 0
+    if cursor:
+        score, pk, position = cursor
+        if score is None:
+            applicants = applicants.filter(**{f'{score_field}__isnull': True}, pk__lt=pk)
+        else:
+            applicants = applicants.filter(
+                Q(**{f'{score_field}__lt': score})
+                | Q(**{score_field: score}, pk__lt=pk)
+                | Q(**{f'{score_field}__isnull': True})
+            )
+    applicants = applicants.order_by(F(score_field).desc(nulls_last=True), '-pk')
+
+    page = list(applicants[:page_size + 1])
+    next_cursor = None
+    if len(page) > page_size:
+        page = page[:page_size]
+        last = page[-1]
+        score = getattr(last.evaluation, field) if hasattr(last, 'evaluation') else None
+        next_cursor = f"{'n' if score is None else score}:{last.pk}:{position + page_size}"
+
+    filters = request.GET.copy()
+    filters.pop('after', None)
+    return render(request, 'ats/dashboard.html', {
+        'applicants': page,
+        'queue': queue_counts(),
+        'ranking': ranking_counts(),
+        'jobs': Job.objects.order_by('title'),
+        'selected_job': job_id,
+        'min_score': min_score,
+        'max_score': max_score,
+        'sort': sort,
+        'rank_offset': position,
+        'next_cursor': next_cursor,
+        'filter_query': filters.urlencode(),
+    })
+
+def _parse_skills(value):
+    # "python, go:2" -> (["python", "go"], {"go": 2.0})
+    names, weights = [], {}
+    for part in (value or "").split(','):
+        name, _, weight = part.partition(':')
+        name = normalize_skill(name)
+        if not name:
+            continue
+        names.append(name)
+        try:
+            weights[name] = float(weight) if weight else 1.0
+        except ValueError:
+            weights[name] = 1.0
+    return names, weights
+
+def skill_search(request):
+    """
+    Candidates by skill set: all of `must`, ranked by how many of the
+    `must`/`should` skills they have and their confidence (optional weights
+    as "skill:weight"). Served from the in-memory SkillIndex.
+    """
+    must, must_weights = _parse_skills(request.GET.get('must'))
+    should, should_weights = _parse_skills(request.GET.get('should'))
+    matches = get_skill_index().search(must, should, weights={**should_weights, **must_weights},
+                                       limit=settings.ATS_DASHBOARD['PAGE_SIZE'])
+    applicants = Applicant.objects.select_related('evaluation', 'job').in_bulk([pk for pk, _, _ in matches])
+    results = [
+        {'applicant': applicants[pk], 'matched': matched, 'score': round(score, 2)}
+        for pk, matched, score in matches if pk in applicants
+    ]
+    return render(request, 'ats/skill_search.html', {
+        'results': results,
+        'must': request.GET.get('must', ''),
+        'should': request.GET.get('should', ''),
+        'query_size': len(set(must) | set(should)),
+        'searched': bool(must or should),
+    })
+
+def queue_status(request):
+    return JsonResponse(queue_counts())
 
 def applicant_detail(request, pk):
-    applicant = get_object_or_404(Applicant, pk=pk)
+    skills = ApplicantSkill.objects.select_related('skill').order_by('skill__name')
+    top_jobs = JobMatch.objects.filter(kind=JobMatch.JOB).select_related('job').order_by('-score')
+    applicant = get_object_or_404(
+        Applicant.objects.select_related('evaluation', 'job').prefetch_related(
+            Prefetch('skills', queryset=skills),
+            Prefetch('job_matches', queryset=top_jobs, to_attr='top_jobs'),
+        ),
+        pk=pk,
+    )
     return render(request, 'ats/detail.html', {'applicant': applicant})
+
+@require_POST
+def request_full_ranking(request, pk):
+    """Run the ranking agent for an applicant the prefilter gave a provisional score."""
+    applicant = get_object_or_404(Applicant, pk=pk)
+    request_ranking(applicant)
+    if settings.ATS_PROCESSING['ASYNC']:
+        enqueue_applicant(applicant)
+    else:
+        try:
+            process_applicant(applicant)
+        except Exception as e:
+            print(f"Error ranking applicant {applicant.pk}: {e}")
+    return redirect('applicant_detail', pk=applicant.pk)
+
+def job_detail(request, pk):
+    """A job with its suggested candidates, read from the precomputed JobMatch rows."""
+    job = get_object_or_404(Job, pk=pk)
+    suggestions = (JobMatch.objects.filter(kind=JobMatch.CANDIDATE, job=job)
+                   .select_related('applicant__evaluation', 'applicant__job').order_by('-score'))
+    return render(request, 'ats/job_detail.html', {'job': job, 'suggestions': suggestions})
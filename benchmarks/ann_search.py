@@ -0,0 +1,73 @@
+"""
+Recall@k and queries/second of the IVF index versus exact VectorDB search.
+
+Synthetic embeddings are drawn around a thousand noisy topic centres so that,
+like real resume embeddings, they cluster. No API key is needed.
+
+    python benchmarks/ann_search.py [--size 50000] [--nlist 128] [--nprobe 1 4 8 16 32]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django
+django.setup()
+
+from ats.vector_db import VectorDB
+
+
+def clustered(rng, n, dim, topics):
+    centres = rng.standard_normal((topics, dim)).astype(np.float32)
+    labels = rng.integers(0, topics, size=n)
+    return centres[labels] + 1.5 * rng.standard_normal((n, dim)).astype(np.float32)
+
+
+def run(vdb, queries, k, **kwargs):
+    start = time.perf_counter()
+    results = [[r['id'] for r in vdb.search_by_vector(q, n_results=k, **kwargs)] for q in queries]
+    return results, len(queries) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--size', type=int, default=50000)
+    parser.add_argument('--dim', type=int, default=768)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--nlist', type=int, default=128)
+    parser.add_argument('--nprobe', type=int, nargs='+', default=[1, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    data = clustered(rng, args.size + args.queries, args.dim, topics=1000)
+    corpus, queries = data[:args.size], data[args.size:]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config = {'TYPE': 'ivf', 'NLIST': args.nlist, 'NPROBE': 8, 'MIN_TRAIN_SIZE': 1, 'RETRAIN_FACTOR': 4}
+        vdb = VectorDB(path=tmp, index=config, embedding_cache=False)
+        vdb.store.append(range(args.size), corpus)
+
+        start = time.perf_counter()
+        vdb._ensure_ann()
+        build_s = time.perf_counter() - start
+
+        exact, exact_qps = run(vdb, queries, args.k, exact=True)
+        print(f"{args.size} vectors, dim {args.dim}, nlist {args.nlist}, train+assign {build_s:.2f}s")
+        print(f"{'mode':>12} | {'recall@' + str(args.k):>9} | {'QPS':>8} | {'speedup':>7}")
+        print("-" * 46)
+        print(f"{'exact':>12} | {1.0:9.3f} | {exact_qps:8.0f} | {1.0:6.1f}x")
+        for nprobe in args.nprobe:
+            approx, qps = run(vdb, queries, args.k, nprobe=nprobe)
+            recall = np.mean([len(set(a) & set(e)) / len(e) for a, e in zip(approx, exact)])
+            print(f"{'nprobe=' + str(nprobe):>12} | {recall:9.3f} | {qps:8.0f} | {qps / exact_qps:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Resume tokens sent to the agents with and without compaction.
+
+Builds synthetic multi-page resumes (running name/contact header and a
+"Page N of M" footer on every page, bulleted experience, then education,
+skills, certifications, interests and references) and reports, per
+orchestrator mode, the resume tokens sent with compaction against what the
+agents were sent before (the whole text, the first 4000 characters for
+ranking), plus the time compaction takes per resume. Also checks whether
+the ranking input still reaches the education and skills sections.
+
+    python benchmarks/compaction.py [--pages 1 3 6] [--repeat 20]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django
+django.setup()
+
+from ats.compaction import compact_resume
+
+MODES = {
+    'sequential': ['parsing', 'skills', 'ranking'],
+    'concurrent': ['parsing', 'skills', 'ranking'],
+    'fused': ['fused'],
+}
+JOBS_PER_PAGE = 3
+
+
+def synthetic_resume(pages, bullets=8):
+    header = "Jane Doe\njane.doe@example.com  |  +1 (555) 123-4567  |  linkedin.com/in/janedoe"
+    lines = [header, "", "PROFESSIONAL SUMMARY",
+             "Backend engineer with 9 years of experience building Python services.", "", "WORK EXPERIENCE"]
+    for job in range(pages * JOBS_PER_PAGE):
+        lines += [f"Senior Engineer, Company {job}", f"Jan {2000 + job} - Dec {2001 + job}"]
+        lines += [f"•   Built   and operated service {job}.{b} handling   payments with Python, Django and "
+                  f"PostgreSQL;   improved latency by {b + 10}%." for b in range(bullets)]
+        if job % JOBS_PER_PAGE == JOBS_PER_PAGE - 1 and job // JOBS_PER_PAGE + 1 < pages:
+            lines += ["", f"Page {job // JOBS_PER_PAGE + 1} of {pages}", "\f", header, ""]
+    lines += ["EDUCATION", "B.Sc. Computer Science, State University, 2014", "",
+              "TECHNICAL SKILLS", "Python, Django, PostgreSQL, Kubernetes, AWS, Terraform", "",
+              "CERTIFICATIONS", "AWS Certified Solutions Architect", "",
+              "INTERESTS", "Chess, hiking", "", "REFERENCES", "Available on request", f"Page {pages} of {pages}"]
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pages', type=int, nargs='+', default=[1, 3, 6])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'pages':>5} | {'mode':>10} | {'before':>7} | {'after':>7} | {'saved':>6} | "
+          f"{'ms/resume':>9} | ranking sees skills (before/after)")
+    print("-" * 92)
+    for pages in args.pages:
+        text = synthetic_resume(pages)
+        best = float('inf')
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            resume = compact_resume(text)
+            for agents in MODES.values():
+                for agent in agents:
+                    resume.digest(agent)
+            best = min(best, time.perf_counter() - started)
+        sees = (f"{'Kubernetes' in resume.legacy_digest('ranking')}/"
+                f"{'Kubernetes' in resume.digest('ranking')}")
+        for mode, agents in MODES.items():
+            before = resume.input_tokens(agents, compacted=False)
+            after = resume.input_tokens(agents)
+            print(f"{pages:5d} | {mode:>10} | {before:7d} | {after:7d} | {1 - after / before:6.0%} | "
+                  f"{best * 1000:9.2f} | {sees}")
+
+
+if __name__ == '__main__':
+    main()
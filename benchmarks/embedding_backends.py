@@ -0,0 +1,113 @@
+"""
+Embedding throughput of the local hashing backend vs. the Gemini backend.
+
+The local backend is timed for real, per document and through
+VectorDB.add_applicants_bulk. Gemini requests are simulated with a fixed
+latency per batched request (--request-latency) unless --live is given and
+GOOGLE_API_KEY is set, in which case --live-docs documents are really sent.
+Also reports how often the local backend finds a document from a query made
+of a random part of its words (recall@1), as a sanity check of its quality.
+
+    python benchmarks/embedding_backends.py [--docs 5000] [--request-latency 0.4] [--live]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from unittest import mock
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django
+django.setup()
+
+from django.conf import settings
+from ats.embeddings import GeminiBackend, LocalHashingBackend
+from ats.vector_db import VectorDB
+
+VOCABULARY = [f"skill{i}" for i in range(3000)]
+
+
+def synthetic_text(rng, words):
+    popularity = 1.0 / np.arange(1, len(VOCABULARY) + 1)
+    return " ".join(rng.choice(VOCABULARY, size=words, p=popularity / popularity.sum()))
+
+
+def timed(fn, repeat=1):
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def bulk_rate(backend, texts, tmp, name):
+    vdb = VectorDB(path=os.path.join(tmp, name), embedding_cache=False, backend=backend)
+    docs = ((i, text, {}) for i, text in enumerate(texts))
+    seconds, result = timed(lambda: vdb.add_applicants_bulk(docs, max_retries=0))
+    return len(texts) / seconds, result, vdb
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--docs', type=int, default=5000)
+    parser.add_argument('--words', type=int, default=400)
+    parser.add_argument('--dim', type=int, default=256)
+    parser.add_argument('--request-latency', type=float, default=0.4,
+                        help="Simulated seconds per Gemini batch request")
+    parser.add_argument('--live', action='store_true', help="Call the Gemini API (needs GOOGLE_API_KEY)")
+    parser.add_argument('--live-docs', type=int, default=200)
+    parser.add_argument('--queries', type=int, default=200)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    texts = [synthetic_text(rng, args.words) for _ in range(args.docs)]
+    local = LocalHashingBackend(dim=args.dim)
+    print(f"{args.docs} docs x {args.words} words, local dim {args.dim}\n")
+
+    print(f"{'backend':>28} | {'docs/s':>8} | {'ms/doc':>7} | note")
+    print("-" * 70)
+    single, _ = timed(lambda: [local.embed_one(text) for text in texts[:1000]])
+    print(f"{'local, one at a time':>28} | {1000 / single:8.0f} | {single:7.3f} | 1 thread")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        rate, result, local_vdb = bulk_rate(local, texts, tmp, 'local')
+        print(f"{'local, add_applicants_bulk':>28} | {rate:8.0f} | {1000 / rate:7.3f} | {result['added']} stored, incl. keyword index")
+
+        batch = settings.ATS_EMBEDDING_BATCH
+        dim = 768
+
+        def remote(texts, task_type="retrieval_document"):
+            time.sleep(args.request_latency)
+            return [[1.0] * dim for _ in texts]
+
+        with mock.patch.object(GeminiBackend, 'embed', side_effect=remote):
+            rate, result, _ = bulk_rate(GeminiBackend(), texts, tmp, 'gemini')
+        print(f"{'gemini (simulated)':>28} | {rate:8.0f} | {1000 / rate:7.3f} | "
+              f"{args.request_latency}s/request, {batch['BATCH_SIZE']} docs x {batch['MAX_WORKERS']} workers")
+
+        if args.live and settings.GOOGLE_API_KEY:
+            rate, result, _ = bulk_rate(GeminiBackend(), texts[:args.live_docs], tmp, 'live')
+            print(f"{'gemini (live)':>28} | {rate:8.0f} | {1000 / rate:7.3f} | "
+                  f"{args.live_docs} docs, {len(result['failed'])} failed")
+
+        # Queries: a random third of a document's distinct words should find it
+        picks = rng.choice(args.docs, size=min(args.queries, args.docs), replace=False)
+        found, latency = 0, 0.0
+        for pick in picks:
+            words = sorted(set(texts[pick].split()))
+            query = " ".join(rng.choice(words, size=max(1, len(words) // 3), replace=False))
+            seconds, hits = timed(lambda: local_vdb.query_similar_applicants(query, n_results=1))
+            latency += seconds
+            found += bool(hits) and hits[0]['id'] == str(pick)
+        print(f"\nlocal queries: recall@1 {found / len(picks):.2f}, "
+              f"{latency / len(picks) * 1000:.2f} ms per query (embedding + exact search over {args.docs})")
+
+
+if __name__ == '__main__':
+    main()
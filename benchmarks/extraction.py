@@ -0,0 +1,119 @@
+"""
+Resume text extraction: the previous read-everything loop versus the bounded
+extractor in ats/extraction.py (page/char budgets, parallel page ranges).
+
+Generates text PDFs of several lengths and one DOCX, then reports the time
+per file and how much text each approach returned.
+
+    python benchmarks/extraction.py [--pages 2 10 60] [--repeat 3] [--max-chars 200000]
+
+With the default character budget dense resumes stop after a few pages; raise
+--max-chars to see the parallel page ranges at work on long PDFs.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import zipfile
+
+import django
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+import docx2txt
+from pypdf import PdfReader
+
+from ats.extraction import extract_text
+
+LINE = "Senior engineer with Python, Django and PostgreSQL experience building hiring tools."
+
+
+def write_pdf(path, pages, lines_per_page=40):
+    """Plain text PDF, one Helvetica content stream per page."""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None,
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for page in range(pages):
+        rows = [f"BT /F1 10 Tf 40 {780 - 18 * row} Td (Page {page + 1}: {LINE}) Tj ET" for row in range(lines_per_page)]
+        stream = "\n".join(rows).encode()
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % len(objects))
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(b"%d 0 R" % k for k in kids), pages)
+
+    out, offsets = bytearray(b"%PDF-1.4\n"), []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, 'wb') as f:
+        f.write(out)
+
+
+def write_docx(path, paragraphs):
+    body = "".join(f"<w:p><w:r><w:t>{text}</w:t></w:r></w:p>" for text in paragraphs)
+    with zipfile.ZipFile(path, 'w') as archive:
+        archive.writestr('word/document.xml', (
+            '<?xml version="1.0"?><w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+            f'<w:body>{body}</w:body></w:document>'
+        ))
+
+
+def legacy_extract(path):
+    # What ats/pipeline.py did before: every page, string concatenation
+    if path.endswith('.pdf'):
+        text = ""
+        for page in PdfReader(path).pages:
+            text += page.extract_text() + "\n"
+        return text
+    return docx2txt.process(path)
+
+
+def timed(fn, repeat):
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pages', type=int, nargs='+', default=[2, 10, 60])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--max-chars', type=int, default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        files = []
+        for pages in args.pages:
+            path = os.path.join(tmp, f"resume-{pages}p.pdf")
+            write_pdf(path, pages)
+            files.append((f"PDF {pages} pages", path))
+        path = os.path.join(tmp, "resume.docx")
+        write_docx(path, [LINE] * 400)
+        files.append(("DOCX 400 paragraphs", path))
+
+        # Warm the shared extraction pool so its start-up isn't billed to one file
+        extract_text(files[-2][1])
+
+        print(f"{'file':>20} | {'legacy ms':>9} | {'legacy chars':>12} | {'serial ms':>9} | {'parallel ms':>11} | {'chars':>6} | pages")
+        print("-" * 92)
+        for label, path in files:
+            legacy_ms, legacy_text = timed(lambda: legacy_extract(path), args.repeat)
+            serial_ms, _ = timed(lambda: extract_text(path, max_chars=args.max_chars, parallel=False), args.repeat)
+            parallel_ms, result = timed(lambda: extract_text(path, max_chars=args.max_chars), args.repeat)
+            print(f"{label:>20} | {legacy_ms:9.1f} | {len(legacy_text):12d} | {serial_ms:9.1f} | {parallel_ms:11.1f} | "
+                  f"{len(result.text):6d} | {result.pages_read}/{result.total_pages}")
+
+
+if __name__ == '__main__':
+    main()
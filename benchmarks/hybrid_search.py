@@ -0,0 +1,107 @@
+"""
+BM25 index and hybrid search over synthetic resumes.
+
+Reports lexical index build time, on-disk size and query latency, and how
+VectorDB.hybrid_search behaves with a fast, slow and failing embedding
+service (simulated; no API key is needed).
+
+    python benchmarks/hybrid_search.py [--docs 20000] [--embed-delay 0.3]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from unittest import mock
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django
+django.setup()
+
+from ats.lexical import BM25Index
+from ats.vector_db import VectorDB
+
+VOCABULARY = [f"skill{i}" for i in range(3000)]
+RARE = ["cissp", "pmp", "cka", "initech", "globex", "hooli"]
+QUERIES = ["cissp security", "initech python", "skill1 skill2 skill3", "skill2500 cka"]
+
+
+def synthetic_text(rng, words):
+    popularity = 1.0 / np.arange(1, len(VOCABULARY) + 1)
+    tokens = list(rng.choice(VOCABULARY, size=words, p=popularity / popularity.sum()))
+    if rng.random() < 0.05:
+        tokens.append(str(rng.choice(RARE)))
+    return " ".join(tokens)
+
+
+def timed(fn, repeat):
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000, result
+
+
+def directory_size(path):
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--docs', type=int, default=20000)
+    parser.add_argument('--words', type=int, default=300)
+    parser.add_argument('--dim', type=int, default=768)
+    parser.add_argument('--embed-delay', type=float, default=0.3, help="Simulated slow embedding call (s)")
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    texts = [synthetic_text(rng, args.words) for _ in range(args.docs)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = BM25Index(os.path.join(tmp, 'bm25'))
+        started = time.perf_counter()
+        for start in range(0, args.docs, 1000):
+            index.add([str(i) for i in range(start, min(start + 1000, args.docs))], texts[start:start + 1000])
+        index.compact()
+        print(f"{args.docs} docs x {args.words} words: indexed in {time.perf_counter() - started:.1f}s, "
+              f"{directory_size(index.path) / 1e6:.1f} MB on disk "
+              f"(raw text {sum(len(t) for t in texts) / 1e6:.1f} MB)")
+        reloaded = BM25Index(index.path)
+        load_ms, _ = timed(reloaded.load, 3)
+        print(f"Cold load {load_ms:.0f} ms\n")
+
+        print(f"{'query':>22} | {'BM25 ms':>8} | {'hits':>5}")
+        print("-" * 42)
+        for query in QUERIES:
+            ms, results = timed(lambda: reloaded.search(query, n_results=50), args.repeat)
+            print(f"{query:>22} | {ms:8.2f} | {len(results):>5}")
+
+        vdb = VectorDB(path=os.path.join(tmp, 'vectors'), embedding_cache=False)
+        vdb.lexical = reloaded
+        vectors = rng.standard_normal((args.docs, args.dim)).astype(np.float32)
+        vdb.store.append([str(i) for i in range(args.docs)], vectors, [{} for _ in range(args.docs)], ["" for _ in range(args.docs)])
+        query_vector = vectors[0].tolist()
+
+        def slow(*_):
+            time.sleep(args.embed_delay)
+            return query_vector
+
+        print(f"\n{'embedding service':>22} | {'hybrid ms':>9} | sources of top 5")
+        print("-" * 60)
+        for label, side_effect in [("fast", lambda *_: query_vector), (f"slow ({args.embed_delay}s)", slow),
+                                   ("failing", lambda *_: [])]:
+            with mock.patch.object(VectorDB, '_get_embedding', side_effect=side_effect):
+                vdb.hybrid_search(QUERIES[0])  # Warm the vector index
+                ms, results = timed(lambda: vdb.hybrid_search(QUERIES[0], embed_timeout=args.embed_delay / 2), 3)
+            sources = sorted({source for result in results for source in result['sources']})
+            print(f"{label:>22} | {ms:9.1f} | {','.join(sources)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Job <-> applicant match table: full rebuild versus incremental updates.
+
+Fills a throwaway test database and vector store with synthetic applicants
+and jobs, rebuilds JobMatch, then times adding one applicant and one job
+incrementally and serving the job page's suggestions.
+
+    python benchmarks/job_matching.py [--applicants 20000] [--jobs 50] [--dim 768]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from unittest import mock
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django
+django.setup()
+
+from django.db import connection
+from django.test.utils import setup_test_environment
+
+from ats import matching
+from ats.models import Applicant, Job, JobMatch
+from ats.vector_db import VectorDB
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - started) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--applicants', type=int, default=20000)
+    parser.add_argument('--jobs', type=int, default=50)
+    parser.add_argument('--dim', type=int, default=768)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        with tempfile.TemporaryDirectory() as tmp, mock.patch('ats.matching.get_vector_db', side_effect=lambda: vdb):
+            vdb = VectorDB(path=tmp, embedding_cache=False)
+            applicants = Applicant.objects.bulk_create(
+                [Applicant(name=f"Applicant {i}", resume=f"resumes/{i}.pdf") for i in range(args.applicants)], batch_size=2000)
+            vdb.store.append([str(a.pk) for a in applicants], rng.standard_normal((args.applicants, args.dim)).astype(np.float32),
+                             [{} for _ in applicants], ["" for _ in applicants])
+            jobs = Job.objects.bulk_create([Job(title=f"Job {i}", description="") for i in range(args.jobs)])
+            for job in jobs:
+                vdb.jobs.append([str(job.pk)], rng.standard_normal((1, args.dim)).astype(np.float32))
+
+            rebuild_ms, _ = timed(lambda: matching.rebuild_matches(vdb, embed_missing=False))
+            print(f"{args.applicants} applicants x {args.jobs} jobs, {args.dim}-d: "
+                  f"rebuild {rebuild_ms:.0f} ms, {JobMatch.objects.count()} rows")
+
+            new = Applicant.objects.create(name="New", resume="resumes/new.pdf")
+            vdb.store.append([str(new.pk)], rng.standard_normal((1, args.dim)).astype(np.float32))
+            applicant_ms, _ = timed(lambda: matching.update_for_applicants([new.pk], vdb))
+            print(f"Incremental, new applicant: {applicant_ms:8.1f} ms")
+
+            job = Job.objects.bulk_create([Job(title="New job", description="")])[0]
+            vdb.jobs.append([str(job.pk)], rng.standard_normal((1, args.dim)).astype(np.float32))
+            job_ms, _ = timed(lambda: matching.update_for_jobs([job.pk], vdb))
+            print(f"Incremental, new job:       {job_ms:8.1f} ms")
+
+            page_ms, rows = timed(lambda: list(JobMatch.objects.filter(kind=JobMatch.CANDIDATE, job=job)
+                                               .select_related('applicant__evaluation', 'applicant__job').order_by('-score')))
+            print(f"Job page suggestions query: {page_ms:8.1f} ms ({len(rows)} candidates, no remote calls)")
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
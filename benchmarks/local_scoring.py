@@ -0,0 +1,97 @@
+"""
+Re-ranking a job's whole applicant pool with the local scoring engine.
+
+Fills a throwaway test database and vector store with synthetic applicants
+for one job, then times score_applicants with and without saving, and with
+different weights. The LLM alternative is one RankingAgent request per
+applicant; its cost is estimated from --llm-latency.
+
+    python benchmarks/local_scoring.py [--applicants 5000] [--dim 768]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from unittest import mock
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django
+django.setup()
+
+from django.db import connection
+from django.test.utils import setup_test_environment
+
+from ats.models import Applicant, ApplicantSkill, Job, Skill
+from ats.scoring import score_applicants
+from ats.vector_db import VectorDB
+
+
+def populate(job, applicants, dim, vdb, rng):
+    vocabulary = [f"skill-{i}" for i in range(200)]
+    Skill.objects.bulk_create([Skill(name=name) for name in vocabulary])
+    skill_ids = list(Skill.objects.order_by('pk').values_list('pk', flat=True))
+    created = Applicant.objects.bulk_create([
+        Applicant(name=f"Applicant {i}", resume=f"resumes/{i}.pdf", job=job,
+                  experience_summary=f"{rng.integers(0, 15)} years of experience")
+        for i in range(applicants)
+    ], batch_size=2000)
+    ApplicantSkill.objects.bulk_create([
+        ApplicantSkill(applicant=applicant, skill_id=skill_ids[skill], confidence=float(rng.uniform(0.3, 1.0)))
+        for applicant in created for skill in rng.choice(len(skill_ids), size=12, replace=False)
+    ], batch_size=5000)
+    vdb.store.append([str(a.pk) for a in created], rng.standard_normal((applicants, dim)).astype(np.float32),
+                     [{} for _ in created], ["" for _ in created])
+
+
+def timed(fn, repeat):
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--applicants', type=int, default=5000)
+    parser.add_argument('--dim', type=int, default=768)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--llm-latency', type=float, default=2.0, help="Seconds per RankingAgent request")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            vdb = VectorDB(path=tmp, embedding_cache=False)
+            job = Job.objects.create(title="Backend", description="Backend engineer",
+                                     requirements="skill-0, skill-1, skill-5, skill-20, 5+ years")
+            populate(job, args.applicants, args.dim, vdb, rng)
+            job_vector = rng.standard_normal(args.dim).tolist()
+
+            with mock.patch.object(VectorDB, '_get_embedding', return_value=job_vector):
+                score_applicants(job, vdb=vdb, save=False)  # Warm the id -> row map
+                compute_ms, _ = timed(lambda: score_applicants(job, vdb=vdb, save=False), args.repeat)
+                reweight_ms, results = timed(lambda: score_applicants(job, weights={'skills': 1, 'similarity': 0}, vdb=vdb,
+                                                                      save=False), args.repeat)
+                save_ms, _ = timed(lambda: score_applicants(job, vdb=vdb), 1)
+
+            print(f"{args.applicants} applicants, {args.dim}-d vectors")
+            print(f"Local re-rank:            {compute_ms:8.1f} ms")
+            print(f"Local re-rank, reweighted:{reweight_ms:8.1f} ms (top applicant {results[0]['applicant_id']})")
+            print(f"Local re-rank + save:     {save_ms:8.1f} ms")
+            print(f"RankingAgent per applicant: ~{args.applicants * args.llm_latency / 60:.0f} min of requests "
+                  f"({args.applicants} calls at {args.llm_latency}s)")
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Upload latency and prompt tokens of Orchestrator.process_resume per mode
+(sequential, concurrent, fused).
+
+genai.GenerativeModel is replaced by a stub that sleeps for a fixed latency per
+agent, reports one prompt token per word, and returns canned JSON, so no API
+key or quota is used. The fused request takes as long as the slowest agent.
+
+    python benchmarks/orchestrator.py [--latency 1.5 2.0 2.5] [--runs 3]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django
+django.setup()
+
+from ats.agents import Orchestrator
+from ats.ratelimit import RateLimiter
+
+RESPONSES = {
+    "Resume Parsing Agent": {"name": "Jane Doe", "email": "jane@example.com", "phone": "", "experience_summary": "", "skills_raw": [], "education": []},
+    "Skill Extraction Agent": {"tech_skills": ["python"], "soft_skills": [], "confidence_score": 0.9},
+    "Ranking Agent": {"total_score": 80, "skill_score": 75, "experience_score": 85, "reason": "Stub."},
+}
+RESPONSES["Resume Screening Agent"] = {
+    "parsed": RESPONSES["Resume Parsing Agent"],
+    "skills": RESPONSES["Skill Extraction Agent"],
+    "ranking": RESPONSES["Ranking Agent"],
+}
+
+
+class StubUsage:
+    def __init__(self, prompt_tokens, output_tokens):
+        self.prompt_token_count = prompt_tokens
+        self.candidates_token_count = output_tokens
+        self.total_token_count = prompt_tokens + output_tokens
+
+
+class StubResponse:
+    def __init__(self, text, prompt):
+        self.text = text
+        self.usage_metadata = StubUsage(len(prompt.split()), len(text.split()))
+
+
+def stub_model_factory(latencies):
+    class StubModel:
+        def __init__(self, model_name, **kwargs):
+            self.model_name = model_name
+
+        def generate_content(self, prompt, **kwargs):
+            for marker, latency in zip(RESPONSES, latencies + [max(latencies)]):
+                if marker in prompt:
+                    time.sleep(latency)
+                    return StubResponse(json.dumps(RESPONSES[marker]), prompt)
+            raise ValueError("Unknown prompt")
+    return StubModel
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--latency', type=float, nargs=3, default=[1.5, 2.0, 2.5],
+                        metavar=('PARSE', 'SKILLS', 'RANK'), help="Seconds per stubbed call")
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    resume = "Jane Doe\njane@example.com\n" + "Python engineer with 6 years of experience building Django services.\n" * 60
+    # The stub has no quota; don't let the configured per-minute limits skew the timings
+    unlimited = RateLimiter({'LIMITS': {'default': {'RPM': 10 ** 6, 'TPM': 10 ** 9}}})
+    with mock.patch('ats.agents.genai.GenerativeModel', stub_model_factory(args.latency)), \
+            mock.patch('ats.agents.get_rate_limiter', lambda: unlimited):
+        print(f"Stub latencies (s): parse {args.latency[0]}, skills {args.latency[1]}, rank {args.latency[2]}")
+        for mode in ("sequential", "concurrent", "fused"):
+            orchestrator = Orchestrator(mode=mode)
+            timings = []
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                results = orchestrator.process_resume(resume, job_description="Python backend role")
+                timings.append(time.perf_counter() - start)
+                assert results["parsed"] and results["skills"] and results["ranking"]
+            usage = orchestrator.last_usage
+            print(f"{mode:>10}: mean {sum(timings) / len(timings):.2f}s over {args.runs} runs, "
+                  f"{usage['requests']} requests, {usage['prompt_tokens']} prompt tokens per resume")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Memory and recall of the int8 scan with float32 re-scoring.
+
+Builds a store of clustered synthetic embeddings (closer to real embedding
+spaces than isotropic noise, so neighbours are hard to tell apart) and
+compares, per 100k applicants, the bytes a query scans and the recall@10 of
+the quantized search against the exact float32 search. The legacy
+vectors.json / Python-list representation is estimated for reference.
+
+    python benchmarks/quantized_search.py [--size 100000] [--dim 768] [--rescore 50 100 200]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django
+django.setup()
+
+from ats.vector_db import VectorDB
+from ats.vector_store import normalize_rows
+
+
+def timed(fn, repeat):
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000, result
+
+
+def clustered(rng, centroids, size, spread=0.6):
+    assignment = rng.integers(0, len(centroids), size)
+    noise = rng.standard_normal((size, centroids.shape[1])).astype(np.float32)
+    return normalize_rows(centroids[assignment] + spread * noise)
+
+
+def files_size(path, suffix):
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path) if name.endswith(suffix))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--size', type=int, default=100000)
+    parser.add_argument('--dim', type=int, default=768)
+    parser.add_argument('--queries', type=int, default=100)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--rescore', type=int, nargs='+', default=[40, 100, 200])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    centroids = rng.standard_normal((200, args.dim)).astype(np.float32)
+    vectors = clustered(rng, centroids, args.size)
+    # Fresh points from the same clusters: many stored vectors score almost alike
+    queries = clustered(rng, centroids, args.queries)
+    per_100k = 100000 / args.size
+
+    with tempfile.TemporaryDirectory() as tmp:
+        vdb = VectorDB(path=tmp, index={'TYPE': 'exact', 'QUANTIZE': 'none'}, embedding_cache=False)
+        vdb.store.append(range(args.size), vectors, [{} for _ in range(args.size)], ["" for _ in range(args.size)])
+        vdb._ensure_index()
+
+        sample = json.dumps({"embedding": vectors[0].tolist()})
+        print(f"{args.size} vectors x {args.dim} dims; sizes per 100k applicants:")
+        print(f"  vectors.json (legacy)       ~{len(sample) * 100000 / 1e6:7.0f} MB on disk")
+        print(f"  Python float lists (legacy) ~{(8 + 24) * args.dim * 100000 / 1e6:7.0f} MB in RAM")
+        float_bytes = files_size(tmp, '.npy') - files_size(tmp, '.i8.npy') - files_size(tmp, '.scale.npy')
+        int8_bytes = files_size(tmp, '.i8.npy') + files_size(tmp, '.scale.npy')
+        print(f"  float32 segments             {float_bytes * per_100k / 1e6:7.0f} MB (mmap)")
+        print(f"  int8 codes + scales          {int8_bytes * per_100k / 1e6:7.0f} MB (mmap)\n")
+
+        exact = [[r['id'] for r in vdb.search_by_vector(q, n_results=args.k, exact=True)] for q in queries]
+        float_ms, _ = timed(lambda: [vdb.search_by_vector(q, n_results=args.k) for q in queries[:10]], args.repeat)
+
+        print(f"{'search':>22} | {'recall@' + str(args.k):>9} | {'ms/query':>8} | {'MB read/query (per 100k)':>24}")
+        print("-" * 74)
+        print(f"{'float32 scan':>22} | {1.0:9.3f} | {float_ms / 10:8.1f} | {float_bytes * per_100k / 1e6:24.1f}")
+        ids = vdb.store.ids
+        found = [ids[vdb._top_k(vdb.store.dot_quantized(q), args.k)].tolist() for q in queries]
+        recall = np.mean([len(set(a) & set(b)) / args.k for a, b in zip(found, exact)])
+        print(f"{'int8 only':>22} | {recall:9.3f} | {'':>8} | {int8_bytes * per_100k / 1e6:24.1f}")
+        for rescore in args.rescore:
+            vdb.index_config = {'TYPE': 'exact', 'QUANTIZE': 'int8', 'RESCORE': rescore}
+            found = [[r['id'] for r in vdb.search_by_vector(q, n_results=args.k)] for q in queries]
+            recall = np.mean([len(set(a) & set(b)) / args.k for a, b in zip(found, exact)])
+            ms, _ = timed(lambda: [vdb.search_by_vector(q, n_results=args.k) for q in queries[:10]], args.repeat)
+            read = int8_bytes * per_100k + max(rescore, 4 * args.k) * args.dim * 4
+            label = f"int8 + rescore {max(rescore, 4 * args.k)}"
+            print(f"{label:>22} | {recall:9.3f} | {ms / 10:8.1f} | {read / 1e6:24.1f}")
+
+
+if __name__ == '__main__':
+    main()
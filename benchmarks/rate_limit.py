@@ -0,0 +1,115 @@
+"""
+Burst of agent requests against a stubbed Gemini API that enforces a
+per-model quota and answers excess requests with 429.
+
+Compares the old behaviour (one immediate retry on a fallback that was the
+same model) with the shared RateLimiter routing over two models. Time is
+compressed: the stub's quota window is one second instead of a minute, and
+the limiter is configured with the matching per-minute rates.
+
+    python benchmarks/rate_limit.py [--requests 60] [--threads 8] [--quota 10]
+"""
+import argparse
+import collections
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django
+django.setup()
+
+from ats.agents import BaseAgent
+from ats.ratelimit import RateLimiter
+
+WINDOW = 1.0
+
+
+class QuotaServer:
+    """Sliding-window quota per model, like the API's requests-per-minute limit."""
+    def __init__(self, quota, latency):
+        self.quota = quota
+        self.latency = latency
+        self.recent = collections.defaultdict(collections.deque)
+        self.counts = collections.Counter()
+        self.lock = threading.Lock()
+
+    def model(self, server):
+        class StubModel:
+            def __init__(self, model_name, **kwargs):
+                self.model_name = model_name
+
+            def generate_content(self, prompt, **kwargs):
+                now = time.monotonic()
+                with server.lock:
+                    recent = server.recent[self.model_name]
+                    while recent and now - recent[0] > WINDOW:
+                        recent.popleft()
+                    if len(recent) >= server.quota:
+                        server.counts["429"] += 1
+                        raise Exception("429 Resource has been exhausted (e.g. check quota).")
+                    recent.append(now)
+                    server.counts["ok"] += 1
+                time.sleep(server.latency)
+                return mock.Mock(text="{}", usage_metadata=None)
+        return StubModel
+
+
+def legacy_generate(model, prompt):
+    # BaseAgent.generate before the limiter: fallback was the same model
+    try:
+        return model.generate_content(prompt).text
+    except Exception as e:
+        if "429" in str(e):
+            try:
+                return model.generate_content(prompt).text
+            except Exception:
+                return None
+        return None
+
+
+def run(label, generate, requests, threads, server):
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(lambda i: generate(f"prompt {i}"), range(requests)))
+    elapsed = time.perf_counter() - started
+    succeeded = sum(result is not None for result in results)
+    print(f"{label:>22} | {succeeded:>4}/{requests:<4} | {server.counts['429']:>5} | {elapsed:7.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=60)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--quota', type=int, default=10, help="Requests per model per window")
+    parser.add_argument('--latency', type=float, default=0.05)
+    args = parser.parse_args()
+
+    print(f"{'':>22} | {'succeeded':>9} | {'429s':>5} | {'seconds':>7}")
+    print("-" * 54)
+
+    server = QuotaServer(args.quota, args.latency)
+    model = server.model(server)("gemini-2.5-flash")
+    run("single retry (before)", lambda prompt: legacy_generate(model, prompt), args.requests, args.threads, server)
+
+    # The limiter's clock runs 60x fast, so its per-minute settings apply per one-second window
+    config = {'LIMITS': {'default': {'RPM': args.quota, 'TPM': 10 ** 9}}, 'MAX_RETRIES': 6,
+              'BACKOFF_BASE': 3, 'BACKOFF_MAX': 60, 'MAX_WAIT': 3600}
+    for models in (['model-a'], ['model-a', 'model-b']):
+        server = QuotaServer(args.quota, args.latency)
+        limiter = RateLimiter(config, clock=lambda: time.monotonic() * 60 / WINDOW,
+                              sleep=lambda seconds: time.sleep(seconds * WINDOW / 60))
+        with mock.patch('ats.agents.genai.GenerativeModel', server.model(server)):
+            agent = BaseAgent(models[0], rate_limiter=limiter)
+            agent.model_names = models
+            agent.models = {name: agent.models.get(name) or server.model(server)(name) for name in models}
+            run(f"limiter, {len(models)} model(s)", agent.generate, args.requests, args.threads, server)
+
+
+if __name__ == "__main__":
+    main()
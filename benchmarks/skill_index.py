@@ -0,0 +1,110 @@
+"""
+Skill-set search: the in-memory SkillIndex versus the equivalent ORM query
+("has all of MUST, ranked by matches and confidence over MUST + SHOULD").
+
+Runs against a throwaway test database filled with synthetic applicants
+whose skills follow a Zipf-like popularity curve.
+
+    python benchmarks/skill_index.py [--applicants 20000] [--skills-per 15] [--repeat 20]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django
+django.setup()
+
+from django.db import connection
+from django.db.models import Count, Q, Sum
+from django.test.utils import setup_test_environment
+
+from ats.models import Applicant, ApplicantSkill, Skill
+from ats.skill_index import SkillIndex
+
+QUERIES = [
+    (["skill-0", "skill-1"], ["skill-2"]),
+    (["skill-3", "skill-40"], ["skill-5", "skill-6"]),
+    (["skill-10"], []),
+    ([], ["skill-7", "skill-8", "skill-150"]),
+]
+
+
+def orm_search(must, should, limit=50):
+    names = must + should
+    queryset = Applicant.objects.all()
+    for name in must:
+        queryset = queryset.filter(pk__in=ApplicantSkill.objects.filter(skill__name=name).values('applicant_id'))
+    if not must:
+        queryset = queryset.filter(pk__in=ApplicantSkill.objects.filter(skill__name__in=should).values('applicant_id'))
+    in_query = Q(skills__skill__name__in=names)
+    queryset = queryset.annotate(
+        matched=Count('skills', filter=in_query),
+        score=Sum('skills__confidence', filter=in_query),
+    ).order_by('-matched', '-score', 'pk')
+    return [(pk, matched, score) for pk, matched, score in queryset.values_list('pk', 'matched', 'score')[:limit]]
+
+
+def populate(applicants, skills_per, vocabulary):
+    rng = np.random.default_rng(0)
+    Skill.objects.bulk_create([Skill(name=f"skill-{i}") for i in range(vocabulary)])
+    skill_ids = dict(Skill.objects.values_list('name', 'pk'))
+    created = Applicant.objects.bulk_create([Applicant(name=f"Applicant {i}", resume=f"resumes/{i}.pdf") for i in range(applicants)],
+                                            batch_size=2000)
+    popularity = 1.0 / np.arange(1, vocabulary + 1)
+    popularity /= popularity.sum()
+    rows = []
+    for applicant in created:
+        for skill in rng.choice(vocabulary, size=skills_per, replace=False, p=popularity):
+            rows.append(ApplicantSkill(applicant=applicant, skill_id=skill_ids[f"skill-{skill}"],
+                                       confidence=float(rng.uniform(0.3, 1.0))))
+    ApplicantSkill.objects.bulk_create(rows, batch_size=5000)
+    return len(rows)
+
+
+def timed(fn, repeat):
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--applicants', type=int, default=20000)
+    parser.add_argument('--skills-per', type=int, default=15)
+    parser.add_argument('--vocabulary', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        started = time.perf_counter()
+        rows = populate(args.applicants, args.skills_per, args.vocabulary)
+        print(f"{args.applicants} applicants, {rows} applicant skills ({time.perf_counter() - started:.1f}s to load)")
+
+        build_ms, index = timed(lambda: SkillIndex().build(), 1)
+        stats = index.stats()
+        print(f"Index build {build_ms:.0f} ms, {stats['skills']} postings lists, {stats['bytes'] / 1e6:.1f} MB\n")
+
+        print(f"{'must':>22} | {'should':>26} | {'ORM ms':>8} | {'index ms':>8} | {'same top-50':>11}")
+        print("-" * 88)
+        for must, should in QUERIES:
+            orm_ms, expected = timed(lambda: orm_search(must, should), max(1, args.repeat // 4))
+            index_ms, found = timed(lambda: index.search(must, should), args.repeat)
+            same = [pk for pk, _, _ in expected] == [pk for pk, _, _ in found]
+            print(f"{','.join(must) or '-':>22} | {','.join(should) or '-':>26} | {orm_ms:8.2f} | {index_ms:8.3f} | {str(same):>11}")
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""
+Cold start: import time, first-request latency and per-upload client setup.
+
+Every measurement runs in a fresh interpreter, as a new serverless instance
+or worker would. `--eager` imports google.generativeai, pypdf and docx2txt
+up front, as the modules did at import time before they became lazy.
+
+- import: django.setup() plus config.wsgi and ats.views
+- first / second GET /: the career page (no Gemini or PDF code involved)
+- clients: what an upload needs before its first API call. The old code
+  built an Orchestrator and re-read the vector store on every upload;
+  get_orchestrator()/get_vector_db() build them once per process and then
+  only stat the store's manifests.
+
+    python benchmarks/startup.py [--runs 5] [--vectors 20000] [--eager]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ('google.generativeai', 'grpc', 'pypdf', 'docx2txt')
+
+
+def child(args):
+    results = {}
+    started = time.perf_counter()
+    if args.eager:
+        import google.generativeai  # noqa: F401
+        import pypdf  # noqa: F401
+        import docx2txt  # noqa: F401
+    sys.path.insert(0, ROOT)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    import django
+    django.setup()
+    import config.wsgi  # noqa: F401
+    import ats.views  # noqa: F401
+    results['import'] = time.perf_counter() - started
+    results['loaded'] = [name for name in HEAVY if name in sys.modules]
+
+    from django.conf import settings
+    from django.test import Client
+    settings.ALLOWED_HOSTS = ['*']
+    client = Client()
+    for key in ('first_request', 'second_request'):
+        started = time.perf_counter()
+        client.get('/')
+        results[key] = time.perf_counter() - started
+
+    from ats.agents import Orchestrator, get_orchestrator
+    from ats.vector_db import VectorDB, get_vector_db
+    settings.ATS_VECTOR_STORE_DIR = args.store
+    for key in ('first_clients', 'second_clients'):
+        started = time.perf_counter()
+        get_orchestrator()
+        get_vector_db()
+        results[key] = time.perf_counter() - started
+    started = time.perf_counter()
+    Orchestrator()
+    VectorDB()
+    results['fresh_clients'] = time.perf_counter() - started
+    print(json.dumps(results))
+
+
+def build_store(path, size, dim=768):
+    import numpy as np
+    sys.path.insert(0, ROOT)
+    from ats.vector_store import SegmentStore
+    rng = np.random.default_rng(0)
+    store = SegmentStore(path)
+    for start in range(0, size, 5000):
+        count = min(5000, size - start)
+        ids = list(range(start, start + count))
+        store.append(ids, rng.standard_normal((count, dim)).astype(np.float32),
+                     [{"name": f"Applicant {i}", "job": "Backend"} for i in ids],
+                     [f"Resume text of applicant {i} " * 20 for i in ids])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--vectors', type=int, default=20000, help="Applicants in the synthetic vector store")
+    parser.add_argument('--eager', action='store_true', help="Import the heavy dependencies up front (old behaviour)")
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--store', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return child(args)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        build_store(tmp, args.vectors)
+        command = [sys.executable, '-W', 'ignore', os.path.abspath(__file__), '--child', '--store', tmp]
+        if args.eager:
+            command.append('--eager')
+        runs = []
+        for _ in range(args.runs):
+            output = subprocess.run(command, cwd=ROOT, capture_output=True, text=True, check=True).stdout
+            runs.append(json.loads(output.strip().splitlines()[-1]))
+
+    print(f"{'eager' if args.eager else 'lazy'} imports, {args.vectors} stored vectors, median of {args.runs} cold starts")
+    print(f"heavy modules loaded at import: {', '.join(runs[0]['loaded']) or 'none'}\n")
+    labels = {
+        'import': "import (setup, wsgi, views)",
+        'first_request': "first GET /",
+        'second_request': "second GET /",
+        'first_clients': "first upload: shared clients",
+        'second_clients': "next uploads: shared clients",
+        'fresh_clients': "per-upload fresh clients (old)",
+    }
+    for key, label in labels.items():
+        print(f"{label:>32} | {statistics.median(run[key] for run in runs) * 1000:8.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
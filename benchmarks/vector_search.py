@@ -0,0 +1,88 @@
+"""
+Latency of VectorDB.query_similar_applicants versus corpus size.
+
+Compares the original per-applicant Python loop with the NumPy matrix engine
+on synthetic 768-dimensional embeddings. No API key is needed.
+
+    python benchmarks/vector_search.py [--sizes 1000 10000 50000] [--dim 768]
+"""
+import argparse
+import math
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+import django
+django.setup()
+
+from ats.vector_db import VectorDB
+
+
+def legacy_query(vectors, query_embedding, n_results=5):
+    # Previous implementation: Python loop, norms recomputed per comparison, full sort
+    def cosine(v1, v2):
+        dot_product = sum(a*b for a, b in zip(v1, v2))
+        magnitude1 = math.sqrt(sum(a*a for a in v1))
+        magnitude2 = math.sqrt(sum(b*b for b in v2))
+        if magnitude1 == 0 or magnitude2 == 0: return 0.0
+        return dot_product / (magnitude1 * magnitude2)
+
+    scores = [{'id': aid, 'score': cosine(query_embedding, data['embedding'])} for aid, data in vectors.items()]
+    scores.sort(key=lambda x: x['score'], reverse=True)
+    return scores[:n_results]
+
+
+def timed(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--dim', type=int, default=768)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--legacy-max', type=int, default=10000, help="Skip the slow loop above this size")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    jobs = ["AI Engineer", "Backend Engineer", "Data Analyst", "General"]
+
+    print(f"{'applicants':>10} | {'legacy ms':>10} | {'numpy ms':>9} | {'filtered ms':>11} | {'speedup':>7}")
+    print("-" * 60)
+    for size in args.sizes:
+        embeddings = rng.standard_normal((size, args.dim)).astype(np.float32)
+        query = rng.standard_normal(args.dim).astype(np.float32)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            vdb = VectorDB(path=tmp, embedding_cache=False)
+            vdb.store.append(range(size), embeddings, [{"job": jobs[i % len(jobs)]} for i in range(size)])
+            vdb._ensure_index()
+            legacy_vectors = {str(i): {"embedding": embeddings[i].tolist()} for i in range(min(size, args.legacy_max))}
+
+            numpy_ms = timed(lambda: vdb.search_by_vector(query, n_results=5), args.repeat)
+            filtered_ms = timed(lambda: vdb.search_by_vector(query, n_results=5, where={"job": "AI Engineer"}), args.repeat)
+
+            if size <= args.legacy_max:
+                query_list = query.tolist()
+                legacy_ms = timed(lambda: legacy_query(legacy_vectors, query_list), 1)
+                speedup = f"{legacy_ms / numpy_ms:6.0f}x"
+                legacy = f"{legacy_ms:10.1f}"
+            else:
+                legacy, speedup = f"{'-':>10}", f"{'-':>7}"
+
+        print(f"{size:>10} | {legacy} | {numpy_ms:9.2f} | {filtered_ms:11.2f} | {speedup}")
+
+
+if __name__ == "__main__":
+    main()
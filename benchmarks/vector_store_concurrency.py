@@ -0,0 +1,117 @@
+"""
+Several processes adding vectors at once: file store vs. database store.
+
+Starts --processes writers that each append --writes batches of --batch
+vectors, at the same moment, to the segment file store and then to the
+database store (a fresh SQLite file, migrated first). Reports throughput
+and how many vectors are missing afterwards. Then reports the costs of the
+database store's per-process read cache: a refresh when nothing changed,
+a full reload, and a search of the cached matrix.
+
+    python benchmarks/vector_store_concurrency.py [--processes 4] [--writes 50] [--batch 10]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def setup_django(database):
+    sys.path.insert(0, ROOT)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    from django.conf import settings
+    settings.DATABASES['default']['NAME'] = database
+    import django
+    django.setup()
+
+
+def open_target(kind, path):
+    from ats.vector_db import open_store
+    return open_store(path, kind, os.path.basename(path))
+
+
+def writer(args):
+    import numpy as np
+    setup_django(args.database)
+    store = open_target(args.kind, args.path)
+    rng = np.random.default_rng(args.worker)
+    # Start together so the writes really overlap
+    time.sleep(max(0.0, args.start_at - time.time()))
+    for write in range(args.writes):
+        ids = [f"{args.worker}-{write}-{i}" for i in range(args.batch)]
+        store.append(ids, rng.standard_normal((args.batch, args.dim)).astype(np.float32))
+
+
+def run_writers(args, kind, path):
+    start_at = time.time() + 3.0
+    command = [sys.executable, '-W', 'ignore', os.path.abspath(__file__), '--child', kind, '--path', path,
+               '--database', args.database, '--start-at', str(start_at), '--writes', str(args.writes),
+               '--batch', str(args.batch), '--dim', str(args.dim)]
+    workers = [subprocess.Popen(command + ['--worker', str(n)], cwd=ROOT, stderr=subprocess.PIPE, text=True)
+               for n in range(args.processes)]
+    errors = 0
+    for worker in workers:
+        _, stderr = worker.communicate()
+        if worker.returncode:
+            errors += 1
+            print(stderr.strip().splitlines()[-1] if stderr.strip() else f"writer exited with {worker.returncode}")
+    seconds = time.time() - start_at
+    found = len(open_target(kind, path))
+    expected = args.processes * args.writes * args.batch
+    print(f"{kind:>9} | {expected / seconds:10.0f} | {expected:8d} | {found:8d} | {expected - found:6d} | {errors:6d}")
+    return open_target(kind, path)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--writes', type=int, default=50, help="Appends per process")
+    parser.add_argument('--batch', type=int, default=10, help="Vectors per append")
+    parser.add_argument('--dim', type=int, default=768)
+    parser.add_argument('--child', choices=['files', 'database'], help=argparse.SUPPRESS)
+    parser.add_argument('--path', help=argparse.SUPPRESS)
+    parser.add_argument('--database', help=argparse.SUPPRESS)
+    parser.add_argument('--worker', type=int, default=0, help=argparse.SUPPRESS)
+    parser.add_argument('--start-at', type=float, default=0.0, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        args.kind = args.child
+        return writer(args)
+
+    import numpy as np
+    with tempfile.TemporaryDirectory() as tmp:
+        args.database = os.path.join(tmp, 'db.sqlite3')
+        setup_django(args.database)
+        from django.core.management import call_command
+        call_command('migrate', verbosity=0)
+
+        print(f"{args.processes} processes x {args.writes} appends x {args.batch} vectors ({args.dim} dims)\n")
+        print(f"{'store':>9} | {'vectors/s':>10} | {'written':>8} | {'stored':>8} | {'lost':>6} | {'failed':>6}")
+        print("-" * 62)
+        run_writers(args, 'files', os.path.join(tmp, 'files'))
+        store = run_writers(args, 'database', os.path.join(tmp, 'vectors'))
+
+        query = np.ones(args.dim, dtype=np.float32) / np.sqrt(args.dim)
+        timings = {}
+        for label, fn in [
+            ("refresh, unchanged", store.refresh),
+            ("full reload", store.load),
+            ("exact scan of the cached matrix", lambda: store.dot(query)),
+            ("int8 scan of the cached matrix", lambda: store.dot_quantized(query)),
+        ]:
+            fn()
+            started = time.perf_counter()
+            for _ in range(10):
+                fn()
+            timings[label] = (time.perf_counter() - started) / 10
+        print(f"\ndatabase store read cache ({len(store)} vectors):")
+        for label, seconds in timings.items():
+            print(f"  {label:>32}: {seconds * 1000:8.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Cold-start cost of the vector store: legacy vectors.json versus binary segments.
+
+Measures the time to open the store (what every VectorDB() construction pays)
+and the cost of one append, on synthetic 768-dimensional embeddings.
+
+    python benchmarks/vector_store_load.py [--sizes 1000 10000 50000]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ats.vector_store import SegmentStore
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--dim', type=int, default=768)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'applicants':>10} | {'json MB':>8} | {'json load ms':>12} | {'json append ms':>14} | {'seg MB':>7} | {'seg load ms':>11} | {'seg append ms':>13}")
+    print("-" * 95)
+    for size in args.sizes:
+        embeddings = rng.standard_normal((size, args.dim)).astype(np.float32)
+        metadata = [{"name": f"Applicant {i}", "job": "General"} for i in range(size)]
+        with tempfile.TemporaryDirectory() as tmp:
+            legacy = os.path.join(tmp, 'vectors.json')
+            vectors = {str(i): {"embedding": embeddings[i].tolist(), "metadata": metadata[i], "text": ""} for i in range(size)}
+            with open(legacy, 'w') as f:
+                json.dump(vectors, f)
+
+            start = time.perf_counter()
+            with open(legacy) as f:
+                vectors = json.load(f)
+            json_load = (time.perf_counter() - start) * 1000
+
+            # Legacy add_applicant: mutate dict, rewrite the whole file
+            start = time.perf_counter()
+            vectors["new"] = {"embedding": embeddings[0].tolist(), "metadata": {}, "text": ""}
+            with open(legacy, 'w') as f:
+                json.dump(vectors, f)
+            json_append = (time.perf_counter() - start) * 1000
+            json_mb = os.path.getsize(legacy) / 1e6
+
+            store_dir = os.path.join(tmp, 'store')
+            SegmentStore(store_dir).append(range(size), embeddings, metadata)
+
+            start = time.perf_counter()
+            store = SegmentStore(store_dir)
+            seg_load = (time.perf_counter() - start) * 1000
+
+            start = time.perf_counter()
+            store.append(["new"], embeddings[:1])
+            seg_append = (time.perf_counter() - start) * 1000
+            seg_mb = sum(os.path.getsize(os.path.join(store_dir, n)) for n in os.listdir(store_dir)) / 1e6
+
+        print(f"{size:>10} | {json_mb:8.1f} | {json_load:12.1f} | {json_append:14.1f} | {seg_mb:7.1f} | {seg_load:11.1f} | {seg_append:13.1f}")
+
+
+if __name__ == "__main__":
+    main()
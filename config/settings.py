@@ -159,6 +159,13 @@ if 'VERCEL' in os.environ:
 else:
     MEDIA_ROOT = BASE_DIR / 'media'
 
+# Hash uploads while they stream so duplicate resumes skip processing (ats/uploads.py)
+FILE_UPLOAD_HANDLERS = [
+    'ats.uploads.HashingUploadHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
@@ -166,3 +173,214 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Google Gemini API Key
 GOOGLE_API_KEY = os.getenv('GOOGLE_API_KEY')
+
+# Vector store (memory-mapped binary segments, see ats/vector_store.py)
+if 'VERCEL' in os.environ:
+    ATS_VECTOR_STORE_DIR = Path('/tmp/vector_store')
+else:
+    ATS_VECTOR_STORE_DIR = BASE_DIR / 'vector_store'
+
+# Where the vectors themselves live: 'files' (segments in ATS_VECTOR_STORE_DIR)
+# or 'database' (StoredVector rows, see ats/db_store.py). Use 'database' when
+# several processes (gunicorn workers, queue workers) add vectors at once;
+# concurrent appends to the file store can lose each other's vectors.
+# COLLECTION names the database rows: '<COLLECTION>.applicants' and
+# '<COLLECTION>.jobs'. The keyword index stays in ATS_VECTOR_STORE_DIR
+# (writers take a lock file); with 'database', IVF centroids are kept in
+# memory per process instead of being saved there.
+ATS_VECTOR_STORE = {
+    'TYPE': os.getenv('ATS_VECTOR_STORE', 'files'),
+    'COLLECTION': os.getenv('ATS_VECTOR_COLLECTION', 'ats'),
+}
+
+# Optional approximate nearest neighbour index for VectorDB ('exact' or 'ivf').
+# NPROBE trades recall for speed; the IVF index is trained once the store holds
+# MIN_TRAIN_SIZE vectors and retrained after it grows RETRAIN_FACTOR-fold.
+# Without IVF, QUANTIZE='int8' scans the int8 copy of the vectors (a quarter of
+# the memory) and re-scores the best RESCORE (at least 4x the requested
+# results) with the float32 vectors; 'none' scans the float32 vectors.
+ATS_VECTOR_INDEX = {
+    'TYPE': os.getenv('ATS_VECTOR_INDEX', 'exact'),
+    'NLIST': int(os.getenv('ATS_VECTOR_INDEX_NLIST', '64')),
+    'NPROBE': int(os.getenv('ATS_VECTOR_INDEX_NPROBE', '8')),
+    'MIN_TRAIN_SIZE': 1000,
+    'RETRAIN_FACTOR': 4,
+    'QUANTIZE': os.getenv('ATS_VECTOR_QUANTIZE', 'int8'),
+    'RESCORE': int(os.getenv('ATS_VECTOR_RESCORE', '100')),
+}
+
+# Content-addressed embedding cache (in-memory LRU in front of a SQLite file)
+ATS_EMBEDDING_CACHE = {
+    'ENABLED': os.getenv('ATS_EMBEDDING_CACHE', 'True') == 'True',
+    'PATH': (Path('/tmp') if 'VERCEL' in os.environ else BASE_DIR) / 'embedding_cache.sqlite3',
+    'MEMORY_ITEMS': 1024,
+}
+
+# Bulk embedding (VectorDB.add_applicants_bulk): documents per remote request,
+# concurrent requests, retries per failed request, documents per store commit
+ATS_EMBEDDING_BATCH = {
+    'BATCH_SIZE': 100,
+    'MAX_WORKERS': 4,
+    'MAX_RETRIES': 3,
+    'COMMIT_EVERY': 500,
+}
+
+# Embedding backend (ats/embeddings.py): 'gemini' calls the embedding API,
+# 'local' hashes terms into DIM dimensions on the CPU, offline. Stores record
+# the backend that wrote them; after switching, run `manage.py reindex_vectors`.
+ATS_EMBEDDINGS = {
+    'BACKEND': os.getenv('ATS_EMBEDDING_BACKEND', 'gemini'),
+    'GEMINI': {
+        'MODEL': 'models/embedding-001',
+    },
+    'LOCAL': {
+        'DIM': int(os.getenv('ATS_LOCAL_EMBEDDING_DIM', '256')),
+        'HASHES': 4,
+        'SEED': 0,
+    },
+}
+
+# Resume compaction before the agents (ats/compaction.py): whitespace and
+# running headers/footers are dropped and each agent gets a section-aware
+# digest of at most BUDGETS[agent] tokens. Disabled, agents get the raw text
+# (the ranking agent its first 4000 characters) as before.
+ATS_COMPACTION = {
+    'ENABLED': os.getenv('ATS_COMPACTION_ENABLED', 'True') == 'True',
+    'BUDGETS': {'parsing': 1500, 'skills': 1500, 'ranking': 1000, 'fused': 2500},
+}
+
+# Agent pipeline: "concurrent" runs the three agents in parallel, "sequential"
+# one after another, "fused" sends a single combined request per resume.
+# Timeouts (seconds) apply per agent in concurrent mode.
+ATS_ORCHESTRATOR = {
+    'MODE': os.getenv('ATS_ORCHESTRATOR_MODE', 'concurrent'),
+    'TIMEOUTS': {
+        'parsed': 60,
+        'skills': 60,
+        'ranking': 60,
+    },
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'ats': {
+            'handlers': ['console'],
+            'level': os.getenv('ATS_LOG_LEVEL', 'INFO'),
+        },
+    },
+}
+
+# Opt-in LLM response cache keyed by (model, prompt hash). AGENTS lists the
+# agent classes that use it (e.g. "ParsingAgent,SkillExtractionAgent" or "*").
+ATS_LLM_CACHE = {
+    'AGENTS': [name.strip() for name in os.getenv('ATS_LLM_CACHE_AGENTS', '').split(',') if name.strip()],
+    'PATH': (Path('/tmp') if 'VERCEL' in os.environ else BASE_DIR) / 'llm_cache.sqlite3',
+    'TTL': 7 * 24 * 3600,
+    'MAX_ENTRIES': 5000,
+    'MAX_BYTES': 50 * 1024 * 1024,
+}
+
+# Processing queue. With ASYNC, uploads and saved jobs (embedding and
+# matching) are queued and handled by `manage.py run_ats_worker`; Vercel has
+# no long-running workers, so both are processed inside the request there.
+# RETRY_DELAY (s) doubles per attempt;
+# LOCK_TIMEOUT (s) is how long before a crashed worker's job is re-queued;
+# running workers check for such jobs every REQUEUE_INTERVAL (s).
+ATS_PROCESSING = {
+    'ASYNC': os.getenv('ATS_ASYNC_PROCESSING', 'False' if 'VERCEL' in os.environ else 'True') == 'True',
+    'MAX_ATTEMPTS': 3,
+    'RETRY_DELAY': 30,
+    'LOCK_TIMEOUT': 900,
+    'REQUEUE_INTERVAL': 60,
+    'WORKERS': int(os.getenv('ATS_WORKERS', '2')),
+    'POLL_INTERVAL': 2,
+}
+
+# Bulk ingestion (`manage.py ingest_resumes`): resumes in the agent pipeline
+# at once, and resumes written per transaction/checkpoint
+ATS_INGEST = {
+    'LLM_CONCURRENCY': 4,
+    'BATCH_SIZE': 25,
+}
+
+# Resume text extraction budgets (see ats/extraction.py)
+ATS_EXTRACTION = {
+    'MAX_PAGES': 20,
+    'MAX_CHARS': 20000,
+    'TIMEOUT': 20,
+    'PARALLEL_MIN_PAGES': 12,
+    'WORKERS': min(4, os.cpu_count() or 1),
+}
+
+# Client-side limits for Gemini calls (ats/ratelimit.py). MODELS is the routing
+# order for the agents; LIMITS are per model requests/tokens per minute, with
+# 'default' for models not listed. A model's circuit opens after
+# BREAKER_THRESHOLD consecutive 429/5xx errors for BREAKER_RESET seconds.
+ATS_RATE_LIMIT = {
+    'MODELS': [name.strip() for name in os.getenv('ATS_LLM_MODELS', 'gemini-2.5-flash,gemini-2.0-flash').split(',') if name.strip()],
+    'LIMITS': {
+        'default': {'RPM': int(os.getenv('ATS_LLM_RPM', '10')), 'TPM': int(os.getenv('ATS_LLM_TPM', '250000'))},
+        'models/embedding-001': {'RPM': 1500, 'TPM': 1000000},
+    },
+    'MAX_RETRIES': 4,
+    'BACKOFF_BASE': 1.0,
+    'BACKOFF_MAX': 30,
+    'MAX_WAIT': 60,
+    'BREAKER_THRESHOLD': 3,
+    'BREAKER_RESET': 60,
+}
+
+# Candidate dashboard: applicants per page
+ATS_DASHBOARD = {
+    'PAGE_SIZE': int(os.getenv('ATS_DASHBOARD_PAGE_SIZE', '25')),
+}
+
+# In-memory skill index (ats/skill_index.py). Writes in the same process are
+# applied immediately; MAX_AGE (s) bounds staleness from other processes.
+ATS_SKILL_INDEX = {
+    'MAX_AGE': int(os.getenv('ATS_SKILL_INDEX_MAX_AGE', '300')),
+}
+
+# Local applicant scoring (ats/scoring.py), stored next to the ranking agent's
+# scores. WEIGHTS are relative; cosine similarities below/above
+# SIMILARITY_RANGE map to 0/100 (the local embedding backend's cosines run
+# lower than Gemini's). EXPERIENCE_YEARS is used when the job text doesn't ask
+# for a number of years.
+ATS_SCORING = {
+    'WEIGHTS': {'skills': 0.5, 'similarity': 0.3, 'experience': 0.2},
+    'SIMILARITY_RANGE': (0.5, 0.9) if ATS_EMBEDDINGS['BACKEND'] == 'gemini' else (0.1, 0.6),
+    'EXPERIENCE_YEARS': 5,
+}
+
+# Embedding prefilter in front of the ranking agent (ats/pipeline.py): a
+# resume less similar to the job's vector than THRESHOLD (cosine) gets a
+# provisional local score and is only ranked on request.
+ATS_PREFILTER = {
+    'ENABLED': os.getenv('ATS_PREFILTER_ENABLED', 'True') == 'True',
+    'THRESHOLD': float(os.getenv('ATS_PREFILTER_THRESHOLD', '0.6' if ATS_EMBEDDINGS['BACKEND'] == 'gemini' else '0.25')),
+}
+
+# Precomputed job <-> applicant matches (ats/matching.py): suggestions kept
+# per job and per applicant.
+ATS_MATCHING = {
+    'TOP_K': int(os.getenv('ATS_MATCHING_TOP_K', '10')),
+}
+
+# Hybrid resume search (VectorDB.hybrid_search): BM25 over the resume text
+# fused with vector results by reciprocal rank. Without a query embedding
+# within EMBED_TIMEOUT (s) the keyword results are used alone.
+ATS_HYBRID_SEARCH = {
+    'CANDIDATES': 50,
+    'RRF_K': 60,
+    'EMBED_TIMEOUT': 2.0,
+    'BM25_K1': 1.2,
+    'BM25_B': 0.75,
+    'COMPACT_RATIO': 0.25,
+}